@@ -0,0 +1,323 @@
+"""
+Offline airport/city index for flight location resolution.
+
+Maps IATA codes, city names and aliases to Booking.com flight location ids
+(`LON.CITY`, `JFK.AIRPORT`, ...) so common inputs resolve without a
+Search_Flight_Location call. The index is a sorted key table built once from
+the seed data below into a compact JSON file. It is loaded into memory and
+searched with bisect, so lookups take microseconds. Places resolved over the
+network are added with learn() and persisted in batches. Several processes
+share the file: each save merges in the rows already on disk under a file
+lock, so no worker overwrites entries another one learned.
+
+Configuration (env):
+    AIRPORT_INDEX                - set to 0 to disable the index (default enabled)
+    AIRPORT_INDEX_PATH           - index file (default: <tmp>/jetset_airport_index.json)
+    AIRPORT_INDEX_SAVE_INTERVAL  - seconds learned places wait to be saved together (default 30)
+"""
+
+import contextlib
+import os
+import json
+import difflib
+import tempfile
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves still merge, just without the cross-process lock
+    fcntl = None
+
+INDEX_VERSION = 1
+
+# (IATA city code, name, "|"-separated aliases) -> "<CODE>.CITY"
+SEED_CITIES = [
+    ("LON", "London", ""), ("NYC", "New York", "new york city"), ("PAR", "Paris", ""),
+    ("TYO", "Tokyo", ""), ("BJS", "Beijing", "peking"), ("SHA", "Shanghai", ""),
+    ("HKG", "Hong Kong", ""), ("SIN", "Singapore", ""), ("SYD", "Sydney", ""),
+    ("MEL", "Melbourne", ""), ("DXB", "Dubai", ""), ("LAX", "Los Angeles", ""),
+    ("SFO", "San Francisco", ""), ("CHI", "Chicago", ""), ("WAS", "Washington", "washington dc"),
+    ("BOS", "Boston", ""), ("MIA", "Miami", ""), ("SEA", "Seattle", ""),
+    ("YTO", "Toronto", ""), ("YVR", "Vancouver", ""), ("YMQ", "Montreal", ""),
+    ("MEX", "Mexico City", ""), ("SAO", "Sao Paulo", ""), ("RIO", "Rio de Janeiro", ""),
+    ("BUE", "Buenos Aires", ""), ("MAD", "Madrid", ""), ("BCN", "Barcelona", ""),
+    ("ROM", "Rome", "roma"), ("MIL", "Milan", "milano"), ("BER", "Berlin", ""),
+    ("FRA", "Frankfurt", ""), ("MUC", "Munich", "munchen"), ("AMS", "Amsterdam", ""),
+    ("BRU", "Brussels", ""), ("ZRH", "Zurich", ""), ("GVA", "Geneva", ""),
+    ("VIE", "Vienna", "wien"), ("CPH", "Copenhagen", ""), ("STO", "Stockholm", ""),
+    ("OSL", "Oslo", ""), ("HEL", "Helsinki", ""), ("DUB", "Dublin", ""),
+    ("LIS", "Lisbon", "lisboa"), ("IST", "Istanbul", ""), ("ATH", "Athens", ""),
+    ("MOW", "Moscow", ""), ("DEL", "Delhi", "new delhi"), ("BOM", "Mumbai", ""),
+    ("BLR", "Bangalore", "bengaluru"), ("BKK", "Bangkok", ""), ("KUL", "Kuala Lumpur", ""),
+    ("JKT", "Jakarta", ""), ("MNL", "Manila", ""), ("SEL", "Seoul", ""),
+    ("OSA", "Osaka", ""), ("TPE", "Taipei", ""), ("AKL", "Auckland", ""),
+    ("JNB", "Johannesburg", ""), ("CPT", "Cape Town", ""), ("CAI", "Cairo", ""),
+    ("DOH", "Doha", ""), ("AUH", "Abu Dhabi", ""), ("LAS", "Las Vegas", ""),
+    ("ORL", "Orlando", ""), ("DFW", "Dallas", ""), ("HOU", "Houston", ""),
+    ("ATL", "Atlanta", ""), ("DEN", "Denver", ""), ("PHL", "Philadelphia", ""),
+]
+
+# (IATA airport code, name, "|"-separated aliases) -> "<CODE>.AIRPORT"
+SEED_AIRPORTS = [
+    ("JFK", "John F. Kennedy International Airport", "kennedy"),
+    ("EWR", "Newark Liberty International Airport", "newark"),
+    ("LGA", "LaGuardia Airport", "laguardia"),
+    ("LHR", "London Heathrow Airport", "heathrow"),
+    ("LGW", "London Gatwick Airport", "gatwick"),
+    ("STN", "London Stansted Airport", "stansted"),
+    ("CDG", "Paris Charles de Gaulle Airport", "charles de gaulle"),
+    ("ORY", "Paris Orly Airport", "orly"),
+    ("HND", "Tokyo Haneda Airport", "haneda"),
+    ("NRT", "Tokyo Narita International Airport", "narita"),
+    ("PEK", "Beijing Capital International Airport", ""),
+    ("PKX", "Beijing Daxing International Airport", "daxing"),
+    ("PVG", "Shanghai Pudong International Airport", "pudong"),
+    ("ICN", "Seoul Incheon International Airport", "incheon"),
+    ("KIX", "Osaka Kansai International Airport", "kansai"),
+    ("ORD", "Chicago O'Hare International Airport", "o hare|ohare"),
+    ("IAD", "Washington Dulles International Airport", "dulles"),
+    ("DCA", "Ronald Reagan Washington National Airport", ""),
+    ("YYZ", "Toronto Pearson International Airport", "pearson"),
+    ("YUL", "Montreal-Trudeau International Airport", ""),
+    ("FCO", "Rome Fiumicino Airport", "fiumicino"),
+    ("MXP", "Milan Malpensa Airport", "malpensa"),
+    ("GRU", "Sao Paulo Guarulhos International Airport", "guarulhos"),
+    ("GIG", "Rio de Janeiro Galeao International Airport", "galeao"),
+    ("EZE", "Buenos Aires Ezeiza International Airport", "ezeiza"),
+    ("ARN", "Stockholm Arlanda Airport", "arlanda"),
+    ("SVO", "Moscow Sheremetyevo International Airport", "sheremetyevo"),
+    ("MCO", "Orlando International Airport", ""),
+    ("IAH", "Houston George Bush Intercontinental Airport", ""),
+    ("SIN", "Singapore Changi Airport", "changi"),
+    ("HKG", "Hong Kong International Airport", "chek lap kok"),
+    ("SYD", "Sydney Kingsford Smith Airport", "kingsford smith"),
+    ("MEL", "Melbourne Tullamarine Airport", "tullamarine"),
+    ("DXB", "Dubai International Airport", ""),
+    ("LAX", "Los Angeles International Airport", ""),
+    ("SFO", "San Francisco International Airport", ""),
+    ("BOS", "Boston Logan International Airport", "logan"),
+    ("MIA", "Miami International Airport", ""),
+    ("SEA", "Seattle-Tacoma International Airport", "seatac"),
+    ("YVR", "Vancouver International Airport", ""),
+    ("MEX", "Mexico City International Airport", ""),
+    ("MAD", "Madrid Barajas Airport", "barajas"),
+    ("BCN", "Barcelona El Prat Airport", "el prat"),
+    ("BER", "Berlin Brandenburg Airport", ""),
+    ("FRA", "Frankfurt Airport", ""),
+    ("MUC", "Munich Airport", ""),
+    ("AMS", "Amsterdam Schiphol Airport", "schiphol"),
+    ("ZRH", "Zurich Airport", ""),
+    ("VIE", "Vienna International Airport", ""),
+    ("CPH", "Copenhagen Airport", "kastrup"),
+    ("DUB", "Dublin Airport", ""),
+    ("LIS", "Lisbon Humberto Delgado Airport", ""),
+    ("IST", "Istanbul Airport", ""),
+    ("DOH", "Hamad International Airport", "hamad"),
+    ("DEL", "Indira Gandhi International Airport", ""),
+    ("BOM", "Chhatrapati Shivaji Maharaj International Airport", ""),
+    ("BKK", "Bangkok Suvarnabhumi Airport", "suvarnabhumi"),
+    ("KUL", "Kuala Lumpur International Airport", ""),
+    ("TPE", "Taiwan Taoyuan International Airport", "taoyuan"),
+    ("AKL", "Auckland Airport", ""),
+    ("ATL", "Hartsfield-Jackson Atlanta International Airport", "hartsfield jackson"),
+    ("DFW", "Dallas/Fort Worth International Airport", ""),
+    ("DEN", "Denver International Airport", ""),
+    ("LAS", "Harry Reid International Airport", ""),
+    ("PHL", "Philadelphia International Airport", ""),
+]
+
+
+def _default_path() -> str:
+    return os.getenv('AIRPORT_INDEX_PATH') or os.path.join(tempfile.gettempdir(), 'jetset_airport_index.json')
+
+
+class AirportIndex:
+    """Sorted key -> location table with exact, unique-prefix and fuzzy lookup."""
+
+    def __init__(self, normalize: Callable[[str], str], path: str = None, save_interval: float = None):
+        self.normalize = normalize
+        self.path = path or _default_path()
+        if save_interval is None:
+            save_interval = float(os.getenv('AIRPORT_INDEX_SAVE_INTERVAL', '30'))
+        self.save_interval = save_interval
+        self._keys: List[str] = []
+        self._rows: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+
+    # ------------------------------------------------------------------ build
+
+    def build(self):
+        """(Re)build the table from the seed data. City names win over airport names;
+        a bare IATA code always means the airport."""
+        table: Dict[str, Dict[str, str]] = {}
+        for code, name, aliases in SEED_CITIES:
+            row = {'id': f"{code}.CITY", 'name': name}
+            for key in [name] + [a for a in aliases.split('|') if a]:
+                table.setdefault(self.normalize(key), row)
+        for code, name, aliases in SEED_AIRPORTS:
+            row = {'id': f"{code}.AIRPORT", 'name': name}
+            # A typed IATA code means the airport, even if a city shares the code
+            table[code.lower()] = row
+            for key in [name] + [a for a in aliases.split('|') if a]:
+                table.setdefault(self.normalize(key), row)
+        self._set_table(table)
+
+    def _set_table(self, table: Dict[str, Dict[str, str]]):
+        keys = sorted(table)
+        with self._lock:
+            self._keys = keys
+            self._rows = [table[k] for k in keys]
+
+    def load(self) -> "AirportIndex":
+        """Load the index file, building and saving it first if missing or outdated."""
+        try:
+            self._set_table(self._read())
+        except (IOError, ValueError, KeyError, TypeError):
+            self.build()
+            self.save()
+        return self
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError("index version changed")
+        return {key: {'id': loc_id, 'name': name} for key, loc_id, name in data['rows']}
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self):
+        """Write the table, plus any rows other processes saved since we loaded, atomically."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            with self._file_lock():
+                try:
+                    on_disk = self._read()
+                except (IOError, ValueError, KeyError, TypeError):
+                    on_disk = {}
+                with self._lock:
+                    # Our rows win; rows only on disk were learned elsewhere and are kept
+                    table = dict(on_disk, **dict(zip(self._keys, self._rows)))
+                    self._keys = sorted(table)
+                    self._rows = [table[k] for k in self._keys]
+                    rows = [[k, r['id'], r['name']] for k, r in zip(self._keys, self._rows)]
+                fd, tmp_path = tempfile.mkstemp(prefix='.airport_index_', dir=directory)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'version': INDEX_VERSION, 'rows': rows}, f, separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[AIRPORT INDEX] Could not save {self.path}: {e}")
+
+    def _flush(self):
+        with self._lock:
+            self._save_timer = None
+        self.save()
+
+    # ----------------------------------------------------------------- lookup
+
+    def lookup(self, query: str) -> Optional[Dict[str, str]]:
+        """Resolve a place to {'id', 'name'}: exact key, then unique prefix, then close spelling."""
+        key = self.normalize(query)
+        if not key:
+            return None
+        with self._lock:
+            keys, rows = self._keys, self._rows
+        i = bisect_left(keys, key)
+        row = None
+        if i < len(keys) and keys[i] == key:
+            row = rows[i]
+        elif len(key) >= 4:
+            row = self._unique_prefix(keys, rows, key, i) or self._fuzzy(keys, rows, key)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dict(row) if row else None
+
+    @staticmethod
+    def _unique_prefix(keys, rows, key, i) -> Optional[Dict[str, str]]:
+        # "lond" -> "london": the shortest completion wins if every other
+        # completion extends it ("london heathrow airport"); otherwise ambiguous
+        if i >= len(keys) or not keys[i].startswith(key):
+            return None
+        shortest, match = keys[i], rows[i]
+        for j in range(i, len(keys)):
+            k = keys[j]
+            if not k.startswith(key):
+                break
+            if len(k) < len(shortest):
+                shortest, match = k, rows[j]
+        for j in range(i, len(keys)):
+            k = keys[j]
+            if not k.startswith(key):
+                break
+            if rows[j]['id'] != match['id'] and not k.startswith(shortest + ' '):
+                return None
+        return match
+
+    @staticmethod
+    def _fuzzy(keys, rows, key) -> Optional[Dict[str, str]]:
+        # Only compare against keys with the same first letter and a similar length
+        lo, hi = bisect_left(keys, key[0]), bisect_left(keys, chr(ord(key[0]) + 1))
+        candidates = [k for k in keys[lo:hi] if abs(len(k) - len(key)) <= 2]
+        close = difflib.get_close_matches(key, candidates, n=1, cutoff=0.85)
+        return rows[bisect_left(keys, close[0])] if close else None
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """All distinct locations whose key starts with prefix (autocomplete)."""
+        key = self.normalize(prefix)
+        with self._lock:
+            keys, rows = self._keys, self._rows
+        results, seen = [], set()
+        i = bisect_left(keys, key)
+        while key and i < len(keys) and keys[i].startswith(key) and len(results) < limit:
+            if rows[i]['id'] not in seen:
+                seen.add(rows[i]['id'])
+                results.append(dict(rows[i]))
+            i += 1
+        return results
+
+    def learn(self, query: str, location: Dict[str, str]):
+        """Add a network-resolved place so the next lookup stays offline."""
+        key = self.normalize(query)
+        if not key or not location.get('id'):
+            return
+        with self._lock:
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                return
+            # Copy-on-write so concurrent lookups keep a consistent snapshot
+            self._keys = self._keys[:i] + [key] + self._keys[i:]
+            self._rows = self._rows[:i] + [{'id': location['id'], 'name': location.get('name', query)}] + self._rows[i:]
+            self.learned += 1
+            timer = None
+            if self.save_interval > 0 and self._save_timer is None:
+                # Places learned within save_interval are written in one save
+                timer = self._save_timer = threading.Timer(self.save_interval, self._flush)
+                timer.daemon = True
+        if self.save_interval <= 0:
+            self.save()
+        elif timer is not None:
+            timer.start()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'keys': len(self._keys), 'hits': self.hits,
+                    'misses': self.misses, 'learned': self.learned}
@@ -1,15 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
-import subprocess
 from dotenv import load_dotenv
-import requests
 import json
 import logging
 import re
+import copy
+import hashlib
+import queue
+import threading
 from datetime import datetime
-from claude_wrapper import call_claude_with_mcp, reformat_to_structured_json
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from claude_wrapper import call_claude, extraction_stats, start_cli_pool
 from log_monitor import ClaudeLogMonitor
+from search_engine import FlightSearchEngine, SearchQueueFull
+from search_jobs import search_jobs
+from intent_parser import intent_parser
+from json_extract import extract_json, stats as json_extract_stats
+from locations import location_cache, location_lookups, get_airport_index, resolve_route
+from booking_com_client import get_shared_booking
+from conversation_store import create_conversation_store
+from ttl_cache import TTLCache
+from shared_cache import get_shared_kv, shared_namespace
+from flight_search import (flight_cache, flight_searches, run_search, run_date_range_search,
+                           run_multi_city_search, price_calendar_cache, min_price_lookups, run_price_calendar,
+                           PRICE_CALENDAR_DAYS)
 
 # Load environment variables
 load_dotenv()
@@ -29,14 +44,27 @@ API_KEY = os.getenv('ANTHROPIC_API_KEY')
 BASE_URL = os.getenv('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')
 MODEL = os.getenv('ANTHROPIC_MODEL', 'claude-opus-4-6')
 
-# Store conversation history (in production, use a database)
-conversations = {}
-# Store last search parameters per conversation for better context
-last_search_params = {}
+# Per-conversation history and last search parameters (bounded, see conversation_store.py)
+conversation_store = create_conversation_store()
 
 # Initialize log monitor
 log_monitor = ClaudeLogMonitor("jetset-ai")
 
+# In-process flight search engine (bounded worker pool, see search_engine.py)
+search_engine = FlightSearchEngine()
+SEARCH_TIMEOUT = float(os.getenv('FLIGHT_SEARCH_TIMEOUT', '120'))
+# Nearby-dates fares shown in chat are best effort; don't hold the reply for them
+PRICE_CALENDAR_TIMEOUT = float(os.getenv('PRICE_CALENDAR_TIMEOUT', '10'))
+# ...nor let them take a search_engine slot a chat's own search needs: they get
+# a few threads of their own and no queue, so they are dropped (or, on
+# /api/price-calendar, refused with 503) when those are busy
+calendar_engine = FlightSearchEngine(max_workers=int(os.getenv('PRICE_CALENDAR_WORKERS', '4')),
+                                     queue_limit=0)
+# Skip the LLM for requests the deterministic intent parser understands
+FAST_INTENT = os.getenv('FAST_INTENT', '1').lower() not in ('0', 'false', 'no')
+# Seconds between keep-alive comments on /api/chat/stream
+STREAM_HEARTBEAT = float(os.getenv('CHAT_STREAM_HEARTBEAT', '15'))
+
 # SYSTEM PROMPT FOR PARAMETER EXTRACTION
 # Claude only extracts search parameters - the fixed script handles the actual search
 SYSTEM_PROMPT = """You are JetSet, a friendly AI travel assistant. Your job is to understand user travel requests and extract search parameters.
@@ -70,6 +98,19 @@ For DATE RANGE CLARIFICATION (when user provides a date range), respond with:
 }
 ```
 
+For MULTI-CITY trips (three or more cities, e.g. "Paris to Rome on May 2, then Rome to Athens on May 6"), respond with:
+```json
+{
+    "type": "multi_city_search",
+    "legs": [
+        {"origin": "city name", "destination": "city name", "date": "the date in any format"},
+        {"origin": "city name", "destination": "city name", "date": "the date in any format"}
+    ],
+    "adults": 1,
+    "cabin_class": "ECONOMY"
+}
+```
+
 For GENERAL CONVERSATION (greetings, questions, etc.), respond with:
 ```json
 {
@@ -91,7 +132,7 @@ RULES:
 2. Extract the date - keep it EXACTLY as the user said it (e.g., "next friday", "this Saturday", "March 15", "tomorrow", "weekend")
 3. Default adults to 1 unless specified
 4. Default cabin_class to "ECONOMY" unless user mentions business/first class
-5. Set return_date only for round trips
+5. Set return_date only for round trips (a trip back to the origin); use multi_city_search for anything else with several legs
 6. For greetings or non-search messages, use type "conversation"
 
 IMPORTANT DATE EXTRACTION RULES:
@@ -219,62 +260,33 @@ User: "flights from Beijing to Singapore from March 1 to March 5" (date range -
 
 RESPOND WITH ONLY THE JSON OBJECT - NO OTHER TEXT."""
 
-
-def run_flight_search(params: dict) -> dict:
-    """Run the fixed flight_search.py script with extracted parameters."""
+# Pre-start CLI workers for the base prompt (CLAUDE_CLI_POOL_SIZE > 0 only)
+start_cli_pool(SYSTEM_PROMPT)
+
+# Memo cache for LLM parameter extraction, keyed on the prompt version, the
+# normalized message, the last-search context and the history sent. Bump PROMPT_VERSION (or
+# change SYSTEM_PROMPT) to invalidate it.
+PROMPT_VERSION = os.getenv('PROMPT_VERSION') or hashlib.sha256(SYSTEM_PROMPT.encode()).hexdigest()[:12]
+EXTRACTION_CONTEXT_FIELDS = ('origin', 'destination', 'date', 'adults', 'cabin_class',
+                             'awaiting_date_range_clarification', 'date_range_start', 'date_range_end')
+extraction_cache = TTLCache(maxsize=int(os.getenv('EXTRACTION_CACHE_SIZE', '1000')),
+                            ttl=float(os.getenv('EXTRACTION_CACHE_TTL', '3600')),
+                            shared=shared_namespace('extraction'))
+RELATIVE_DATE_RE = re.compile(r"\b(?:today|tonight|tomorrow|weekend|next|this|coming|in \d+ (?:days?|weeks?)|"
+                              r"(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b")
+ABSOLUTE_DATE_RE = re.compile(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}")
+
+
+def run_flight_search(params: dict, runner=run_search) -> dict:
+    """Run a flight search with extracted parameters on the in-process search engine."""
     try:
-        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flight_search.py')
-
-        cmd = [
-            'python3', script_path,
-            '--origin', params.get('origin', ''),
-            '--destination', params.get('destination', ''),
-            '--date', params.get('date', 'next week'),
-            '--adults', str(params.get('adults', 1)),
-            '--cabin_class', params.get('cabin_class', 'ECONOMY').upper()
-        ]
-
-        if params.get('return_date'):
-            cmd.extend(['--return_date', params['return_date']])
-
-        logger.info(f"Running flight search: {' '.join(cmd)}")
-
-        # Delete stale results file BEFORE running the search
-        # This prevents serving old data if the script crashes
-        output_file = '/tmp/jetset_flights.json'
-        if os.path.exists(output_file):
-            os.remove(output_file)
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
-
-        logger.info(f"Flight search stdout: {result.stdout}")
-        if result.stderr:
-            logger.warning(f"Flight search stderr: {result.stderr}")
-
-        # Check if the script failed (non-zero exit code)
-        if result.returncode != 0:
-            error_msg = result.stderr.strip() if result.stderr else "Unknown error"
-            # Extract the last meaningful line of the traceback
-            error_lines = [l for l in error_msg.split('\n') if l.strip() and not l.startswith('[')]
-            short_error = error_lines[-1] if error_lines else error_msg[:200]
-            logger.error(f"Flight search script failed (exit code {result.returncode}): {short_error}")
-            return {"error": f"Flight search failed: {short_error}", "flights": [], "summary": {}}
-
-        # Read results from file
-        output_file = '/tmp/jetset_flights.json'
-        if os.path.exists(output_file):
-            with open(output_file, 'r') as f:
-                return json.load(f)
-
-        return {"error": "No results file found - search may have failed", "flights": [], "summary": {}}
-
-    except subprocess.TimeoutExpired:
+        logger.info(f"Running flight search: {params}")
+        return search_engine.search(params, timeout=SEARCH_TIMEOUT, runner=runner)
+
+    except SearchQueueFull as e:
+        logger.warning(f"Flight search rejected: {str(e)}")
+        return {"error": "Our flight search is busy right now, please try again in a moment", "flights": [], "summary": {}}
+    except FutureTimeoutError:
         logger.error("Flight search timeout")
         return {"error": "Search timeout", "flights": [], "summary": {}}
     except Exception as e:
@@ -282,6 +294,45 @@ def run_flight_search(params: dict) -> dict:
         return {"error": str(e), "flights": [], "summary": {}}
 
 
+def fetch_price_calendar(params: dict):
+    """Start a price calendar lookup on calendar_engine; returns a Future or None if it is busy."""
+    try:
+        return calendar_engine.submit(run_price_calendar, params)
+    except SearchQueueFull:
+        logger.warning("Price calendar workers busy, skipping price calendar")
+        return None
+
+
+def price_calendar_result(future) -> dict:
+    """Wait briefly for a fetch_price_calendar Future; None on failure or timeout."""
+    if future is None:
+        return None
+    try:
+        calendar = future.result(timeout=PRICE_CALENDAR_TIMEOUT)
+    except FutureTimeoutError:
+        logger.warning(f"Price calendar timed out after {PRICE_CALENDAR_TIMEOUT:g}s")
+        return None
+    except Exception as e:
+        logger.warning(f"Price calendar failed: {e}")
+        return None
+    return calendar if calendar.get('success') else None
+
+
+def format_price_calendar(calendar: dict, title: str = "Nearby dates") -> str:
+    """Markdown lines for a price calendar ('' when there are no fares)."""
+    days = [day for day in (calendar or {}).get('days', []) if day.get('price') is not None]
+    if not days:
+        return ""
+    text = f"""
+
+📆 **{title}:**"""
+    for day in days:
+        marker = " ⭐ cheapest" if day.get('cheapest') else ""
+        text += f"""
+- {day['date']}: from ${day['price']:g} {day['currency']}{marker}"""
+    return text
+
+
 def generate_flight_response(flight_data: dict, params: dict) -> str:
     """Generate a friendly response from flight search results."""
     flights = flight_data.get('flights', [])
@@ -321,7 +372,7 @@ Would you like me to search for a different date or route?"""
 
     # Find cheapest and fastest flights
     cheapest = min(flights, key=lambda f: f.get('price', float('inf')))
-    fastest = min(flights, key=lambda f: _duration_to_minutes(f.get('duration', '999h')))
+    fastest = min(flights, key=lambda f: _duration_to_minutes(_total_duration(f)))
 
     # Find a budget alternative (different from cheapest)
     budget = None
@@ -340,12 +391,12 @@ Would you like me to search for a different date or route?"""
 
     response = f"""✈️ Found **{len(flights)} flights** from {origin} to {destination} on {date_display}!
 
-💰 **Best Value:** {cheapest['airline']} - ${cheapest['price']} {currency} ({_stops_text(cheapest['stops'])}, {cheapest['duration']})
-⚡ **Fastest:** {fastest['airline']} - ${fastest['price']} {currency} ({_stops_text(fastest['stops'])}, {fastest['duration']})"""
+💰 **Best Value:** {cheapest['airline']} - ${cheapest['price']} {currency} ({_stops_text(cheapest['stops'])}, {_total_duration(cheapest)})
+⚡ **Fastest:** {fastest['airline']} - ${fastest['price']} {currency} ({_stops_text(fastest['stops'])}, {_total_duration(fastest)})"""
 
     if budget:
         response += f"""
-💵 **Alternative:** {budget['airline']} - ${budget['price']} {currency} ({_stops_text(budget['stops'])}, {budget['duration']})"""
+💵 **Alternative:** {budget['airline']} - ${budget['price']} {currency} ({_stops_text(budget['stops'])}, {_total_duration(budget)})"""
 
     price_range = f"${summary.get('cheapestPrice', cheapest['price'])} - ${max(f['price'] for f in flights)}"
     dep_code = flights[0].get('departure', {}).get('airport', '')
@@ -354,7 +405,48 @@ Would you like me to search for a different date or route?"""
     response += f"""
 
 📊 **Price Range:** {price_range} {currency}
-🛫 **Route:** {dep_code} → {arr_code}
+🛫 **Route:** {dep_code} → {arr_code}"""
+
+    if len(cheapest.get('segments') or []) > 1:
+        response += """
+
+🧭 **Itinerary (best value):**"""
+        for segment in cheapest['segments']:
+            response += f"""
+- {segment['departure']['date']}: {segment['departure']['airport']} → {segment['arrival']['airport']} · {segment['airline']} ({_stops_text(segment['stops'])}, {segment['duration']})"""
+
+    comparison = flight_data.get('comparison')
+    if comparison:
+        cheaper = "round trip" if comparison['cheaperOption'] == 'round_trip' else "two one-ways"
+        response += f"""
+
+🔁 **Round trip vs two one-ways:** ${comparison['roundTripPrice']} vs ${comparison['oneWaysPrice']} {comparison['currency']}"""
+        if comparison['savings']:
+            response += f""" - the {cheaper} saves ${comparison['savings']}"""
+        else:
+            response += " - same price either way"
+
+    per_day = summary.get('cheapestPerDay') or []
+    if per_day:
+        response += """
+
+📅 **Cheapest per day:**"""
+        for day in per_day:
+            response += f"""
+- {day['date']}: {day['airline']} - ${day['price']} {day.get('currency', currency)}"""
+        if summary.get('daysSearched', 0) < summary.get('daysRequested', 0):
+            response += f"""
+_(showing the first {summary['daysSearched']} of {summary['daysRequested']} days)_"""
+
+    response += format_price_calendar(flight_data.get('price_calendar'),
+                                      f"±{PRICE_CALENDAR_DAYS} days")
+
+    age_s = flight_data.get('age_s') or 0
+    if flight_data.get('cached') and age_s >= 60:
+        response += f"""
+🕒 **Prices as of:** {int(age_s // 60)} min ago"""
+
+    response += """
 
 Click on any flight card below to book directly! ✨"""
 
@@ -374,6 +466,11 @@ def _duration_to_minutes(duration: str) -> int:
     return 9999
 
 
+def _total_duration(flight: dict) -> str:
+    """Whole-itinerary duration; 'duration' alone is the first segment's."""
+    return flight.get('totalDuration') or flight.get('duration', '999h')
+
+
 def _stops_text(stops: int) -> str:
     """Convert stops count to text."""
     if stops == 0:
@@ -388,49 +485,86 @@ def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
-    """Handle chat messages and flight searches"""
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: shared state is reachable and the search engine can take work"""
+    checks = {}
     try:
-        data = request.json
-        user_message = data.get('message', '')
-        conversation_id = data.get('conversation_id', 'default')
+        conversation_store.stats()
+        checks['conversation_store'] = 'ok'
+    except Exception as e:
+        checks['conversation_store'] = f'error: {e}'
+    shared = get_shared_kv()
+    checks['shared_cache'] = ('ok' if shared.ping() else 'error') if shared is not None else 'disabled'
+    engine = search_engine.stats()
+    checks['search_engine'] = 'ok' if engine['pending'] < engine['workers'] + engine['queue_limit'] else 'saturated'
+
+    ready = all(status in ('ok', 'disabled') for status in checks.values())
+    return jsonify({'status': 'ready' if ready else 'not_ready', 'pid': os.getpid(),
+                    'checks': checks}), 200 if ready else 503
+
+def _emit(on_progress, event: str, data: dict):
+    """Report a pipeline stage to on_progress (if any); a failing listener never breaks the chat."""
+    if on_progress is None:
+        return
+    try:
+        on_progress(event, data)
+    except Exception as e:
+        logger.warning(f"Progress listener failed on '{event}': {e}")
 
-        logger.info(f"Received message: {user_message[:100]}...")
 
-        # Initialize conversation history if needed
-        if conversation_id not in conversations:
-            conversations[conversation_id] = []
+def _emit_airports(on_progress, routes: list):
+    """Resolve [(origin, destination), ...] up front so the airports event arrives before offers.
 
-        # Add user message to history
-        conversations[conversation_id].append({
-            "role": "user",
-            "content": user_message
-        })
+    Lookups land in the location cache, so the search itself does not repeat them.
+    """
+    if on_progress is None:
+        return
+    try:
+        booking = get_shared_booking()
+        resolved = [resolve_route(booking, origin, destination) for origin, destination in routes]
+    except Exception as e:
+        # The search reports resolution errors itself
+        logger.info(f"Skipping airports event: {e}")
+        return
+    _emit(on_progress, 'airports', {'routes': [
+        {'origin': origin_location, 'destination': dest_location}
+        for origin_location, dest_location in resolved]})
 
-        # Step 1: Call Claude to extract parameters (fast, no script generation)
-        logger.info("Step 1: Extracting search parameters with Claude...")
 
-        # Build enhanced system prompt with last search context
-        enhanced_prompt = SYSTEM_PROMPT
-        if conversation_id in last_search_params:
-            last_params = last_search_params[conversation_id]
+def extraction_request(conversation_id: str):
+    """System prompt (with the last search as context) and recent history for an extraction call."""
+    # Build enhanced system prompt with last search context
+    enhanced_prompt = SYSTEM_PROMPT
+    last_params = conversation_store.get_params(conversation_id)
+    if last_params:
 
-            # Check if we're awaiting date range clarification
-            if last_params.get('awaiting_date_range_clarification'):
-                enhanced_prompt += f"""
+        # Check if we're awaiting date range clarification
+        if last_params.get('awaiting_date_range_clarification'):
+            enhanced_prompt += f"""
 
 CONTEXT - AWAITING DATE RANGE CLARIFICATION:
 The user previously mentioned dates from {last_params.get('date_range_start')} to {last_params.get('date_range_end')} for {last_params.get('origin')} to {last_params.get('destination')}.
 
 If the user responds with:
 - A specific date (e.g., "March 3", "the 10th", "1") → Set date to that specific date
-- "show all" or "all" or "2" → Set date={last_params.get('date_range_start')} (use the start date to begin searching)
+- "show all" or "all" or "2" → Respond with type "date_range_search" (format below) to search every day in the range
 - Any other date preference → Use the date they mention
 
-Extract the appropriate parameters for flight_search based on their response."""
-            else:
-                enhanced_prompt += f"""
+For a specific date, extract the parameters for flight_search. For "show all", respond with:
+```json
+{{
+"type": "date_range_search",
+"origin": "{last_params.get('origin')}",
+"destination": "{last_params.get('destination')}",
+"date_range_start": "{last_params.get('date_range_start')}",
+"date_range_end": "{last_params.get('date_range_end')}",
+"adults": 1,
+"cabin_class": "ECONOMY"
+}}
+```"""
+        else:
+            enhanced_prompt += f"""
 
 CONTEXT - LAST SEARCH PARAMETERS:
 - Origin: {last_params.get('origin', 'N/A')}
@@ -441,126 +575,273 @@ CONTEXT - LAST SEARCH PARAMETERS:
 
 Use these as defaults if the user refers to them implicitly (e.g., "no, next Wednesday" means same origin/destination, different date)."""
 
-        # Limit conversation history to last 10 messages for better context
-        recent_history = conversations[conversation_id][:-1][-10:]
+    return enhanced_prompt, _recent_history(conversation_id)
 
-        result = call_claude_with_mcp(user_message, recent_history, system_prompt=enhanced_prompt)
 
-        if not result['success']:
-            raise Exception(result['error'] or 'Failed to get response from Claude')
+def _recent_history(conversation_id: str) -> list:
+    """History sent with an extraction call: the last 10 messages before the current one."""
+    return conversation_store.history(conversation_id)[:-1][-10:]
 
-        raw_response = result['response']
-        logger.info(f"Claude response: {raw_response[:200]}...")
 
-        # Step 2: Parse the JSON parameters from Claude's response
-        logger.info("Step 2: Parsing parameters...")
+def extract_params_with_claude(user_message: str, conversation_id: str):
+    """Steps 1 + 2: ask Claude for the search parameters and parse its JSON. Returns (params, raw_response)."""
+    # Step 1: Call Claude to extract parameters (fast, no script generation)
+    logger.info("Step 1: Extracting search parameters with Claude...")
+    enhanced_prompt, recent_history = extraction_request(conversation_id)
 
-        params = None
+    result = call_claude(user_message, recent_history, system_prompt=enhanced_prompt)
 
-        # Try multiple patterns to extract JSON
-        # Pattern 1: JSON in markdown code block
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_response, re.DOTALL)
-        if json_match:
-            try:
-                params = json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-
-        # Pattern 2: Raw JSON with "type" key
-        if not params:
-            json_match = re.search(r'(\{[^{}]*"type"\s*:\s*"[^"]+"\s*[^{}]*\})', raw_response, re.DOTALL)
-            if json_match:
-                try:
-                    params = json.loads(json_match.group(1))
-                except json.JSONDecodeError:
-                    pass
-
-        # Pattern 3: More flexible JSON extraction
-        if not params:
-            json_match = re.search(r'\{.*"type".*\}', raw_response, re.DOTALL)
-            if json_match:
-                try:
-                    # Clean up the JSON string
-                    json_str = json_match.group(0)
-                    # Fix common issues
-                    json_str = re.sub(r'[\x00-\x1f]', ' ', json_str)  # Remove control characters
-                    params = json.loads(json_str)
-                except json.JSONDecodeError:
-                    pass
-
-        # Fallback: treat as conversation
-        if not params:
-            logger.warning(f"Could not parse JSON from response, treating as conversation")
-            params = {"type": "conversation", "response": raw_response}
-
-        logger.info(f"Parsed params: {params}")
-
-        # Step 3: Handle based on request type
-        flight_data = None
-        assistant_message = ""
-
-        if params.get('type') == 'flight_search':
-            # Validate required parameters
-            missing = []
-            if not params.get('origin'):
-                missing.append('origin')
-            if not params.get('destination'):
-                missing.append('destination')
-            if not params.get('date'):
-                missing.append('date')
-
-            if missing:
-                # Missing required parameters - ask for them
-                logger.warning(f"Missing parameters: {missing}")
-                missing_str = ', '.join(missing)
-                assistant_message = f"I need a bit more information to search for flights. Could you please provide the {missing_str}? 😊"
-            else:
-                # Store these parameters as the last search
-                last_search_params[conversation_id] = params.copy()
-
-                # Run the fixed flight search script
-                logger.info("Step 3: Running fixed flight search script...")
-                flight_data = run_flight_search(params)
-
-                # Generate friendly response from results
-                logger.info("Step 4: Generating response...")
-                assistant_message = generate_flight_response(flight_data, params)
-
-        elif params.get('type') == 'date_range_clarification':
-            # User provided a date range - need clarification
-            # Store the date range context for next message
-            last_search_params[conversation_id] = {
-                'origin': params.get('origin'),
-                'destination': params.get('destination'),
-                'date_range_start': params.get('date_range_start'),
-                'date_range_end': params.get('date_range_end'),
-                'awaiting_date_range_clarification': True
-            }
-            assistant_message = params.get('response', "Please clarify your date preference.")
-
-        elif params.get('type') == 'conversation':
-            # Just return the conversation response
-            assistant_message = params.get('response', "Hello! How can I help you find flights today?")
+    if not result['success']:
+        raise Exception(result['error'] or 'Failed to get response from Claude')
 
-        else:
-            # Unknown type, return raw response
-            assistant_message = raw_response
+    raw_response = result['response']
+    logger.info(f"Claude response: {raw_response[:200]}...")
+    return parse_extraction(raw_response), raw_response
 
-        # Add assistant response to history
-        conversations[conversation_id].append({
-            "role": "assistant",
-            "content": assistant_message
-        })
 
-        logger.info(f"Sending response: {assistant_message[:100]}...")
+def parse_extraction(raw_response: str) -> dict:
+    """Step 2: Parse the JSON parameters from Claude's response."""
+    logger.info("Step 2: Parsing parameters...")
 
-        return jsonify({
-            'response': assistant_message,
-            'conversation_id': conversation_id,
-            'flight_data': flight_data,
-            'tool_uses': [],
-            'needs_continuation': False
+    # First top-level JSON object with a "type" key (single pass, see json_extract.py)
+    params = None
+    extraction = extract_json(raw_response, predicate=lambda obj: 'type' in obj)
+    if extraction:
+        params = extraction.value
+        if extraction.repairs:
+            logger.info(f"Repaired model JSON: {', '.join(extraction.repairs)}")
+
+    # Fallback: treat as conversation
+    if not params:
+        logger.warning(f"Could not parse JSON from response, treating as conversation")
+        params = {"type": "conversation", "response": raw_response}
+
+    return params
+
+
+def _extraction_key(user_message: str, conversation_id: str) -> tuple:
+    """
+    Memo key: prompt version, normalized message, the last-search context the
+    prompt adds and a hash of the history sent along, so a follow-up like
+    "tomorrow" only reuses a result from an identical conversation.
+    """
+    message = ' '.join(user_message.lower().split()).rstrip('!?. ')
+    last = conversation_store.get_params(conversation_id) or {}
+    context = tuple(str(last.get(field) or '') for field in EXTRACTION_CONTEXT_FIELDS)
+    history = hashlib.sha256(json.dumps(_recent_history(conversation_id), sort_keys=True).encode()).hexdigest()[:16]
+    return (PROMPT_VERSION, message, context, history)
+
+
+def _has_absolute_date(params: dict) -> bool:
+    values = [params.get(f) for f in ('date', 'return_date', 'date_range_start', 'date_range_end')]
+    values += [leg.get('date') for leg in params.get('legs') or [] if isinstance(leg, dict)]
+    return any(isinstance(v, str) and ABSOLUTE_DATE_RE.search(v) for v in values)
+
+
+def extract_params(user_message: str, conversation_id: str):
+    """
+    extract_params_with_claude behind the extraction memo cache. Returns (params, raw_response).
+
+    Only successfully parsed params are cached. If a relative-date message
+    ("next friday") came back with an absolute date, the result is not
+    cached, because it would be wrong on later days.
+    """
+    key = _extraction_key(user_message, conversation_id)
+    cached = cached_extraction(key)
+    if cached is not None:
+        return cached
+
+    params, raw_response = extract_params_with_claude(user_message, conversation_id)
+    remember_extraction(key, user_message, params, raw_response)
+    return params, raw_response
+
+
+def cached_extraction(key: tuple):
+    """(params, raw_response) from the extraction cache, or None."""
+    cached = extraction_cache.get(key)
+    if cached is None:
+        return None
+    logger.info("Step 1: Extraction cache hit, skipping Claude")
+    params = copy.deepcopy(cached)
+    return params, json.dumps(params)
+
+
+def remember_extraction(key: tuple, user_message: str, params: dict, raw_response: str):
+    unparsed = params == {"type": "conversation", "response": raw_response}
+    if unparsed or (RELATIVE_DATE_RE.search(user_message.lower()) and _has_absolute_date(params)):
+        logger.info("Not caching extraction (unparsed response or resolved relative date)")
+    else:
+        extraction_cache.set(key, copy.deepcopy(params))
+
+
+def fast_intent(user_message: str, conversation_id: str):
+    """(params, raw_response) from the deterministic intent parser, or None to ask Claude."""
+    if not FAST_INTENT:
+        return None
+    params = intent_parser.parse(user_message, conversation_store.get_params(conversation_id))
+    if params is None:
+        return None
+    logger.info("Step 1: Fast-path intent parser matched, skipping Claude")
+    return params, json.dumps(params)
+
+
+def process_chat(user_message: str, conversation_id: str = 'default', on_progress=None) -> dict:
+    """
+    Run one chat turn: extract parameters, search, and format the reply.
+
+    on_progress(event, data) is called as each stage finishes: 'intent' (parsed
+    params), 'airports' (resolved locations), 'offers' (flight_data before
+    formatting) and 'summary' (the final response dict, also returned).
+    """
+    logger.info(f"Received message: {user_message[:100]}...")
+
+    # Add user message to history
+    conversation_store.append_message(conversation_id, "user", user_message)
+
+    # Step 1: Deterministic fast path for common requests, Claude for the rest
+    params, raw_response = fast_intent(user_message, conversation_id) or extract_params(user_message, conversation_id)
+
+    logger.info(f"Parsed params: {params}")
+    _emit(on_progress, 'intent', {'params': params})
+
+    assistant_message, flight_data = handle_params(params, raw_response, conversation_id, on_progress)
+    return finish_turn(conversation_id, assistant_message, flight_data, on_progress)
+
+
+def handle_params(params: dict, raw_response: str, conversation_id: str, on_progress=None):
+    """Steps 3 + 4 of a chat turn: act on the extracted params. Returns (assistant_message, flight_data)."""
+    flight_data = None
+    assistant_message = ""
+
+    if params.get('type') == 'flight_search':
+        # Validate required parameters
+        missing = []
+        if not params.get('origin'):
+            missing.append('origin')
+        if not params.get('destination'):
+            missing.append('destination')
+        if not params.get('date'):
+            missing.append('date')
+
+        if missing:
+            # Missing required parameters - ask for them
+            logger.warning(f"Missing parameters: {missing}")
+            missing_str = ', '.join(missing)
+            assistant_message = f"I need a bit more information to search for flights. Could you please provide the {missing_str}? 😊"
+        else:
+            # Store these parameters as the last search
+            conversation_store.set_params(conversation_id, params)
+
+            # Run the fixed flight search on the in-process engine, with the
+            # cheap ±N day min-price calendar alongside it
+            logger.info("Step 3: Running flight search...")
+            calendar_future = fetch_price_calendar({
+                'origin': params.get('origin'), 'destination': params.get('destination'),
+                'date': params.get('date')})
+            _emit_airports(on_progress, [(params['origin'], params['destination'])])
+            flight_data = run_flight_search(params)
+            # The stream may still be serializing the offers when the calendar lands
+            _emit(on_progress, 'offers', dict(flight_data))
+            flight_data['price_calendar'] = price_calendar_result(calendar_future)
+
+            # Generate friendly response from results
+            logger.info("Step 4: Generating response...")
+            assistant_message = generate_flight_response(flight_data, params)
+
+    elif params.get('type') == 'multi_city_search':
+        legs = params.get('legs') or []
+        incomplete = [i + 1 for i, leg in enumerate(legs)
+                      if not (leg.get('origin') and leg.get('destination') and leg.get('date'))]
+        if len(legs) < 2 or incomplete:
+            legs_str = ', '.join(str(i) for i in incomplete)
+            assistant_message = (f"I need the origin, destination and date for leg {legs_str} of your trip. Could you share them? 😊"
+                                 if incomplete else "A multi-city trip needs at least two legs. Where would you like to go? 😊")
+        else:
+            conversation_store.set_params(conversation_id, params)
+
+            logger.info("Step 3: Running multi-city search...")
+            _emit_airports(on_progress, [(leg['origin'], leg['destination']) for leg in legs])
+            flight_data = run_flight_search(params, runner=run_multi_city_search)
+            _emit(on_progress, 'offers', flight_data)
+
+            logger.info("Step 4: Generating response...")
+            assistant_message = generate_flight_response(flight_data, {
+                'origin': legs[0].get('origin'), 'destination': legs[-1].get('destination'),
+                'date': flight_data.get('summary', {}).get('date', legs[0].get('date'))})
+
+    elif params.get('type') == 'date_range_search':
+        # "Show all" after a date range - search every day in parallel
+        if not params.get('origin') or not params.get('destination') or not params.get('date_range_start'):
+            assistant_message = "I need the origin, destination and dates to search that range. Could you share them again? 😊"
+        else:
+            conversation_store.set_params(conversation_id, dict(params, date=params.get('date_range_start')))
+
+            logger.info("Step 3: Running date range search...")
+            _emit_airports(on_progress, [(params['origin'], params['destination'])])
+            flight_data = run_flight_search(params, runner=run_date_range_search)
+            _emit(on_progress, 'offers', flight_data)
+
+            logger.info("Step 4: Generating response...")
+            assistant_message = generate_flight_response(flight_data, params)
+
+    elif params.get('type') == 'date_range_clarification':
+        # User provided a date range - need clarification
+        # Store the date range context for next message
+        conversation_store.set_params(conversation_id, {
+            'origin': params.get('origin'),
+            'destination': params.get('destination'),
+            'date_range_start': params.get('date_range_start'),
+            'date_range_end': params.get('date_range_end'),
+            'awaiting_date_range_clarification': True
         })
+        assistant_message = params.get('response', "Please clarify your date preference.")
+
+        # Show the cheapest fare per day in the range so the user can pick a date
+        if params.get('origin') and params.get('destination') and params.get('date_range_start'):
+            calendar = price_calendar_result(fetch_price_calendar({
+                'origin': params.get('origin'), 'destination': params.get('destination'),
+                'date': params.get('date_range_start'),
+                'end_date': params.get('date_range_end') or params.get('date_range_start')}))
+            assistant_message += format_price_calendar(calendar, "Lowest fares in your range")
+
+    elif params.get('type') == 'conversation':
+        # Just return the conversation response
+        assistant_message = params.get('response', "Hello! How can I help you find flights today?")
+
+    else:
+        # Unknown type, return raw response
+        assistant_message = raw_response
+
+    return assistant_message, flight_data
+
+
+def finish_turn(conversation_id: str, assistant_message: str, flight_data: dict, on_progress=None) -> dict:
+    """Record the reply and build the /api/chat response dict."""
+    # Add assistant response to history
+    conversation_store.append_message(conversation_id, "assistant", assistant_message)
+
+    logger.info(f"Sending response: {assistant_message[:100]}...")
+
+    response = {
+        'response': assistant_message,
+        'conversation_id': conversation_id,
+        'flight_data': flight_data,
+        'tool_uses': [],
+        'needs_continuation': False
+    }
+    _emit(on_progress, 'summary', response)
+    return response
+
+
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    """Handle chat messages and flight searches"""
+    try:
+        data = request.json
+        user_message = data.get('message', '')
+        conversation_id = data.get('conversation_id', 'default')
+
+        return jsonify(process_chat(user_message, conversation_id))
 
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
@@ -569,6 +850,113 @@ Use these as defaults if the user refers to them implicitly (e.g., "no, next Wed
             'details': str(e)
         }), 500
 
+@app.route('/api/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """
+    Server-Sent Events version of /api/chat.
+
+    Same input (JSON body, or query string for EventSource) and pipeline; sends
+    'intent', 'airports', 'offers' and 'summary' events as the stages finish,
+    then 'done' ('error' on failure). The summary event carries the /api/chat
+    response body.
+    """
+    data = request.get_json(silent=True) or request.args
+    user_message = data.get('message', '')
+    conversation_id = data.get('conversation_id', 'default')
+    events = queue.Queue()
+
+    def run():
+        try:
+            process_chat(user_message, conversation_id,
+                         on_progress=lambda event, payload: events.put((event, payload)))
+            events.put(('done', {'conversation_id': conversation_id}))
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}", exc_info=True)
+            events.put(('error', {'error': 'An error occurred processing your request', 'details': str(e)}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name='chat-stream', daemon=True).start()
+
+    def generate():
+        # An initial comment flushes headers through proxies right away
+        yield ": stream open\n\n"
+        while True:
+            try:
+                item = events.get(timeout=STREAM_HEARTBEAT)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            event, payload = item
+            yield f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/price-calendar', methods=['GET'])
+def get_price_calendar():
+    """Minimum fare per day around a date: ?origin=&destination=&date=[&days=3][&end_date=][&currency=]"""
+    params = {key: request.args.get(key) for key in ('origin', 'destination', 'date', 'days', 'end_date', 'currency')}
+    missing = [key for key in ('origin', 'destination', 'date') if not params.get(key)]
+    if missing:
+        return jsonify({'error': f"Missing required parameters: {', '.join(missing)}"}), 400
+    try:
+        params['days'] = int(params['days']) if params.get('days') else None
+    except ValueError:
+        return jsonify({'error': 'days must be an integer'}), 400
+
+    try:
+        calendar = calendar_engine.search(params, timeout=SEARCH_TIMEOUT, runner=run_price_calendar)
+    except SearchQueueFull:
+        return jsonify({'error': 'Too many price calendars in progress. Please try again in a moment.'}), 503
+    except FutureTimeoutError:
+        return jsonify({'error': f'Price calendar timed out after {SEARCH_TIMEOUT:g} seconds'}), 504
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in price calendar: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get price calendar', 'details': str(e)}), 500
+
+    return jsonify(calendar), 200 if calendar.get('success') else 502
+
+@app.route('/api/search/jobs', methods=['POST'])
+def submit_search_job():
+    """Queue a flight search (same params as the chat extracts) and return its job id with 202"""
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        return jsonify({'error': 'Expected a JSON object of search parameters'}), 400
+    error = search_jobs.validate(params)
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        job = search_jobs.submit(params)
+    except SearchQueueFull:
+        retry_after = search_jobs.retry_after()
+        return jsonify({'error': 'Too many searches in progress. Please try again in a moment.',
+                        'retry_after': retry_after}), 503, {'Retry-After': str(retry_after)}
+
+    status_url = f"/api/search/jobs/{job['job_id']}"
+    return jsonify({'job_id': job['job_id'], 'status': job['status'], 'status_url': status_url}), 202, {
+        'Location': status_url}
+
+@app.route('/api/search/jobs/<job_id>', methods=['GET'])
+def get_search_job(job_id):
+    """Job status and, once done, its result; ?wait=N long-polls up to N seconds for it to finish"""
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+
+    job = search_jobs.wait(job_id, wait) if wait > 0 else search_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job)
+
 @app.route('/api/reset', methods=['POST'])
 def reset_conversation():
     """Reset conversation history"""
@@ -576,9 +964,8 @@ def reset_conversation():
         data = request.json
         conversation_id = data.get('conversation_id', 'default')
         
-        if conversation_id in conversations:
-            del conversations[conversation_id]
-        
+        conversation_store.reset(conversation_id)
+
         return jsonify({'status': 'success', 'message': 'Conversation reset'})
     except Exception as e:
         logger.error(f"Error resetting conversation: {str(e)}")
@@ -598,6 +985,30 @@ def get_progress():
             'progress': 0
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Runtime counters for the search pipeline"""
+    return jsonify({
+        'search_engine': search_engine.stats(),
+        'calendar_engine': calendar_engine.stats(),
+        'search_jobs': search_jobs.stats(),
+        'conversations': conversation_store.stats(),
+        'extraction': extraction_stats(),
+        'intent_parser': intent_parser.stats(),
+        'extraction_cache': dict(extraction_cache.stats(), prompt_version=PROMPT_VERSION),
+        'json_extract': json_extract_stats(),
+        'shared_cache': get_shared_kv().stats() if get_shared_kv() else None,
+        'location_cache': location_cache.stats(),
+        'flight_cache': flight_cache.stats(),
+        'price_calendar_cache': price_calendar_cache.stats(),
+        'coalescing': {
+            'flight_searches': flight_searches.stats(),
+            'min_price_lookups': min_price_lookups.stats(),
+            'location_lookups': location_lookups.stats()
+        },
+        'airport_index': get_airport_index().stats() if get_airport_index() else None
+    })
+
 @app.route('/api/monitor', methods=['GET'])
 def monitor_dashboard():
     """Redirect to Claude Monitor dashboard"""
@@ -0,0 +1,239 @@
+"""
+ASGI entry point with an asyncio chat pipeline.
+
+A chat turn is mostly waiting on the LLM and the gateway, so here /api/chat
+runs on the event loop instead of holding a worker thread: extraction awaits
+the AsyncAnthropic client and flight searches await an AsyncBookingCom, which
+lets one process hold thousands of chats in flight. /api/chat, /api/reset and
+/health answer with the same JSON as the Flask app. Every other route (stream,
+price calendar, metrics, ...) is served by the Flask app mounted underneath.
+
+Long-polls on /api/search/jobs/<id> also wait on the loop rather than a thread.
+
+Turns other than a complete flight search (multi-city, date ranges,
+clarifications) are rare and run the synchronous handler on a thread.
+
+    uvicorn asgi_app:app --port 9002
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi_app:app
+"""
+
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import app as flask_backend
+from app import (conversation_store, extraction_request, parse_extraction, cached_extraction,
+                 remember_extraction, fast_intent, handle_params, finish_turn, _extraction_key,
+                 fetch_price_calendar, generate_flight_response, SEARCH_TIMEOUT, PRICE_CALENDAR_TIMEOUT)
+from booking_com_client import AsyncBookingCom
+from claude_wrapper import call_claude_async
+from flight_search import run_search_async, async_flight_searches
+from locations import async_location_lookups
+from search_jobs import search_jobs, FINISHED, SEARCH_JOB_MAX_WAIT
+
+logger = logging.getLogger(__name__)
+
+_booking = None
+_booking_lock = asyncio.Lock()
+
+
+async def get_async_booking() -> AsyncBookingCom:
+    """The process-wide AsyncBookingCom, built (with gateway discovery) on first use."""
+    global _booking
+    async with _booking_lock:
+        if _booking is None:
+            booking = await asyncio.to_thread(AsyncBookingCom)
+            _booking = await booking.start()
+    return _booking
+
+
+async def extract_params_async(user_message: str, conversation_id: str):
+    """app.extract_params on the event loop. Returns (params, raw_response)."""
+    key = await asyncio.to_thread(_extraction_key, user_message, conversation_id)
+    cached = await asyncio.to_thread(cached_extraction, key)
+    if cached is not None:
+        return cached
+
+    logger.info("Step 1: Extracting search parameters with Claude...")
+    enhanced_prompt, recent_history = await asyncio.to_thread(extraction_request, conversation_id)
+    result = await call_claude_async(user_message, recent_history, system_prompt=enhanced_prompt)
+    if not result['success']:
+        raise Exception(result['error'] or 'Failed to get response from Claude')
+
+    raw_response = result['response']
+    logger.info(f"Claude response: {raw_response[:200]}...")
+    params = parse_extraction(raw_response)
+    await asyncio.to_thread(remember_extraction, key, user_message, params, raw_response)
+    return params, raw_response
+
+
+async def run_flight_search_async(params: dict) -> dict:
+    """app.run_flight_search on the event loop (errors become the result's 'error')."""
+    try:
+        logger.info(f"Running flight search: {params}")
+        booking = await get_async_booking()
+    except Exception as e:
+        logger.error(f"Flight search error: {str(e)}")
+        return {"error": f"Failed to initialize booking client: {str(e)}", "flights": [], "summary": {}}
+    try:
+        return await asyncio.wait_for(run_search_async(booking, params), SEARCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error("Flight search timeout")
+        return {"error": "Search timeout", "flights": [], "summary": {}}
+    except Exception as e:
+        logger.error(f"Flight search error: {str(e)}")
+        return {"error": str(e), "flights": [], "summary": {}}
+
+
+async def price_calendar_result_async(future) -> dict:
+    """app.price_calendar_result without blocking the event loop."""
+    if future is None:
+        return None
+    try:
+        calendar = await asyncio.wait_for(asyncio.wrap_future(future), PRICE_CALENDAR_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Price calendar timed out after {PRICE_CALENDAR_TIMEOUT:g}s")
+        return None
+    except Exception as e:
+        logger.warning(f"Price calendar failed: {e}")
+        return None
+    return calendar if calendar.get('success') else None
+
+
+def _is_complete_search(params: dict) -> bool:
+    return (params.get('type') == 'flight_search'
+            and all(params.get(field) for field in ('origin', 'destination', 'date')))
+
+
+async def process_chat_async(user_message: str, conversation_id: str = 'default') -> dict:
+    """
+    app.process_chat with async extraction and flight search.
+
+    Conversation store and cache calls may wait on SQLite, so they run on
+    threads rather than stalling every chat on the loop.
+    """
+    logger.info(f"Received message: {user_message[:100]}...")
+    await asyncio.to_thread(conversation_store.append_message, conversation_id, "user", user_message)
+
+    params, raw_response = (await asyncio.to_thread(fast_intent, user_message, conversation_id)
+                            or await extract_params_async(user_message, conversation_id))
+    logger.info(f"Parsed params: {params}")
+
+    if not _is_complete_search(params):
+        assistant_message, flight_data = await asyncio.to_thread(
+            handle_params, params, raw_response, conversation_id)
+        return await asyncio.to_thread(finish_turn, conversation_id, assistant_message, flight_data)
+
+    await asyncio.to_thread(conversation_store.set_params, conversation_id, params)
+
+    # The ±N day calendar runs on app.calendar_engine's threads alongside the search
+    logger.info("Step 3: Running flight search...")
+    calendar_future = fetch_price_calendar({
+        'origin': params.get('origin'), 'destination': params.get('destination'),
+        'date': params.get('date')})
+    flight_data = await run_flight_search_async(params)
+    flight_data['price_calendar'] = await price_calendar_result_async(calendar_future)
+
+    logger.info("Step 4: Generating response...")
+    assistant_message = generate_flight_response(flight_data, params)
+    return await asyncio.to_thread(finish_turn, conversation_id, assistant_message, flight_data)
+
+
+async def chat(request: Request):
+    """Handle chat messages and flight searches"""
+    try:
+        data = await request.json()
+        user_message = data.get('message', '')
+        conversation_id = data.get('conversation_id', 'default')
+
+        return JSONResponse(await process_chat_async(user_message, conversation_id))
+
+    except Exception as e:
+        logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
+        return JSONResponse({
+            'error': 'An error occurred processing your request',
+            'details': str(e)
+        }, status_code=500)
+
+
+async def reset_conversation(request: Request):
+    """Reset conversation history"""
+    try:
+        data = await request.json()
+        conversation_id = data.get('conversation_id', 'default')
+
+        await asyncio.to_thread(conversation_store.reset, conversation_id)
+
+        return JSONResponse({'status': 'success', 'message': 'Conversation reset'})
+    except Exception as e:
+        logger.error(f"Error resetting conversation: {str(e)}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def health_check(request: Request):
+    """Health check endpoint"""
+    return JSONResponse({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+
+
+async def get_search_job(request: Request):
+    """Job status and, once done, its result; ?wait=N long-polls up to N seconds for it to finish"""
+    try:
+        wait = float(request.query_params.get('wait', 0))
+    except ValueError:
+        return JSONResponse({'error': 'wait must be a number of seconds'}, status_code=400)
+
+    job_id = request.path_params['job_id']
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(max(wait, 0), SEARCH_JOB_MAX_WAIT)
+    while True:
+        job = await asyncio.to_thread(search_jobs.get, job_id)  # may read the shared SQLite table
+        remaining = deadline - loop.time()
+        if job is None or job['status'] in FINISHED or remaining <= 0:
+            break
+        await asyncio.sleep(min(0.25, remaining))
+    if job is None:
+        return JSONResponse({'error': 'Unknown or expired job'}, status_code=404)
+    return JSONResponse(job)
+
+
+async def get_metrics(request: Request):
+    """The Flask app's /api/metrics plus the async pipeline's counters"""
+    with flask_backend.app.app_context():
+        metrics = flask_backend.get_metrics().get_json()
+    metrics['async'] = {
+        'booking': _booking.stats() if _booking is not None else None,
+        'flight_searches': async_flight_searches.stats(),
+        'location_lookups': async_location_lookups.stats(),
+        'in_flight_tasks': len(asyncio.all_tasks()),
+    }
+    return JSONResponse(metrics)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    if _booking is not None:
+        await _booking.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/reset', reset_conversation, methods=['POST']),
+        Route('/health', health_check, methods=['GET']),
+        Route('/api/metrics', get_metrics, methods=['GET']),
+        Route('/api/search/jobs/{job_id}', get_search_job, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(flask_backend.app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: json_extract.extract_json vs the regex chain chat() used before.
+
+Usage:
+    python backend/benchmarks/bench_json_extract.py [--repeat 200] [--corpus responses.jsonl]
+
+The built-in corpus mirrors the model output shapes seen in practice (fenced
+blocks, prose around JSON, raw newlines in strings, long flight dumps, long
+replies without JSON). --corpus adds captured responses, one JSON string or
+{"response": ...} object per line.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json_extract import extract_json  # noqa: E402
+
+SEARCH = {"type": "flight_search", "origin": "Beijing", "destination": "Melbourne",
+          "date": "next friday", "adults": 1, "cabin_class": "ECONOMY", "return_date": None}
+FLIGHT = {"id": "1", "airline": "Air China", "flightNumber": "CA177", "price": 512, "currency": "USD",
+          "departure": {"time": "08:45", "date": "2026-03-06", "airport": "PEK", "city": "Beijing"},
+          "arrival": {"time": "21:15", "date": "2026-03-06", "airport": "MEL", "city": "Melbourne"},
+          "duration": "11h 30m", "stops": 0, "layovers": [], "class": "Economy", "tags": [], "token": "d6a1f_" + "x" * 300}
+PROSE = ("I'd be happy to help you find flights! Based on your request, here is what I found. "
+         "Prices may change {depending on availability}. ")
+
+
+def builtin_corpus():
+    search = json.dumps(SEARCH, indent=4)
+    flights = json.dumps({"flights": [dict(FLIGHT, id=str(i)) for i in range(8)],
+                          "summary": {"totalResults": 8, "cheapestPrice": 512}})
+    return {
+        'fenced': f"```json\n{search}\n```",
+        'prose_around': f"Sure! Here are the parameters:\n{search}\nLet me know if anything changes.",
+        'raw_newline': '{"type": "conversation", "response": "Hello!\nWhere would you like to fly?"}',
+        'trailing_comma': search.replace('"return_date": null', '"return_date": null,'),
+        'flight_dump': PROSE * 20 + f"\nFLIGHT_JSON_START\n{flights}\nFLIGHT_JSON_END\n" + PROSE * 20,
+        'long_no_json': PROSE * 400,
+        'long_then_json': PROSE * 400 + f"\n```json\n{search}\n```",
+    }
+
+
+def legacy_extract(raw_response):
+    """The three-pattern chain chat() used before json_extract."""
+    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_response, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    json_match = re.search(r'(\{[^{}]*"type"\s*:\s*"[^"]+"\s*[^{}]*\})', raw_response, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    json_match = re.search(r'\{.*"type".*\}', raw_response, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(re.sub(r'[\x00-\x1f]', ' ', json_match.group(0)))
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def bench(fn, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark model-output JSON extraction')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--corpus', help='JSONL file of captured model responses')
+    args = parser.parse_args()
+
+    corpus = builtin_corpus()
+    if args.corpus:
+        with open(args.corpus) as f:
+            for i, line in enumerate(f):
+                if line.strip():
+                    item = json.loads(line)
+                    corpus[f'corpus_{i}'] = item['response'] if isinstance(item, dict) else item
+
+    print(f"{'case':<18}{'chars':>8}{'legacy µs':>12}{'scanner µs':>12}  legacy  scanner (repairs)")
+    for name, text in corpus.items():
+        legacy = legacy_extract(text)
+        extraction = extract_json(text)
+        repairs = f" ({', '.join(extraction.repairs)})" if extraction and extraction.repairs else ""
+        print(f"{name:<18}{len(text):>8}{bench(legacy_extract, text, args.repeat):>12.1f}"
+              f"{bench(extract_json, text, args.repeat):>12.1f}  {'ok' if legacy else '-':<7} "
+              f"{'ok' if extraction else '-'}{repairs}")
+
+
+if __name__ == '__main__':
+    main()
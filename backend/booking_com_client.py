@@ -12,6 +12,10 @@ Usage:
     # Search flights
     airports = booking.flights.search_destination("London")
     flights = booking.flights.search("JFK.AIRPORT", "LHR.AIRPORT", "2026-03-15")
+    batch = booking.flights.search_many([
+        {"from_id": "JFK.AIRPORT", "to_id": "LHR.AIRPORT", "depart_date": "2026-03-15"},
+        {"from_id": "JFK.AIRPORT", "to_id": "CDG.AIRPORT", "depart_date": "2026-03-15"},
+    ], max_concurrency=4)
 
     # Search hotels
     destinations = booking.hotels.search_destination("Paris")
@@ -25,27 +29,129 @@ Usage:
     # Meta info
     booking.meta.test_api()
     booking.meta.get_currencies()
+
+    # Backend code should share one client (discovery is cached per gateway)
+    from booking_com_client import get_shared_booking
+    booking = get_shared_booking()
+
+    # Asyncio: same API objects, every method returns an awaitable
+    async with AsyncBookingCom() as booking:
+        london, paris = await asyncio.gather(
+            booking.flights.search_destination("London"),
+            booking.flights.search_destination("Paris"))
 """
 
-import requests, json, os
+import requests, json, os, threading, time, hashlib, asyncio
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 
 # Load .env from the same directory as this file
 _env_path = Path(__file__).resolve().parent / ".env"
 load_dotenv(_env_path)
 
 
+class MCPError(Exception):
+    """Gateway/tool call failure. status_code is the HTTP status, if any."""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ============================================================================
+# DISCOVERY CACHE
+# ============================================================================
+# Discovery results (server_id, tool_prefix, server alias) keyed by gateway +
+# credentials. Always kept in memory; also persisted to
+# BOOKING_MCP_DISCOVERY_CACHE (a JSON file path) when set.
+
+_discovery_cache: Dict[str, Dict[str, Any]] = {}
+_discovery_lock = threading.Lock()
+
+
+def _discovery_ttl() -> float:
+    return float(os.environ.get("BOOKING_MCP_DISCOVERY_TTL", "3600"))
+
+
+def _discovery_key(base_url: str, api_key: str) -> str:
+    return hashlib.sha256(f"{base_url}|{api_key}".encode()).hexdigest()
+
+
+def _read_discovery_file() -> Dict[str, Dict[str, Any]]:
+    path = os.environ.get("BOOKING_MCP_DISCOVERY_CACHE", "")
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (IOError, ValueError):
+        return {}
+
+
+def _write_discovery_file(entries: Dict[str, Dict[str, Any]]):
+    path = os.environ.get("BOOKING_MCP_DISCOVERY_CACHE", "")
+    if not path:
+        return
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+    except IOError as e:
+        print(f"[MCP] Could not write discovery cache {path}: {e}")
+
+
+def _get_cached_discovery(key: str) -> Optional[Dict[str, Any]]:
+    ttl = _discovery_ttl()
+    with _discovery_lock:
+        entry = _discovery_cache.get(key)
+        if entry is None:
+            entry = _read_discovery_file().get(key)
+            if entry is not None:
+                _discovery_cache[key] = entry
+        if entry is not None and time.time() - entry.get("ts", 0) < ttl:
+            return entry
+        return None
+
+
+def _store_discovery(key: str, entry: Dict[str, Any]):
+    entry = dict(entry, ts=time.time())
+    with _discovery_lock:
+        _discovery_cache[key] = entry
+        if os.environ.get("BOOKING_MCP_DISCOVERY_CACHE", ""):
+            entries = _read_discovery_file()
+            entries[key] = entry
+            _write_discovery_file(entries)
+
+
+def clear_discovery_cache():
+    """Drop all cached discovery results (memory and disk)."""
+    with _discovery_lock:
+        _discovery_cache.clear()
+        _write_discovery_file({})
+
+
 @dataclass
 class BookingConfig:
     base_url: str = ""
     api_key: str = ""
     server_id: str = ""
     tool_prefix: str = ""
+    server_alias: str = ""
+    # Logical tool name -> gateway tool name, filled from list_tools()
+    tool_names: Dict[str, str] = field(default_factory=dict)
     language_code: str = "en-us"
     currency_code: str = "USD"
+    # HTTP connection pool / timeouts (0 or None = read from env, then default)
+    pool_size: int = 0
+    connect_timeout: float = 0
+    read_timeout: float = 0
+    keep_alive: Optional[bool] = None
 
     def __post_init__(self):
         if not self.base_url:
@@ -58,21 +164,80 @@ class BookingConfig:
             if not self.api_key:
                 raise ValueError("API key required via BOOKING_MCP_API_KEY or ANTHROPIC_API_KEY env var or BookingConfig(api_key=...)")
 
+        if not self.pool_size:
+            self.pool_size = int(os.environ.get("BOOKING_MCP_POOL_SIZE", "10"))
+        if not self.connect_timeout:
+            self.connect_timeout = float(os.environ.get("BOOKING_MCP_CONNECT_TIMEOUT", "5"))
+        if not self.read_timeout:
+            self.read_timeout = float(os.environ.get("BOOKING_MCP_READ_TIMEOUT", "60"))
+        if self.keep_alive is None:
+            self.keep_alive = os.environ.get("BOOKING_MCP_KEEP_ALIVE", "1").lower() not in ("0", "false", "no")
+        self._http = None
+        # Failure-triggered rediscovery: serialized, and at most once per interval
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = None
+        self.discovery_generation = 0
+        self.rediscovery_interval = float(os.environ.get("BOOKING_MCP_REDISCOVERY_INTERVAL", "60"))
+
         # Always run discovery to ensure tool_prefix is set correctly
         # Even if server_id is in env, we need to discover the tool_prefix
         env_server_id = os.environ.get("BOOKING_MCP_SERVER_ID", "")
         if not self.server_id:
             self.server_id = env_server_id
 
-        # Run discovery if we don't have tool_prefix or server_id
+        # Run discovery if we don't have tool_prefix or server_id,
+        # reusing a cached result for this gateway when one is fresh
         if not self.tool_prefix or not self.server_id:
+            cached = _get_cached_discovery(self._cache_key)
+            if cached:
+                self.server_id = cached["server_id"]
+                self.tool_prefix = cached["tool_prefix"]
+                self.server_alias = cached.get("server_alias", "")
+                self.tool_names = dict(cached.get("tool_names") or {})
+            else:
+                self._discover_server_id()
+                self._save_discovery()
+
+    @property
+    def _cache_key(self) -> str:
+        return _discovery_key(self.base_url, self.api_key)
+
+    def _save_discovery(self):
+        _store_discovery(self._cache_key, {"server_id": self.server_id,
+                                           "tool_prefix": self.tool_prefix,
+                                           "server_alias": self.server_alias,
+                                           "tool_names": dict(self.tool_names)})
+
+    def refresh_discovery(self, seen_generation: int = None) -> bool:
+        """
+        Bypass the cache and re-run discovery (e.g. after auth or 404 failures).
+
+        Callers pass the discovery_generation their call failed under. If
+        another thread has refreshed since, this returns True without
+        rediscovering; if discovery already ran (or failed) within
+        rediscovery_interval it returns False and the caller gives up, so a
+        misconfigured gateway is not rediscovered on every request.
+        Raises ValueError when discovery fails.
+        """
+        with self._refresh_lock:
+            if seen_generation is not None:
+                if self.discovery_generation != seen_generation:
+                    return True
+                if (self._refreshed_at is not None
+                        and time.monotonic() - self._refreshed_at < self.rediscovery_interval):
+                    return False
+            self._refreshed_at = time.monotonic()
+            self.tool_names = {}
             self._discover_server_id()
+            self._save_discovery()
+            self.discovery_generation += 1
+            return True
 
     def _discover_server_id(self):
         """Auto-discover server_id and tool_prefix from the gateway"""
         try:
-            r = requests.get(f"{self.base_url}/v1/mcp/server",
-                             headers={"Authorization": f"Bearer {self.api_key}"})
+            r = self.http.get(f"{self.base_url}/v1/mcp/server",
+                              headers={"Authorization": f"Bearer {self.api_key}"})
             if r.status_code == 200:
                 servers = r.json()
 
@@ -82,6 +247,7 @@ class BookingConfig:
                     if alias == "flights":
                         self.server_id = s["server_id"]
                         self.tool_prefix = "flights-"
+                        self.server_alias = s.get("alias", "")
                         print(f"[MCP] Using server '{s.get('server_name')}' with alias 'flights'")
                         return
 
@@ -98,6 +264,7 @@ class BookingConfig:
                     self.server_id = s["server_id"]
                     alias = s.get("alias", "")
                     self.tool_prefix = f"{alias}-" if alias else ""
+                    self.server_alias = alias
                     print(f"[MCP] Using server '{s.get('server_name')}' with prefix '{self.tool_prefix}'")
                     return
 
@@ -108,6 +275,7 @@ class BookingConfig:
                         self.server_id = s["server_id"]
                         alias = s.get("alias", "")
                         self.tool_prefix = f"{alias}-" if alias else ""
+                        self.server_alias = alias
                         print(f"[MCP] Using server '{server_name}' with prefix '{self.tool_prefix}'")
                         return
 
@@ -119,9 +287,68 @@ class BookingConfig:
         except Exception:
             raise ValueError("server_id required via BOOKING_MCP_SERVER_ID env var or BookingConfig(server_id=...)")
 
+    @property
+    def http(self) -> "_HTTPPool":
+        """Connection pool shared by discovery and every MCP call made with this config."""
+        if self._http is None:
+            self._http = _HTTPPool(self)
+        return self._http
 
-class _MCPSession:
-    """MCP REST client using /mcp-rest/tools/call endpoint"""
+
+class _HTTPPool:
+    """Keep-alive HTTP connection pool with connect/read timeouts and reuse stats"""
+
+    def __init__(self, cfg: BookingConfig):
+        self.pool_size = cfg.pool_size
+        self.keep_alive = cfg.keep_alive
+        self.timeout = (cfg.connect_timeout, cfg.read_timeout)
+        self._adapter = HTTPAdapter(pool_connections=cfg.pool_size, pool_maxsize=cfg.pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        if not cfg.keep_alive:
+            self.session.headers["Connection"] = "close"
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._requests += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests sent vs. connections opened; the difference rode on a kept-alive connection."""
+        new_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+        with self._lock:
+            requests_sent = self._requests
+        return {
+            "requests": requests_sent,
+            "new_connections": new_connections,
+            "reused_connections": max(requests_sent - new_connections, 0),
+            "pool_size": self.pool_size,
+            "keep_alive": self.keep_alive,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class _MCPSessionBase:
+    """Tool-name resolution and response parsing shared by the sync and async sessions"""
 
     def __init__(self, cfg: BookingConfig):
         self.cfg = cfg
@@ -129,43 +356,52 @@ class _MCPSession:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {cfg.api_key}",
         }
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._fallback_probes = 0
+        self._probe_requests = 0
 
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+    def _payload(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {"name": tool_name, "arguments": arguments, "server_id": self.cfg.server_id}
+
+    def _tool_patterns(self, name: str) -> List[str]:
         # Try multiple tool name patterns for cross-environment compatibility
-        tool_patterns = [
+        return [
             f"{self.cfg.tool_prefix}{name}",  # Primary: e.g., "flights-Search_Flight_Location"
             name,                              # Fallback 1: No prefix
             f"booking_com-{name}",             # Fallback 2: "booking_com-" prefix (some sandboxes)
         ]
 
-        last_error = None
-        for prefixed_name in tool_patterns:
-            r = requests.post(f"{self.cfg.base_url}/mcp-rest/tools/call",
-                              headers=self._headers,
-                              json={"name": prefixed_name, "arguments": arguments,
-                                    "server_id": self.cfg.server_id})
-
-            if r.status_code == 200:
-                # Success! Cache this prefix for future calls
-                if prefixed_name != f"{self.cfg.tool_prefix}{name}":
-                    # Update the prefix if we found a working alternative
-                    if prefixed_name == name:
-                        self.cfg.tool_prefix = ""
-                    elif prefixed_name.startswith("booking_com-"):
-                        self.cfg.tool_prefix = "booking_com-"
-                break  # Success, exit retry loop
-
-            # Tool not found - try next pattern
-            if r.status_code == 404 and "not found" in r.text.lower():
-                last_error = f"Tool '{prefixed_name}' not found"
-                continue
-
-            # Other error - don't retry
-            last_error = f"HTTP {r.status_code}: {r.text[:500]}"
-            break
-
+    @staticmethod
+    def _not_found(r) -> bool:
+        return r.status_code == 404 and "not found" in r.text.lower()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _remember(self, name: str, resolved: str):
+        # Success! Cache the resolved name for this tool
+        self.cfg.tool_names[name] = resolved
+        self.cfg._save_discovery()
+
+    def _set_tool_names(self, tools: List[Dict]):
+        names: Dict[str, str] = {}
+        full_names = [t.get("name", "") for t in tools if isinstance(t, dict)]
+        # Prefer names under the discovered prefix, then the known fallbacks.
+        # Logical names never contain "-", so anything left with one has another server's prefix.
+        for prefix in (self.cfg.tool_prefix, "booking_com-", ""):
+            for full in full_names:
+                if full.startswith(prefix) and "-" not in full[len(prefix):] and len(full) > len(prefix):
+                    names.setdefault(full[len(prefix):], full)
+        if names:
+            self.cfg.tool_names = names
+            self.cfg._save_discovery()
+
+    @staticmethod
+    def _parse(r) -> Any:
         if r.status_code != 200:
-            raise Exception(last_error or f"HTTP {r.status_code}: {r.text[:500]}")
+            raise MCPError(f"HTTP {r.status_code}: {r.text[:500]}", r.status_code)
 
         data = r.json()
 
@@ -178,7 +414,7 @@ class _MCPSession:
             if data.get("isError"):
                 content = data.get("content", [])
                 err_msg = content[0].get("text", "Unknown error") if content else "Unknown error"
-                raise Exception(f"Tool error: {err_msg}")
+                raise MCPError(f"Tool error: {err_msg}")
             content = data.get("content", [])
 
         for item in content:
@@ -190,16 +426,225 @@ class _MCPSession:
                     return text
         return data
 
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tool_calls": self._calls,
+                "fallback_probes": self._fallback_probes,
+                "probe_requests": self._probe_requests,
+                "resolved_tools": len(self.cfg.tool_names),
+            }
+
+
+class _MCPSession(_MCPSessionBase):
+    """MCP REST client using /mcp-rest/tools/call endpoint"""
+
+    def __init__(self, cfg: BookingConfig):
+        super().__init__(cfg)
+        self._http = cfg.http
+
+    def load_tool_names(self):
+        """Build the logical -> gateway tool name map from list_tools() (once per discovery)."""
+        if self.cfg.tool_names:
+            return
+        try:
+            tools = self.list_tools()
+        except (requests.RequestException, ValueError) as e:
+            print(f"[MCP] Could not list tools, names will be probed on first use: {e}")
+            return
+        self._set_tool_names(tools)
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        generation = self.cfg.discovery_generation
+        try:
+            return self._call_tool(name, arguments)
+        except MCPError as e:
+            # Stale discovery (server moved, key rotated): rediscover once and retry
+            if e.status_code not in (401, 403, 404):
+                raise
+            print(f"[MCP] {name} failed with HTTP {e.status_code}, refreshing discovery")
+            try:
+                if not self.cfg.refresh_discovery(generation):
+                    raise e
+                self.load_tool_names()
+            except ValueError:
+                raise e
+            return self._call_tool(name, arguments)
+
+    def _post(self, tool_name: str, arguments: Dict[str, Any]) -> requests.Response:
+        return self._http.post(f"{self.cfg.base_url}/mcp-rest/tools/call",
+                               headers=self._headers, json=self._payload(tool_name, arguments))
+
+    def _probe(self, name: str, arguments: Dict[str, Any]) -> requests.Response:
+        """Resolve an unmapped tool by trying name patterns; remember the winner."""
+        self._count("_fallback_probes")
+        last_error = None
+        for prefixed_name in self._tool_patterns(name):
+            r = self._post(prefixed_name, arguments)
+            self._count("_probe_requests")
+
+            if r.status_code == 200:
+                self._remember(name, prefixed_name)
+                return r
+
+            # Tool not found - try next pattern
+            if self._not_found(r):
+                last_error = f"Tool '{prefixed_name}' not found"
+                continue
+
+            # Other error - don't retry
+            last_error = f"HTTP {r.status_code}: {r.text[:500]}"
+            break
+
+        raise MCPError(last_error or f"HTTP {r.status_code}: {r.text[:500]}", r.status_code)
+
+    def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        self._count("_calls")
+
+        # Exactly one request when the tool name was resolved at startup
+        resolved = self.cfg.tool_names.get(name)
+        if resolved:
+            r = self._post(resolved, arguments)
+            if self._not_found(r):
+                # Stale mapping - forget it and fall back to probing
+                self.cfg.tool_names.pop(name, None)
+                r = self._probe(name, arguments)
+        else:
+            r = self._probe(name, arguments)
+        return self._parse(r)
+
     def list_tools(self) -> List[Dict]:
-        r = requests.get(f"{self.cfg.base_url}/v1/mcp/tools",
-                         headers=self._headers)
+        r = self._http.get(f"{self.cfg.base_url}/v1/mcp/tools",
+                           headers=self._headers)
         if r.status_code != 200:
             return []
         return r.json().get("tools", [])
 
 
+class _AsyncMCPSession(_MCPSessionBase):
+    """Asyncio MCP REST client: httpx.AsyncClient pool plus a concurrency limit"""
+
+    def __init__(self, cfg: BookingConfig, max_concurrency: int = None):
+        import httpx  # only needed for the async client
+
+        super().__init__(cfg)
+        self.max_concurrency = max_concurrency or int(os.environ.get("BOOKING_MCP_MAX_CONCURRENCY", "100"))
+        # Sized for the event loop's concurrency, not BOOKING_MCP_POOL_SIZE's
+        # per-thread-pool default, or requests would queue for a connection
+        self.pool_size = int(os.environ.get("BOOKING_MCP_ASYNC_POOL_SIZE", str(self.max_concurrency)))
+        self._client = httpx.AsyncClient(
+            headers=self._headers,
+            timeout=httpx.Timeout(cfg.read_timeout, connect=cfg.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size,
+                                max_keepalive_connections=self.pool_size if cfg.keep_alive else 0))
+        self._semaphore = None
+        self._requests = 0
+        self._in_flight = 0
+
+    async def _request(self, method: str, url: str, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            self._count("_in_flight")
+            try:
+                return await self._client.request(method, url, **kwargs)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._requests += 1
+
+    async def load_tool_names(self):
+        """Async counterpart of _MCPSession.load_tool_names."""
+        if self.cfg.tool_names:
+            return
+        try:
+            tools = await self.list_tools()
+        except Exception as e:
+            print(f"[MCP] Could not list tools, names will be probed on first use: {e}")
+            return
+        self._set_tool_names(tools)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        generation = self.cfg.discovery_generation
+        try:
+            return await self._call_tool(name, arguments)
+        except MCPError as e:
+            if e.status_code not in (401, 403, 404):
+                raise
+            print(f"[MCP] {name} failed with HTTP {e.status_code}, refreshing discovery")
+            try:
+                if not await asyncio.to_thread(self.cfg.refresh_discovery, generation):
+                    raise e
+                await self.load_tool_names()
+            except ValueError:
+                raise e
+            return await self._call_tool(name, arguments)
+
+    async def _post(self, tool_name: str, arguments: Dict[str, Any]):
+        return await self._request("POST", f"{self.cfg.base_url}/mcp-rest/tools/call",
+                                   json=self._payload(tool_name, arguments))
+
+    async def _probe(self, name: str, arguments: Dict[str, Any]):
+        self._count("_fallback_probes")
+        last_error = None
+        for prefixed_name in self._tool_patterns(name):
+            r = await self._post(prefixed_name, arguments)
+            self._count("_probe_requests")
+            if r.status_code == 200:
+                self._remember(name, prefixed_name)
+                return r
+            if self._not_found(r):
+                last_error = f"Tool '{prefixed_name}' not found"
+                continue
+            last_error = f"HTTP {r.status_code}: {r.text[:500]}"
+            break
+        raise MCPError(last_error or f"HTTP {r.status_code}: {r.text[:500]}", r.status_code)
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        self._count("_calls")
+        resolved = self.cfg.tool_names.get(name)
+        if resolved:
+            r = await self._post(resolved, arguments)
+            if self._not_found(r):
+                self.cfg.tool_names.pop(name, None)
+                r = await self._probe(name, arguments)
+        else:
+            r = await self._probe(name, arguments)
+        return self._parse(r)
+
+    async def list_tools(self) -> List[Dict]:
+        r = await self._request("GET", f"{self.cfg.base_url}/v1/mcp/tools")
+        if r.status_code != 200:
+            return []
+        return r.json().get("tools", [])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            http = {"requests": self._requests, "in_flight": self._in_flight,
+                    "max_concurrency": self.max_concurrency, "pool_size": self.pool_size,
+                    "keep_alive": self.cfg.keep_alive}
+        return dict(http, **super().stats())
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def _dedupe_queries(queries: List[Dict[str, Any]]):
+    """Unique queries plus, for each input, the index of its unique query."""
+    unique, index, slots = [], {}, []
+    for query in queries:
+        key = json.dumps(query, sort_keys=True, default=str)
+        if key not in index:
+            index[key] = len(unique)
+            unique.append(query)
+        slots.append(index[key])
+    return unique, slots
+
+
 class _Base:
-    def __init__(self, mcp: _MCPSession, cfg: BookingConfig):
+    # With an _AsyncMCPSession, _call (and so every API method) returns an awaitable,
+    # which is how AsyncBookingCom reuses these classes' argument building as-is.
+    def __init__(self, mcp: _MCPSessionBase, cfg: BookingConfig):
         self._mcp = mcp
         self.cfg = cfg
 
@@ -233,6 +678,41 @@ class Flights(_Base):
         if infants: a["infants"] = str(infants)
         return self._call("Search_Flights", a)
 
+    def search_many(self, queries: List[Dict[str, Any]], max_concurrency: int = 8) -> Any:
+        """Run many search() calls concurrently. queries: [{"from_id":..,"to_id":..,"depart_date":..}, ...]
+
+        Identical queries are sent once. Returns one {"query", "result", "error"} dict
+        per input, in input order; a failing query sets "error" instead of raising.
+        """
+        unique, slots = _dedupe_queries(queries)
+        if isinstance(self._mcp, _AsyncMCPSession):
+            return self._search_many_async(queries, unique, slots, max_concurrency)
+
+        def run(query):
+            try:
+                return self.search(**query), None
+            except Exception as e:
+                return None, str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(unique)))) as pool:
+            outcomes = list(pool.map(run, unique))
+        return [{"query": q, "result": outcomes[i][0], "error": outcomes[i][1]}
+                for q, i in zip(queries, slots)]
+
+    async def _search_many_async(self, queries, unique, slots, max_concurrency):
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(query):
+            async with semaphore:
+                try:
+                    return await self.search(**query), None
+                except Exception as e:
+                    return None, str(e)
+
+        outcomes = await asyncio.gather(*[run(q) for q in unique])
+        return [{"query": q, "result": outcomes[i][0], "error": outcomes[i][1]}
+                for q, i in zip(queries, slots)]
+
     def search_multi_stop(self, legs: List[Dict], adults: int = 1,
                           cabin_class: str = "ECONOMY", currency: str = None) -> Any:
         """Multi-stop flights. legs: [{"fromId":"..","toId":"..","departDate":"YYYY-MM-DD"}]"""
@@ -465,6 +945,7 @@ class BookingCom:
     def __init__(self, config: BookingConfig = None):
         self.config = config or BookingConfig()
         self._mcp = _MCPSession(self.config)
+        self._mcp.load_tool_names()
         self.flights = Flights(self._mcp, self.config)
         self.hotels = Hotels(self._mcp, self.config)
         self.cars = Cars(self._mcp, self.config)
@@ -476,6 +957,84 @@ class BookingCom:
         """List all available MCP tools."""
         return self._mcp.list_tools()
 
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse and tool-name resolution counters."""
+        return dict(self.config.http.stats(), **self._mcp.stats())
+
+
+class AsyncBookingCom:
+    """
+    Asyncio interface to the same Booking.com tools.
+
+    Exposes the same flights/hotels/cars/attractions/taxi/meta objects as
+    BookingCom, but every API method returns an awaitable. All calls share one
+    httpx connection pool, and at most max_concurrency requests are in flight
+    (BOOKING_MCP_MAX_CONCURRENCY, default 100). The pool holds up to
+    BOOKING_MCP_ASYNC_POOL_SIZE connections (default: max_concurrency).
+
+    Construction may run (cached) gateway discovery synchronously, so build it
+    at startup or via `await asyncio.to_thread(AsyncBookingCom)`.
+
+        async with AsyncBookingCom() as booking:
+            airports = await booking.flights.search_destination("London")
+    """
+
+    def __init__(self, config: BookingConfig = None, max_concurrency: int = None):
+        self.config = config or BookingConfig()
+        self._mcp = _AsyncMCPSession(self.config, max_concurrency)
+        self.flights = Flights(self._mcp, self.config)
+        self.hotels = Hotels(self._mcp, self.config)
+        self.cars = Cars(self._mcp, self.config)
+        self.attractions = Attractions(self._mcp, self.config)
+        self.taxi = Taxi(self._mcp, self.config)
+        self.meta = Meta(self._mcp, self.config)
+
+    async def start(self) -> "AsyncBookingCom":
+        """Resolve tool names once (mirrors what BookingCom does in __init__)."""
+        await self._mcp.load_tool_names()
+        return self
+
+    async def list_tools(self) -> List[Dict]:
+        """List all available MCP tools."""
+        return await self._mcp.list_tools()
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, concurrency and tool-name resolution counters."""
+        return self._mcp.stats()
+
+    async def aclose(self):
+        await self._mcp.aclose()
+
+    async def __aenter__(self) -> "AsyncBookingCom":
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+# Process-wide client shared by the backend's search workers
+_shared_booking: Optional[BookingCom] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_booking() -> BookingCom:
+    """Return the process-wide BookingCom, creating it on first use (thread-safe)."""
+    global _shared_booking
+    if _shared_booking is None:
+        with _shared_lock:
+            if _shared_booking is None:
+                _shared_booking = BookingCom()
+    return _shared_booking
+
+
+def reset_shared_booking():
+    """Drop the shared client; the next get_shared_booking() builds a fresh one."""
+    global _shared_booking
+    with _shared_lock:
+        if _shared_booking is not None:
+            _shared_booking.config.http.close()
+        _shared_booking = None
+
 
 if __name__ == "__main__":
     import sys
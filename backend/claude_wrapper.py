@@ -1,3 +1,4 @@
+import asyncio
 import subprocess
 import json
 import logging
@@ -5,13 +6,371 @@ import requests
 import os
 import re
 import sys
+import threading
+import queue
+import time
+from json_extract import extract_json
+
+try:
+    import anthropic
+except ImportError:  # the API extraction backend is optional; the CLI path still works
+    anthropic = None
 
 logger = logging.getLogger(__name__)
 
+# Parameter extraction backend: "api" calls the Messages API in-process,
+# "cli" spawns the claude CLI per request. The API path falls back to the CLI
+# on errors unless EXTRACTION_CLI_FALLBACK=0.
+EXTRACTION_BACKEND = os.getenv('EXTRACTION_BACKEND', 'api').lower()
+EXTRACTION_CLI_FALLBACK = os.getenv('EXTRACTION_CLI_FALLBACK', '1').lower() not in ('0', 'false', 'no')
+EXTRACTION_MODEL = os.getenv('EXTRACTION_MODEL') or os.getenv('ANTHROPIC_MODEL', 'claude-sonnet-4-6')
+EXTRACTION_MAX_TOKENS = int(os.getenv('EXTRACTION_MAX_TOKENS', '1024'))
+EXTRACTION_TIMEOUT = float(os.getenv('EXTRACTION_TIMEOUT', '60'))
+
+_api_client = None
+_async_api_client = None
+_api_client_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'api_calls': 0, 'api_errors': 0, 'cli_calls': 0, 'cli_fallbacks': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_api_client():
+    """Process-wide Anthropic client (one pooled HTTP client reused across requests)."""
+    global _api_client
+    if anthropic is None:
+        raise RuntimeError("anthropic package is not installed")
+    if _api_client is None:
+        with _api_client_lock:
+            if _api_client is None:
+                _api_client = anthropic.Anthropic(**_api_client_options())
+    return _api_client
+
+
+def get_async_api_client():
+    """Process-wide AsyncAnthropic client for the ASGI app; use it from one event loop only."""
+    global _async_api_client
+    if anthropic is None:
+        raise RuntimeError("anthropic package is not installed")
+    if _async_api_client is None:
+        _async_api_client = anthropic.AsyncAnthropic(**_api_client_options())
+    return _async_api_client
+
+
+def _api_client_options():
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    base_url = os.getenv('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')
+    # Gateways (LiteLLM) also get the key as a bearer token, like the CLI sends it
+    headers = {} if 'api.anthropic.com' in base_url else {'Authorization': f'Bearer {api_key}'}
+    return dict(api_key=api_key, base_url=base_url, default_headers=headers,
+                timeout=EXTRACTION_TIMEOUT, max_retries=1)
+
+
+def _history_to_messages(message, conversation_history=None):
+    """Last 5 history entries plus the new message as alternating Messages API turns."""
+    messages = []
+    for msg in (conversation_history or [])[-5:] + [{'role': 'user', 'content': message}]:
+        role = 'user' if msg['role'] == 'user' else 'assistant'
+        if messages and messages[-1]['role'] == role:
+            messages[-1]['content'] += f"\n\n{msg['content']}"
+        else:
+            messages.append({'role': role, 'content': msg['content']})
+    while messages and messages[0]['role'] != 'user':
+        messages.pop(0)
+    return messages
+
+
+def call_claude_api(message, conversation_history=None, system_prompt=None):
+    """
+    Extract parameters with one in-process Messages API call.
+
+    Returns the same {'success', 'response', 'error'} dict as call_claude_with_mcp.
+    """
+    _count('api_calls')
+    try:
+        result = get_api_client().messages.create(**_api_request(message, conversation_history, system_prompt))
+        return _api_result(result)
+    except Exception as e:
+        return _api_error(e)
+
+
+async def call_claude_api_async(message, conversation_history=None, system_prompt=None):
+    """call_claude_api with the AsyncAnthropic client."""
+    _count('api_calls')
+    try:
+        result = await get_async_api_client().messages.create(
+            **_api_request(message, conversation_history, system_prompt))
+        return _api_result(result)
+    except Exception as e:
+        return _api_error(e)
+
+
+def _api_request(message, conversation_history, system_prompt):
+    kwargs = {'model': EXTRACTION_MODEL, 'max_tokens': EXTRACTION_MAX_TOKENS,
+              'messages': _history_to_messages(message, conversation_history)}
+    if system_prompt:
+        kwargs['system'] = system_prompt
+    return kwargs
+
+
+def _api_result(result):
+    text = ''.join(block.text for block in result.content if getattr(block, 'type', '') == 'text')
+    return {'success': True, 'response': text.strip(), 'error': None}
+
+
+def _api_error(error):
+    _count('api_errors')
+    logger.error(f"Messages API exception: {str(error)}")
+    return {'success': False, 'response': None, 'error': str(error)}
+
+
+def call_claude(message, conversation_history=None, system_prompt=None):
+    """
+    Run parameter extraction on the configured backend (EXTRACTION_BACKEND).
+
+    The API backend falls back to the CLI when the API call fails or the
+    anthropic package is missing.
+    """
+    if EXTRACTION_BACKEND == 'api':
+        if anthropic is not None:
+            result = call_claude_api(message, conversation_history, system_prompt)
+            if result['success'] or not EXTRACTION_CLI_FALLBACK:
+                return result
+            logger.warning("Messages API extraction failed, falling back to the claude CLI")
+        else:
+            logger.warning("anthropic package not installed, using the claude CLI for extraction")
+        _count('cli_fallbacks')
+    return call_claude_with_mcp(message, conversation_history, system_prompt)
+
+
+async def call_claude_async(message, conversation_history=None, system_prompt=None):
+    """call_claude for the event loop: the API backend is awaited, the CLI runs on a thread."""
+    if EXTRACTION_BACKEND == 'api':
+        if anthropic is not None:
+            result = await call_claude_api_async(message, conversation_history, system_prompt)
+            if result['success'] or not EXTRACTION_CLI_FALLBACK:
+                return result
+            logger.warning("Messages API extraction failed, falling back to the claude CLI")
+        else:
+            logger.warning("anthropic package not installed, using the claude CLI for extraction")
+        _count('cli_fallbacks')
+    return await asyncio.to_thread(call_claude_with_mcp, message, conversation_history, system_prompt)
+
+
+def extraction_stats():
+    """Counters for /api/metrics."""
+    with _stats_lock:
+        stats = dict(_stats, backend=EXTRACTION_BACKEND, model=EXTRACTION_MODEL)
+    stats['cli_pool'] = _cli_pool.stats() if _cli_pool is not None else None
+    return stats
+
+# Warm pool of long-lived CLI workers (stream-json in/out). Disabled when
+# CLAUDE_CLI_POOL_SIZE is 0; each request then spawns its own CLI process.
+CLI_POOL_SIZE = int(os.getenv('CLAUDE_CLI_POOL_SIZE', '0'))
+# A worker keeps its conversation between requests, so by default it is
+# replaced after every request to keep one chat's context out of the next.
+CLI_MAX_REQUESTS = int(os.getenv('CLAUDE_CLI_MAX_REQUESTS', '1'))
+CLI_TIMEOUT = float(os.getenv('CLAUDE_CLI_TIMEOUT', '300'))
+
+_cli_pool = None
+
+
+def _cli_settings_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'settings.json')
+
+
+def _cli_working_dir():
+    # Auto-detect environment: /workspace (sandbox) or local project root
+    project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    return '/workspace' if os.path.exists('/workspace') else project_root
+
+
+class _CLIWorker:
+    """One pre-started `claude --print` process in stream-json mode."""
+
+    def __init__(self, system_prompt):
+        cmd = ['claude', '--print', '--settings', _cli_settings_path(),
+               '--input-format', 'stream-json', '--output-format', 'stream-json', '--verbose']
+        if system_prompt:
+            cmd.extend(['--system-prompt', system_prompt])
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                                     cwd=_cli_working_dir())
+        self.requests = 0
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read, name='claude-cli-reader', daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def ask(self, prompt, timeout):
+        """Send one user turn and return the final result text; raises on error or timeout."""
+        self.requests += 1
+        self.proc.stdin.write(json.dumps({'type': 'user', 'message': {'role': 'user', 'content': prompt}}) + '\n')
+        self.proc.stdin.flush()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('Request timeout')
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError('Request timeout')
+            if line is None:
+                raise RuntimeError(f"Claude CLI exited with code {self.proc.wait()}")
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if event.get('type') == 'result':
+                if event.get('is_error'):
+                    raise RuntimeError(event.get('result') or event.get('subtype') or 'Claude CLI error')
+                return (event.get('result') or '').strip()
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.terminate()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+class CLIWorkerPool:
+    """
+    Fixed-size pool of _CLIWorker processes sharing one system prompt.
+
+    Requests wait for an idle worker, so concurrency never exceeds size.
+    A worker is replaced in the background after max_requests requests or
+    any error.
+    """
+
+    def __init__(self, system_prompt, size=CLI_POOL_SIZE, max_requests=CLI_MAX_REQUESTS):
+        self.system_prompt = system_prompt
+        self.size = size
+        self.max_requests = max(1, max_requests)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.started = 0
+        self.recycled = 0
+        self.requests = 0
+        self.errors = 0
+        for _ in range(size):
+            self._spawn()
+
+    def _spawn(self):
+        try:
+            worker = _CLIWorker(self.system_prompt)
+        except OSError as e:
+            logger.error(f"Failed to start Claude CLI worker: {e}")
+            worker = None
+        with self._lock:
+            if self._closed:
+                if worker:
+                    worker.close()
+                return
+            if worker is not None:
+                self.started += 1
+        self._idle.put(worker)
+
+    def _replace(self, worker):
+        with self._lock:
+            self.recycled += 1
+        if worker is not None:
+            threading.Thread(target=worker.close, daemon=True).start()
+        threading.Thread(target=self._spawn, name='claude-cli-spawn', daemon=True).start()
+
+    def ask(self, prompt, timeout=CLI_TIMEOUT):
+        """Run one prompt on an idle worker; raises TimeoutError if none frees up in time."""
+        start = time.monotonic()
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError('No idle Claude CLI worker')
+        if worker is None or not worker.alive():
+            # Failed to start or died while idle: start a fresh one for this request
+            if worker is not None:
+                worker.close()
+            try:
+                worker = _CLIWorker(self.system_prompt)
+            except OSError:
+                self._idle.put(None)
+                raise
+            with self._lock:
+                self.started += 1
+        with self._lock:
+            self.requests += 1
+        try:
+            result = worker.ask(prompt, max(1.0, timeout - (time.monotonic() - start)))
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            self._replace(worker)
+            raise
+        if worker.requests >= self.max_requests:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if worker is not None:
+                worker.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': self._idle.qsize(),
+                'max_requests': self.max_requests,
+                'started': self.started,
+                'recycled': self.recycled,
+                'requests': self.requests,
+                'errors': self.errors,
+            }
+
+
+def start_cli_pool(system_prompt):
+    """
+    Start the warm CLI pool for a base system prompt (no-op when CLAUDE_CLI_POOL_SIZE=0).
+
+    Calls whose system prompt extends this base are served by the pool, with
+    the extra text sent as part of the message.
+    """
+    global _cli_pool
+    if CLI_POOL_SIZE <= 0 or _cli_pool is not None:
+        return _cli_pool
+    _cli_pool = CLIWorkerPool(system_prompt)
+    logger.info(f"Started Claude CLI pool: {CLI_POOL_SIZE} workers, recycled every {CLI_MAX_REQUESTS} request(s)")
+    return _cli_pool
+
+
 def call_claude_with_mcp(message, conversation_history=None, system_prompt=None):
     """
     Call Claude Code CLI with MCP tools enabled and system prompt for booking_com_client usage
     """
+    _count('cli_calls')
     try:
         # Build the prompt with conversation history
         if conversation_history and len(conversation_history) > 0:
@@ -24,8 +383,21 @@ def call_claude_with_mcp(message, conversation_history=None, system_prompt=None)
         else:
             full_prompt = message
         
+        # Warm pool: fixed system prompt per worker, per-request context goes in the message
+        pool = _cli_pool
+        if pool is not None and (system_prompt or '').startswith(pool.system_prompt):
+            extra_context = system_prompt[len(pool.system_prompt):].strip()
+            if extra_context:
+                full_prompt = f"{extra_context}\n\n{full_prompt}"
+            logger.info("Running Claude CLI on a pooled worker...")
+            return {
+                'success': True,
+                'response': pool.ask(full_prompt),
+                'error': None
+            }
+
         # Build Claude CLI command with system prompt and custom settings
-        settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'settings.json')
+        settings_path = _cli_settings_path()
         cmd = ['claude', '--print', '--settings', settings_path]
         if system_prompt:
             cmd.extend(['--system-prompt', system_prompt])
@@ -33,9 +405,7 @@ def call_claude_with_mcp(message, conversation_history=None, system_prompt=None)
         logger.info(f"Running Claude CLI: {' '.join(cmd[:5])}...")
         
         # Call Claude Code CLI using stdin for non-interactive execution
-        # Auto-detect environment: /workspace (sandbox) or local project root
-        project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
-        working_dir = '/workspace' if os.path.exists('/workspace') else project_root
+        working_dir = _cli_working_dir()
 
         result = subprocess.run(
             cmd,
@@ -60,7 +430,7 @@ def call_claude_with_mcp(message, conversation_history=None, system_prompt=None)
                 'error': result.stderr
             }
             
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, TimeoutError):
         logger.error("Claude CLI timeout")
         return {
             'success': False,
@@ -75,76 +445,43 @@ def call_claude_with_mcp(message, conversation_history=None, system_prompt=None)
             'error': str(e)
         }
 
+def _has_flights_list(obj):
+    return isinstance(obj.get('flights'), list)
+
+
 def reformat_to_structured_json(raw_response, original_query):
     """
-    Extract structured JSON from the response. First checks for file-based output,
-    then tries direct extraction from code blocks, then falls back to API call if needed.
+    Extract structured JSON from the response. First checks for a per-search results
+    file named by a FLIGHT_FILE_SAVED marker, then tries direct extraction from code
+    blocks, then falls back to API call if needed.
     """
     try:
-        # PRIORITY 1: Check for file-based JSON (new fast approach)
+        # PRIORITY 1: Check for file-based JSON written by flight_search.py.
+        # Only the file named by this response's marker is trusted; each search
+        # writes its own file, so we consume it and clean it up.
         file_match = re.search(r'FLIGHT_FILE_SAVED:(/[^\s\n]+\.json)', raw_response)
         if file_match:
             file_path = file_match.group(1)
             logger.info(f"Found flight file marker, reading from: {file_path}")
-            try:
-                with open(file_path, 'r') as f:
-                    flight_data = json.load(f)
-                if 'flights' in flight_data and isinstance(flight_data['flights'], list):
-                    logger.info(f"Successfully loaded {len(flight_data.get('flights', []))} flights from file")
-                    return flight_data
-            except (IOError, json.JSONDecodeError) as e:
-                logger.warning(f"Failed to read flight file {file_path}: {e}")
-
-        # Also check the default file location even without marker
-        default_file = '/tmp/jetset_flights.json'
-        if os.path.exists(default_file):
-            try:
-                # Check if file was modified recently (within last 5 minutes)
-                import time
-                file_mtime = os.path.getmtime(default_file)
-                if time.time() - file_mtime < 300:  # 5 minutes
-                    with open(default_file, 'r') as f:
-                        flight_data = json.load(f)
-                    if 'flights' in flight_data and isinstance(flight_data['flights'], list):
-                        logger.info(f"Loaded {len(flight_data.get('flights', []))} flights from default file")
-                        return flight_data
-            except (IOError, json.JSONDecodeError) as e:
-                logger.warning(f"Failed to read default flight file: {e}")
-
-        # PRIORITY 2: Try multiple extraction patterns in order of preference
-        extraction_patterns = [
-            (r'FLIGHT_JSON_START\s*(\{.*\})\s*FLIGHT_JSON_END', "FLIGHT_JSON markers"),
-            (r'```json\s*(\{.*\})\s*```', "```json blocks"),
-            (r'JSON OUTPUT:\s*(\{.*\})', "JSON OUTPUT prefix"),
-            (r'FLIGHT SEARCH RESULTS JSON[:\s=]*(\{.*\})', "FLIGHT SEARCH RESULTS"),
-            (r'"flights"\s*:\s*\[.*?\]\s*,\s*"summary"', "flights+summary structure"),
-        ]
-
-        for pattern, pattern_name in extraction_patterns[:-1]:  # Skip last pattern (it's a detection pattern)
-            match = re.search(pattern, raw_response, re.DOTALL)
-            if match:
+            if not os.path.basename(file_path).startswith('jetset_flights'):
+                logger.warning(f"Ignoring unexpected flight file path: {file_path}")
+            else:
                 try:
-                    json_text = match.group(1)
-                    flight_data = json.loads(json_text)
+                    with open(file_path, 'r') as f:
+                        flight_data = json.load(f)
+                    os.remove(file_path)
                     if 'flights' in flight_data and isinstance(flight_data['flights'], list):
-                        logger.info(f"Extracted {len(flight_data.get('flights', []))} flights using {pattern_name}")
+                        logger.info(f"Successfully loaded {len(flight_data.get('flights', []))} flights from file")
                         return flight_data
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse JSON from {pattern_name}: {e}")
-                    continue
+                except (IOError, json.JSONDecodeError) as e:
+                    logger.warning(f"Failed to read flight file {file_path}: {e}")
 
-        # Last resort: find any JSON object with "flights" key
-        json_block_match = re.search(r'(\{"flights"\s*:\s*\[.*\]\s*,\s*"summary"\s*:\s*\{[^}]+\}\s*\})', raw_response, re.DOTALL)
-        if json_block_match:
-            try:
-                json_text = json_block_match.group(1)
-                flight_data = json.loads(json_text)
-                # Validate it has the expected structure
-                if 'flights' in flight_data and isinstance(flight_data['flights'], list):
-                    logger.info(f"Directly extracted {len(flight_data.get('flights', []))} flights from response")
-                    return flight_data
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON block directly: {e}")
+        # PRIORITY 2: First JSON object carrying a flights list (single pass, see json_extract.py)
+        extraction = extract_json(raw_response, predicate=_has_flights_list)
+        if extraction:
+            repairs = f" (repaired: {', '.join(extraction.repairs)})" if extraction.repairs else ""
+            logger.info(f"Extracted {len(extraction.value['flights'])} flights from response{repairs}")
+            return extraction.value
 
         # Check if response contains flight data (tables, prices, etc.)
         has_flight_data = bool(re.search(r'\$\d+|£\d+|€\d+|\d+h\s*\d+m|flight|airline', raw_response, re.IGNORECASE))
@@ -257,10 +594,9 @@ Return ONLY the JSON object, nothing else."""
                 json_text += block.get('text', '')
         
         # Try to extract JSON from the response
-        # Look for JSON object
-        json_match = re.search(r'\{.*\}', json_text, re.DOTALL)
-        if json_match:
-            flight_data = json.loads(json_match.group(0))
+        extraction = extract_json(json_text)
+        if extraction:
+            flight_data = extraction.value
             logger.info(f"Successfully extracted {len(flight_data.get('flights', []))} flights")
             return flight_data
         else:
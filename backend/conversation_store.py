@@ -0,0 +1,323 @@
+"""
+Bounded per-conversation state: chat history plus the last search parameters.
+
+Two backends share one interface:
+
+    MemoryConversationStore  - in-process LRU with idle TTL and a byte budget
+    SQLiteConversationStore  - a SQLite file in WAL mode, so several worker
+                               processes (gunicorn) see the same conversations
+
+Both cap the history kept per conversation and evict conversations that have
+been idle too long or exceed the size limit.
+
+Configuration (env):
+    CONVERSATION_STORE          - "memory" (default) or "sqlite"
+    CONVERSATION_DB             - SQLite file (default: <tmp>/jetset_conversations.db)
+    CONVERSATION_MAX            - max conversations kept (default 1000)
+    CONVERSATION_IDLE_TTL       - seconds of inactivity before eviction (default 3600)
+    CONVERSATION_HISTORY_LIMIT  - messages kept per conversation (default 20)
+    CONVERSATION_MAX_BYTES      - memory backend byte budget (default 64 MiB)
+"""
+
+import abc
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+# Rough per-message overhead (dict + deque slot) for memory accounting
+_MESSAGE_OVERHEAD = 200
+
+
+class ConversationStore(abc.ABC):
+    """Interface shared by the backends."""
+
+    @abc.abstractmethod
+    def append_message(self, conversation_id: str, role: str, content: str):
+        """Add a message to the conversation, creating it if needed."""
+
+    @abc.abstractmethod
+    def history(self, conversation_id: str) -> List[Dict[str, str]]:
+        """Messages oldest first, at most history_limit of them ([] for unknown ids)."""
+
+    @abc.abstractmethod
+    def get_params(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """The last search parameters, or None."""
+
+    @abc.abstractmethod
+    def set_params(self, conversation_id: str, params: Dict[str, Any]):
+        """Remember the search parameters for follow-up turns."""
+
+    @abc.abstractmethod
+    def reset(self, conversation_id: str):
+        """Forget both the history and the search parameters."""
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Size and eviction counters for /api/metrics."""
+
+
+class _Conversation:
+    __slots__ = ('history', 'params', 'last_access', 'size')
+
+    def __init__(self, history_limit: int):
+        self.history = deque(maxlen=history_limit)
+        self.params = None
+        self.last_access = time.time()
+        self.size = 0
+
+
+class MemoryConversationStore(ConversationStore):
+    """LRU of conversations with idle TTL, per-conversation history cap and a byte budget."""
+
+    def __init__(self, maxsize: int = 1000, idle_ttl: float = 3600, history_limit: int = 20,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.idle_ttl = idle_ttl
+        self.history_limit = history_limit
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _size(conversation: _Conversation) -> int:
+        size = sum(len(m['content'].encode()) + _MESSAGE_OVERHEAD for m in conversation.history)
+        if conversation.params is not None:
+            size += len(json.dumps(conversation.params, default=str))
+        return size
+
+    def _get(self, conversation_id: str, create: bool) -> Optional[_Conversation]:
+        # Caller holds the lock
+        now = time.time()
+        conversation = self._data.get(conversation_id)
+        if conversation is not None and now - conversation.last_access > self.idle_ttl:
+            self._drop(conversation_id)
+            self.expirations += 1
+            conversation = None
+        if conversation is None:
+            if not create:
+                return None
+            conversation = self._data[conversation_id] = _Conversation(self.history_limit)
+        conversation.last_access = now
+        self._data.move_to_end(conversation_id)
+        return conversation
+
+    def _drop(self, conversation_id: str):
+        conversation = self._data.pop(conversation_id, None)
+        if conversation is not None:
+            self.bytes -= conversation.size
+
+    def _resize(self, conversation: _Conversation):
+        size = self._size(conversation)
+        self.bytes += size - conversation.size
+        conversation.size = size
+
+    def _evict(self):
+        # Oldest access first: expired entries, then anything over the count or byte budget
+        now = time.time()
+        while self._data:
+            conversation_id, conversation = next(iter(self._data.items()))
+            if now - conversation.last_access > self.idle_ttl:
+                self.expirations += 1
+            elif len(self._data) > self.maxsize or (self.bytes > self.max_bytes and len(self._data) > 1):
+                self.evictions += 1
+            else:
+                break
+            self._drop(conversation_id)
+
+    def append_message(self, conversation_id: str, role: str, content: str):
+        with self._lock:
+            conversation = self._get(conversation_id, create=True)
+            conversation.history.append({'role': role, 'content': content})
+            self._resize(conversation)
+            self._evict()
+
+    def history(self, conversation_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            conversation = self._get(conversation_id, create=False)
+            return [dict(m) for m in conversation.history] if conversation else []
+
+    def get_params(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            conversation = self._get(conversation_id, create=False)
+            return dict(conversation.params) if conversation and conversation.params is not None else None
+
+    def set_params(self, conversation_id: str, params: Dict[str, Any]):
+        with self._lock:
+            conversation = self._get(conversation_id, create=True)
+            conversation.params = dict(params)
+            self._resize(conversation)
+            self._evict()
+
+    def reset(self, conversation_id: str):
+        with self._lock:
+            self._drop(conversation_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'conversations': len(self._data),
+                'maxsize': self.maxsize,
+                'messages': sum(len(c.history) for c in self._data.values()),
+                'history_limit': self.history_limit,
+                'idle_ttl': self.idle_ttl,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Conversations in a SQLite database (WAL mode) shared between processes.
+
+    Each thread gets its own connection. Idle and over-limit conversations
+    are swept at most every sweep_interval seconds, on writes.
+    """
+
+    def __init__(self, path: str, maxsize: int = 1000, idle_ttl: float = 3600,
+                 history_limit: int = 20, sweep_interval: float = 60):
+        self.path = path
+        self.maxsize = maxsize
+        self.idle_ttl = idle_ttl
+        self.history_limit = history_limit
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self.evictions = 0
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY,
+                    params TEXT,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS conversations_updated ON conversations(updated_at);
+                CREATE TABLE IF NOT EXISTS messages (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS messages_conversation ON messages(conversation_id, seq);
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so they are keyed on the pid too
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _touch(self, conn: sqlite3.Connection, conversation_id: str, now: float):
+        # An idle conversation starts over rather than resuming stale context
+        conn.execute('DELETE FROM conversations WHERE id = ? AND updated_at < ?',
+                     (conversation_id, now - self.idle_ttl))
+        conn.execute('INSERT INTO conversations (id, updated_at) VALUES (?, ?) '
+                     'ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at',
+                     (conversation_id, now))
+
+    def _live(self, conn: sqlite3.Connection, conversation_id: str):
+        return conn.execute('SELECT params FROM conversations WHERE id = ? AND updated_at >= ?',
+                            (conversation_id, time.time() - self.idle_ttl)).fetchone()
+
+    def _sweep(self, conn: sqlite3.Connection, now: float):
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        expired = conn.execute('DELETE FROM conversations WHERE updated_at < ?', (now - self.idle_ttl,)).rowcount
+        over = conn.execute('DELETE FROM conversations WHERE id IN (SELECT id FROM conversations '
+                            'ORDER BY updated_at DESC LIMIT -1 OFFSET ?)', (self.maxsize,)).rowcount
+        self.evictions += max(expired, 0) + max(over, 0)
+
+    def append_message(self, conversation_id: str, role: str, content: str):
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._touch(conn, conversation_id, now)
+            conn.execute('INSERT INTO messages (conversation_id, role, content) VALUES (?, ?, ?)',
+                         (conversation_id, role, content))
+            conn.execute('DELETE FROM messages WHERE conversation_id = ? AND seq <= ('
+                         'SELECT seq FROM messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)',
+                         (conversation_id, conversation_id, self.history_limit))
+            self._sweep(conn, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def history(self, conversation_id: str) -> List[Dict[str, str]]:
+        conn = self._conn()
+        if self._live(conn, conversation_id) is None:
+            return []
+        rows = conn.execute('SELECT role, content FROM messages WHERE conversation_id = ? '
+                            'ORDER BY seq DESC LIMIT ?', (conversation_id, self.history_limit)).fetchall()
+        return [{'role': role, 'content': content} for role, content in reversed(rows)]
+
+    def get_params(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        row = self._live(self._conn(), conversation_id)
+        return json.loads(row[0]) if row and row[0] else None
+
+    def set_params(self, conversation_id: str, params: Dict[str, Any]):
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._touch(conn, conversation_id, now)
+            conn.execute('UPDATE conversations SET params = ? WHERE id = ?',
+                         (json.dumps(params, default=str), conversation_id))
+            self._sweep(conn, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def reset(self, conversation_id: str):
+        self._conn().execute('DELETE FROM conversations WHERE id = ?', (conversation_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        conversations, params_bytes = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(params)), 0) FROM conversations').fetchone()
+        messages, message_bytes = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM messages').fetchone()
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'conversations': conversations,
+            'maxsize': self.maxsize,
+            'messages': messages,
+            'history_limit': self.history_limit,
+            'idle_ttl': self.idle_ttl,
+            'bytes': params_bytes + message_bytes,
+            'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'evictions': self.evictions,
+        }
+
+
+def create_conversation_store() -> ConversationStore:
+    """Build the store selected by CONVERSATION_STORE."""
+    options = dict(
+        maxsize=int(os.getenv('CONVERSATION_MAX', '1000')),
+        idle_ttl=float(os.getenv('CONVERSATION_IDLE_TTL', '3600')),
+        history_limit=int(os.getenv('CONVERSATION_HISTORY_LIMIT', '20')),
+    )
+    if os.getenv('CONVERSATION_STORE', 'memory').lower() == 'sqlite':
+        path = os.getenv('CONVERSATION_DB') or os.path.join(tempfile.gettempdir(), 'jetset_conversations.db')
+        return SQLiteConversationStore(path, **options)
+    return MemoryConversationStore(max_bytes=int(os.getenv('CONVERSATION_MAX_BYTES', str(64 * 1024 * 1024))),
+                                   **options)
@@ -5,15 +5,62 @@ Fixed Flight Search Script - Deterministic flight search with proper error handl
 Usage:
     python flight_search.py --origin "Beijing" --destination "Melbourne" --date "2026-03-06" --adults 1 --cabin_class "ECONOMY"
 
+    The backend does not spawn this script; it calls run_search() in-process
+    through search_engine.FlightSearchEngine. The CLI is a thin wrapper around it.
+
 Output:
-    Saves results to /tmp/jetset_flights.json and prints status message.
+    Atomically writes results to a unique per-search file (or --output) and
+    prints a FLIGHT_FILE_SAVED:<path> marker plus a status message.
 """
 
 import argparse
+import asyncio
+import copy
 import json
+import os
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from booking_com_client import BookingCom
+from booking_com_client import get_shared_booking
+from locations import resolve_route, resolve_route_async, canonical_location, LocationError
+from ttl_cache import TTLCache
+from shared_cache import shared_namespace
+from singleflight import AsyncSingleFlight, SingleFlight
+
+# Flight result cache keyed on (fromId, toId, departDate, returnDate, adults, cabin).
+# Entries are fresh for FLIGHT_CACHE_TTL seconds, then served stale for up to
+# FLIGHT_CACHE_STALE_TTL more while a background refresh runs. TTL 0 disables it.
+FLIGHT_CACHE_TTL = float(os.getenv('FLIGHT_CACHE_TTL', '300'))
+DATE_RANGE_MAX_DAYS = int(os.getenv('DATE_RANGE_MAX_DAYS', '7'))
+# Round trips also search both one-way legs in parallel to compare prices
+ROUND_TRIP_COMPARE = os.getenv('ROUND_TRIP_COMPARE', '1').lower() not in ('0', 'false', 'no')
+flight_cache = TTLCache(maxsize=int(os.getenv('FLIGHT_CACHE_SIZE', '500')),
+                        ttl=FLIGHT_CACHE_TTL,
+                        stale_ttl=float(os.getenv('FLIGHT_CACHE_STALE_TTL', '900')),
+                        shared=shared_namespace('flights'))
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='flight-cache-refresh')
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+# Concurrent searches for the same key (cache misses and refreshes) share one upstream call
+flight_searches = SingleFlight()
+# Searches fanned out by search_flights_many (date ranges, round-trip comparisons)
+# run inside one search engine slot, so the engine's bound does not cover them;
+# this caps them across the whole process
+FAN_OUT_LIMIT = int(os.getenv('FLIGHT_SEARCH_FAN_OUT_LIMIT', '16'))
+_fan_out_slots = threading.BoundedSemaphore(FAN_OUT_LIMIT)
+
+# Min-fare calendar (Get_Min_Price) cached per (fromId, toId, day, currency). One
+# gateway call returns several days around departDate, so a ±N day window usually
+# costs a single call; days the gateway returns no fare for are cached as None.
+PRICE_CALENDAR_DAYS = int(os.getenv('PRICE_CALENDAR_DAYS', '3'))
+PRICE_CALENDAR_MAX_DAYS = int(os.getenv('PRICE_CALENDAR_MAX_DAYS', '31'))
+price_calendar_cache = TTLCache(maxsize=int(os.getenv('PRICE_CALENDAR_CACHE_SIZE', '5000')),
+                                ttl=float(os.getenv('PRICE_CALENDAR_TTL', '1800')),
+                                shared=shared_namespace('price_calendar'))
+min_price_lookups = SingleFlight()
 
 
 def parse_date(date_str: str) -> str:
@@ -155,40 +202,490 @@ def search_flights(origin: str, destination: str, date: str, adults: int = 1,
     }
 
     try:
-        booking = BookingCom()
+        booking = get_shared_booking()
     except Exception as e:
         result["error"] = f"Failed to initialize booking client: {str(e)}"
         return result
 
-    # Step 1: Search for origin airport/city ID
+    # Steps 1 + 2: Resolve origin and destination airport/city IDs concurrently
+    # (offline index / cache first, see locations.py)
     try:
-        origin_response = booking.flights.search_destination(origin)
-        origin_data = origin_response.get('data', [])
-        if not origin_data:
-            result["error"] = f"Could not find airport/city for origin: {origin}"
-            return result
-        origin_id = origin_data[0]['id']
-        origin_name = origin_data[0].get('name', origin)
-        result["search_params"]["origin_id"] = origin_id
-        result["search_params"]["origin_name"] = origin_name
+        origin_location, dest_location = resolve_route(booking, origin, destination)
+    except LocationError as e:
+        result["error"] = str(e)
+        return result
+    origin_id = origin_location['id']
+    origin_name = origin_location['name']
+    dest_id = dest_location['id']
+    dest_name = dest_location['name']
+    result["search_params"]["origin_id"] = origin_id
+    result["search_params"]["origin_name"] = origin_name
+    result["search_params"]["dest_id"] = dest_id
+    result["search_params"]["dest_name"] = dest_name
+
+    # Steps 3 + 4: Search for flights and process the offers (result cache first)
+    result.update(_cached_search_offers(
+        booking, origin_id, dest_id, origin_name, dest_name, date,
+        return_date, adults, cabin_class))
+    return result
+
+
+def search_flights_many(queries: list, max_concurrency: int = 8) -> list:
+    """
+    Run search_flights for many queries concurrently.
+
+    queries: [{"origin": .., "destination": .., "date": "YYYY-MM-DD", "adults": 1,
+               "cabin_class": "ECONOMY", "return_date": None}, ...]
+
+    Identical queries (after normalizing place names and cabin) run once, and
+    at most FLIGHT_SEARCH_FAN_OUT_LIMIT of them run at a time across all
+    batches in the process. Returns one search_flights result per input, in
+    input order. A failing
+    query carries its own 'error' and does not affect the rest of the batch.
+    """
+    def normalize(q: dict) -> tuple:
+        return (canonical_location(q.get("origin", "")), canonical_location(q.get("destination", "")),
+                q.get("date", ""), int(q.get("adults") or 1),
+                (q.get("cabin_class") or "ECONOMY").upper(), q.get("return_date") or "")
+
+    unique, slots, index = [], [], {}
+    for q in queries:
+        key = normalize(q)
+        if key not in index:
+            index[key] = len(unique)
+            unique.append(q)
+        slots.append(index[key])
+
+    def run(q: dict) -> dict:
+        try:
+            with _fan_out_slots:
+                return search_flights(
+                    origin=q.get("origin", ""),
+                    destination=q.get("destination", ""),
+                    date=q.get("date", ""),
+                    adults=int(q.get("adults") or 1),
+                    cabin_class=(q.get("cabin_class") or "ECONOMY").upper(),
+                    return_date=q.get("return_date"))
+        except Exception as e:
+            return {"success": False, "flights": [], "summary": {},
+                    "error": f"Search failed: {str(e)}", "search_params": dict(q)}
+
+    if not unique:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(unique))),
+                            thread_name_prefix='flight-search-many') as pool:
+        results = list(pool.map(run, unique))
+    return [copy.deepcopy(results[i]) for i in slots]
+
+
+def _duration_seconds(duration: str) -> int:
+    """'12h 30m' -> seconds (unparseable durations sort last)."""
+    try:
+        hours, _, rest = duration.partition('h')
+        return int(hours) * 3600 + int(rest.strip().rstrip('m') or 0) * 60
+    except (ValueError, AttributeError):
+        return 10 ** 9
+
+
+def search_date_range(origin: str, destination: str, start_date: str, end_date: str,
+                      adults: int = 1, cabin_class: str = "ECONOMY", max_days: int = None,
+                      max_results: int = 20) -> dict:
+    """
+    Search every departure date from start_date to end_date (YYYY-MM-DD, inclusive)
+    in parallel and merge the results.
+
+    At most max_days dates are searched (DATE_RANGE_MAX_DAYS, default 7). Flights
+    are tagged with 'searchDate', ranked by price and capped at max_results; the
+    summary adds 'cheapestPerDay'. Returns the same shape as search_flights.
+    """
+    max_days = max_days or DATE_RANGE_MAX_DAYS
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    if end < start:
+        start, end = end, start
+    total_days = (end - start).days + 1
+    dates = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(min(total_days, max_days))]
+
+    day_results = search_flights_many(
+        [{"origin": origin, "destination": destination, "date": d,
+          "adults": adults, "cabin_class": cabin_class} for d in dates],
+        max_concurrency=len(dates))
+
+    merged, cheapest_per_day, failed = [], [], []
+    for day, day_result in zip(dates, day_results):
+        if day_result.get("error"):
+            failed.append({"date": day, "error": day_result["error"]})
+            continue
+        day_flights = day_result.get("flights", [])
+        for flight in day_flights:
+            flight = dict(flight, id=f"{day}-{flight['id']}", searchDate=day,
+                          tags=[t for t in flight.get('tags', []) if t not in ('cheapest', 'fastest')])
+            merged.append(flight)
+        if day_flights:
+            best = min(day_flights, key=lambda f: f['price'])
+            cheapest_per_day.append({"date": day, "price": best['price'], "currency": best['currency'],
+                                     "airline": best['airline'], "flightId": f"{day}-{best['id']}"})
+
+    first_ok = next((r for r in day_results if not r.get("error")), day_results[0] if day_results else {})
+    result = {
+        "success": bool(len(failed) < len(dates)),
+        "flights": [],
+        "summary": {},
+        "error": None,
+        "search_params": dict(first_ok.get("search_params", {}), date_range_start=dates[0],
+                              date_range_end=dates[-1], date=f"{dates[0]} to {dates[-1]}"),
+        "cached": bool(day_results) and all(r.get("cached") for r in day_results),
+        "age_s": max((r.get("age_s", 0) for r in day_results), default=0),
+    }
+    if failed and len(failed) == len(dates):
+        result["error"] = failed[0]["error"]
+        return result
+
+    merged.sort(key=lambda f: (f['price'], _duration_seconds(f['totalDuration'])))
+    merged = merged[:max_results]
+    if merged:
+        merged[0]['tags'].append('cheapest')
+        min(merged, key=lambda f: _duration_seconds(f['totalDuration']))['tags'].append('fastest')
+
+    summary = first_ok.get("summary", {})
+    result["flights"] = merged
+    result["summary"] = {
+        "totalResults": len(merged),
+        "cheapestPrice": merged[0]['price'] if merged else 0,
+        "fastestDuration": min((f['totalDuration'] for f in merged), key=_duration_seconds, default="N/A"),
+        "averagePrice": round(sum(f['price'] for f in merged) / len(merged)) if merged else 0,
+        "currency": merged[0]['currency'] if merged else "USD",
+        "origin": summary.get("origin", origin),
+        "destination": summary.get("destination", destination),
+        "date": f"{dates[0]} to {dates[-1]}",
+        "cheapestPerDay": cheapest_per_day,
+        "daysSearched": len(dates),
+        "daysRequested": total_days,
+        "failedDays": failed,
+    }
+    return result
+
+
+def run_date_range_search(params: dict) -> dict:
+    """
+    Date-range counterpart of run_search: parses date_range_start/date_range_end
+    and returns the run_search output structure for search_date_range.
+    """
+    start = parse_date(params.get('date_range_start') or 'today')
+    end = parse_date(params.get('date_range_end') or params.get('date_range_start') or 'today')
+    result = search_date_range(
+        origin=params.get('origin', ''),
+        destination=params.get('destination', ''),
+        start_date=start,
+        end_date=end,
+        adults=int(params.get('adults') or 1),
+        cabin_class=(params.get('cabin_class') or 'ECONOMY').upper()
+    )
+    return {key: result.get(key) for key in ("flights", "summary", "search_params", "error", "cached", "age_s")}
+
+
+def compare_round_trip(origin: str, destination: str, date: str, return_date: str,
+                       adults: int = 1, cabin_class: str = "ECONOMY") -> dict:
+    """
+    Search the round trip and both one-way legs concurrently.
+
+    Returns the round-trip search_flights result plus 'one_ways'
+    ({'outbound': .., 'inbound': ..}, each with flights/summary/error) and a
+    'comparison' of the cheapest round trip against the cheapest pair of
+    one-ways (None when either side has no fares).
+    """
+    base = {"adults": adults, "cabin_class": cabin_class}
+    round_trip, outbound, inbound = search_flights_many([
+        dict(base, origin=origin, destination=destination, date=date, return_date=return_date),
+        dict(base, origin=origin, destination=destination, date=date),
+        dict(base, origin=destination, destination=origin, date=return_date),
+    ], max_concurrency=3)
+    return _add_round_trip_comparison(round_trip, outbound, inbound)
+
+
+def _add_round_trip_comparison(round_trip: dict, outbound: dict, inbound: dict) -> dict:
+    """Add 'one_ways' and 'comparison' (see compare_round_trip) to the round-trip result."""
+    def cheapest(result: dict):
+        flights = [] if result.get("error") else result.get("flights", [])
+        return min(flights, key=lambda f: f['price']) if flights else None
+
+    best_round_trip, best_out, best_in = cheapest(round_trip), cheapest(outbound), cheapest(inbound)
+    comparison = None
+    if best_round_trip and best_out and best_in and best_out['currency'] == best_in['currency'] == best_round_trip['currency']:
+        one_ways_price = best_out['price'] + best_in['price']
+        comparison = {
+            "roundTripPrice": best_round_trip['price'],
+            "oneWaysPrice": one_ways_price,
+            "currency": best_round_trip['currency'],
+            "cheaperOption": "round_trip" if best_round_trip['price'] <= one_ways_price else "one_ways",
+            "savings": abs(one_ways_price - best_round_trip['price']),
+            "outboundFlightId": best_out['id'],
+            "inboundFlightId": best_in['id'],
+        }
+
+    round_trip["one_ways"] = {
+        leg: {key: result.get(key) for key in ("flights", "summary", "error")}
+        for leg, result in (("outbound", outbound), ("inbound", inbound))
+    }
+    round_trip["comparison"] = comparison
+    return round_trip
+
+
+def search_multi_city(legs: list, adults: int = 1, cabin_class: str = "ECONOMY") -> dict:
+    """
+    Multi-city search via Flights.search_multi_stop.
+
+    legs: [{"origin": .., "destination": .., "date": "YYYY-MM-DD"}, ...]. All
+    places are resolved concurrently; each flight's 'segments' holds one entry
+    per leg. Returns the same shape as search_flights.
+    """
+    result = {
+        "success": False,
+        "flights": [],
+        "summary": {},
+        "error": None,
+        "search_params": {"legs": [dict(leg) for leg in legs], "adults": adults, "cabin_class": cabin_class}
+    }
+    if len(legs) < 2:
+        result["error"] = "A multi-city trip needs at least two legs"
+        return result
+
+    try:
+        booking = get_shared_booking()
     except Exception as e:
-        result["error"] = f"Failed to search origin '{origin}': {str(e)}"
+        result["error"] = f"Failed to initialize booking client: {str(e)}"
         return result
 
-    # Step 2: Search for destination airport/city ID
     try:
-        dest_response = booking.flights.search_destination(destination)
-        dest_data = dest_response.get('data', [])
-        if not dest_data:
-            result["error"] = f"Could not find airport/city for destination: {destination}"
-            return result
-        dest_id = dest_data[0]['id']
-        dest_name = dest_data[0].get('name', destination)
-        result["search_params"]["dest_id"] = dest_id
-        result["search_params"]["dest_name"] = dest_name
+        with ThreadPoolExecutor(max_workers=len(legs), thread_name_prefix='multi-city-resolve') as pool:
+            routes = list(pool.map(lambda leg: resolve_route(booking, leg.get("origin", ""), leg.get("destination", "")), legs))
+    except LocationError as e:
+        result["error"] = str(e)
+        return result
+
+    api_legs = []
+    for leg, params, (origin_location, dest_location) in zip(legs, result["search_params"]["legs"], routes):
+        params.update(origin_id=origin_location['id'], origin_name=origin_location['name'],
+                      dest_id=dest_location['id'], dest_name=dest_location['name'])
+        api_legs.append({"fromId": origin_location['id'], "toId": dest_location['id'], "departDate": leg.get("date", "")})
+
+    origin_name, dest_name = routes[0][0]['name'], routes[-1][1]['name']
+    dates = f"{api_legs[0]['departDate']} to {api_legs[-1]['departDate']}"
+    key = ("MULTI",) + tuple((l["fromId"].upper(), l["toId"].upper(), l["departDate"]) for l in api_legs) + (
+        int(adults), cabin_class.upper())
+    result.update(_cached_offers(key, _search_multi_stop_offers,
+                                 (booking, api_legs, origin_name, dest_name, dates, adults, cabin_class)))
+    if result.get("summary"):
+        result["summary"]["legs"] = [{"origin": p['origin_name'], "destination": p['dest_name'], "date": p.get('date', '')}
+                                     for p in result["search_params"]["legs"]]
+    return result
+
+
+def _search_multi_stop_offers(booking, api_legs: list, origin_name: str, dest_name: str,
+                              dates: str, adults: int, cabin_class: str) -> dict:
+    """Call Flights.search_multi_stop and process the offers (see _process_offers)."""
+    try:
+        response = booking.flights.search_multi_stop(api_legs, adults=adults, cabin_class=cabin_class.upper())
+    except Exception as e:
+        return {"success": False, "flights": [], "summary": {}, "error": f"Failed to search flights: {str(e)}"}
+    return _process_offers(response, origin_name, dest_name, dates, cabin_class)
+
+
+def run_multi_city_search(params: dict) -> dict:
+    """Multi-city counterpart of run_search: parses each leg's date and runs search_multi_city."""
+    legs = [dict(leg, date=parse_date(leg.get('date') or 'next week')) for leg in params.get('legs') or []]
+    result = search_multi_city(
+        legs,
+        adults=int(params.get('adults') or 1),
+        cabin_class=(params.get('cabin_class') or 'ECONOMY').upper()
+    )
+    return {key: result.get(key) for key in ("flights", "summary", "search_params", "error", "cached", "age_s")}
+
+
+def price_calendar(origin: str, destination: str, date: str, days: int = None,
+                   currency: str = None, end_date: str = None) -> dict:
+    """
+    Minimum fare per departure day for date ±days (or date..end_date), YYYY-MM-DD.
+
+    Served from price_calendar_cache where possible; missing days are filled
+    with as few Flights.get_min_price calls as the gateway's window allows.
+    Past days are skipped. Returns dict with 'success', 'days'
+    ([{'date', 'price', 'currency', 'cheapest'}], price None when unknown),
+    'cheapestDate', 'cached' and 'error' keys.
+    """
+    days = PRICE_CALENDAR_DAYS if days is None else max(0, int(days))
+    center = datetime.strptime(date, '%Y-%m-%d')
+    if end_date:
+        start, end = sorted([center, datetime.strptime(end_date, '%Y-%m-%d')])
+    else:
+        start, end = center - timedelta(days=days), center + timedelta(days=days)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = max(start, today)
+    end = min(end, start + timedelta(days=PRICE_CALENDAR_MAX_DAYS - 1))
+    wanted = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+    result = {
+        "success": False,
+        "origin": origin,
+        "destination": destination,
+        "date": date,
+        "currency": None,
+        "days": [],
+        "cheapestDate": None,
+        "cached": False,
+        "error": None,
+    }
+    if not wanted:
+        result["error"] = "No upcoming dates in the requested window"
+        return result
+
+    try:
+        booking = get_shared_booking()
+        origin_location, dest_location = resolve_route(booking, origin, destination)
+    except LocationError as e:
+        result["error"] = str(e)
+        return result
     except Exception as e:
-        result["error"] = f"Failed to search destination '{destination}': {str(e)}"
+        result["error"] = f"Failed to initialize booking client: {str(e)}"
         return result
+    result["origin"], result["destination"] = origin_location['name'], dest_location['name']
+    currency = (currency or booking.config.currency_code).upper()
+    route = (origin_location['id'].upper(), dest_location['id'].upper())
+
+    missing = [d for d in wanted if price_calendar_cache.lookup(route + (d, currency)) is None]
+    result["cached"] = not missing
+    try:
+        while missing:
+            # Centre the next call a few days past the first gap so one window covers the most days
+            anchor = datetime.strptime(missing[0], '%Y-%m-%d') + timedelta(days=min(3, len(missing) - 1))
+            anchor_day = max(anchor, start).strftime('%Y-%m-%d')
+            _fetch_min_prices(booking, route, anchor_day, currency)
+            still_missing = [d for d in missing if price_calendar_cache.lookup(route + (d, currency)) is None]
+            if len(still_missing) == len(missing):
+                # The gateway didn't return these days at all; remember that they have no fare
+                for d in still_missing:
+                    price_calendar_cache.set(route + (d, currency), None)
+                break
+            missing = still_missing
+    except Exception as e:
+        result["error"] = f"Failed to get price calendar: {str(e)}"
+        return result
+
+    for d in wanted:
+        entry = price_calendar_cache.lookup(route + (d, currency))
+        price = entry[0] if entry else None
+        result["days"].append({"date": d, "price": price, "currency": currency, "cheapest": False})
+    priced = [day for day in result["days"] if day["price"] is not None]
+    if priced:
+        best = min(priced, key=lambda day: day["price"])
+        best["cheapest"] = True
+        result["cheapestDate"] = best["date"]
+    result["currency"] = currency
+    result["success"] = True
+    return result
+
+
+def _fetch_min_prices(booking, route: tuple, depart_date: str, currency: str):
+    """One Get_Min_Price call; caches every day it returns (single-flighted per anchor)."""
+    def fetch():
+        response = booking.flights.get_min_price(route[0], route[1], depart_date, currency)
+        data = response.get('data', []) if isinstance(response, dict) else []
+        for item in data if isinstance(data, list) else []:
+            day = (item.get('departureDate') or '')[:10]
+            price = item.get('price') or {}
+            if not day or price.get('units') is None:
+                continue
+            if (price.get('currencyCode') or currency).upper() != currency:
+                continue
+            amount = price['units'] + price.get('nanos', 0) / 1e9
+            price_calendar_cache.set(route + (day, currency), round(amount, 2))
+        return len(data) if isinstance(data, list) else 0
+
+    return min_price_lookups.do(route + (depart_date, currency), fetch)
+
+
+def run_price_calendar(params: dict) -> dict:
+    """price_calendar for chat/API params: origin, destination, date, optional days/end_date/currency."""
+    return price_calendar(
+        origin=params.get('origin', ''),
+        destination=params.get('destination', ''),
+        date=parse_date(params.get('date') or 'today'),
+        days=params.get('days'),
+        currency=params.get('currency'),
+        end_date=parse_date(params['end_date']) if params.get('end_date') else None
+    )
+
+
+def _flight_cache_key(origin_id: str, dest_id: str, date: str, return_date: str,
+                      adults: int, cabin_class: str) -> tuple:
+    return (origin_id.upper(), dest_id.upper(), date, return_date or "",
+            int(adults), cabin_class.upper())
+
+
+def _cached_search_offers(booking, origin_id: str, dest_id: str, origin_name: str,
+                          dest_name: str, date: str, return_date: str, adults: int,
+                          cabin_class: str) -> dict:
+    """
+    Serve _search_offers from the result cache with stale-while-revalidate.
+
+    Fresh hits return immediately; stale hits return immediately and schedule
+    one background refresh per key. Adds 'cached' and 'age_s' to the result.
+    """
+    args = (booking, origin_id, dest_id, origin_name, dest_name, date, return_date, adults, cabin_class)
+    key = _flight_cache_key(origin_id, dest_id, date, return_date, adults, cabin_class)
+    return _cached_offers(key, _search_offers, args)
+
+
+def _cached_offers(key: tuple, fetch, args: tuple) -> dict:
+    """Stale-while-revalidate wrapper around fetch(*args) on flight_cache (see _cached_search_offers)."""
+    if FLIGHT_CACHE_TTL <= 0:
+        offers = flight_searches.do(key, fetch, *args)
+        return dict(copy.deepcopy(offers), cached=False, age_s=0)
+
+    entry = flight_cache.lookup(key)
+    if entry is not None:
+        value, age, fresh = entry
+        if not fresh:
+            _schedule_refresh(key, fetch, args)
+        return dict(copy.deepcopy(value), cached=True, age_s=round(age, 1))
+
+    offers = flight_searches.do(key, _fetch_and_cache, key, fetch, args)
+    return dict(copy.deepcopy(offers), cached=False, age_s=0)
+
+
+def _fetch_and_cache(key: tuple, fetch, args: tuple) -> dict:
+    offers = fetch(*args)
+    if not offers.get("error"):
+        flight_cache.set(key, offers)
+    return offers
+
+
+def _schedule_refresh(key: tuple, fetch, args: tuple):
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            flight_searches.do(key, _fetch_and_cache, key, fetch, args)
+        except Exception as e:
+            print(f"WARNING: Background refresh failed for {key}: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    _refresh_pool.submit(refresh)
+
+
+def _search_offers(booking, origin_id: str, dest_id: str, origin_name: str,
+                   dest_name: str, date: str, return_date: str, adults: int,
+                   cabin_class: str) -> dict:
+    """Steps 3 + 4: call Flights.search and process the offers.
+
+    Returns dict with 'success', 'flights', 'summary' and 'error' keys.
+    """
+    result = {"success": False, "flights": [], "summary": {}, "error": None}
 
     # Step 3: Search for flights
     try:
@@ -205,6 +702,81 @@ def search_flights(origin: str, destination: str, date: str, adults: int = 1,
         return result
 
     # Step 4: Process flight results
+    result.update(_process_offers(flights_response, origin_name, dest_name, date, cabin_class))
+    return result
+
+
+def _format_duration(total_seconds: int) -> str:
+    return f"{total_seconds // 3600}h {(total_seconds % 3600) // 60}m"
+
+
+def _parse_segment(segment: dict) -> dict:
+    """One offer segment (a direction or a multi-city leg) -> display fields; None without legs."""
+    legs = segment.get('legs', [])
+    if not legs:
+        return None
+    first_leg = legs[0]
+    last_leg = legs[-1]
+    total_time_sec = segment.get('totalTime', 0)
+
+    # Departure info
+    dep_time_str = first_leg.get('departureTime', '')
+    dep_airport = first_leg.get('departureAirport', {})
+
+    # Arrival info
+    arr_time_str = last_leg.get('arrivalTime', '')
+    arr_airport = last_leg.get('arrivalAirport', {})
+
+    # Airline info
+    carriers = first_leg.get('carriersData', [])
+    airline = carriers[0].get('name', 'Unknown') if carriers else 'Unknown'
+    carrier_code = carriers[0].get('code', '') if carriers else ''
+    flight_number = first_leg.get('flightInfo', {}).get('flightNumber', '')
+
+    stops = len(legs) - 1
+
+    # Extract layover cities from intermediate legs
+    layover_cities = []
+    if stops > 0:
+        for leg in legs[:-1]:
+            arr_city = leg.get('arrivalAirport', {}).get('cityName', '')
+            if arr_city:
+                layover_cities.append(arr_city)
+
+    return {
+        "airline": airline,
+        "flightNumber": f"{carrier_code}{flight_number}" if carrier_code and flight_number else "",
+        "departure": {
+            "time": dep_time_str[11:16] if len(dep_time_str) > 16 else "",
+            "date": dep_time_str[:10] if len(dep_time_str) >= 10 else "",
+            "airport": dep_airport.get('code', ''),
+            "city": dep_airport.get('cityName', '')
+        },
+        "arrival": {
+            "time": arr_time_str[11:16] if len(arr_time_str) > 16 else "",
+            "date": arr_time_str[:10] if len(arr_time_str) >= 10 else "",
+            "airport": arr_airport.get('code', ''),
+            "city": arr_airport.get('cityName', '')
+        },
+        "duration": _format_duration(total_time_sec),
+        "durationSeconds": total_time_sec,
+        "stops": stops,
+        "layovers": layover_cities,
+    }
+
+
+def _process_offers(flights_response, origin_name: str, dest_name: str, date: str,
+                    cabin_class: str) -> dict:
+    """
+    Turn a Search_Flights / Search_Flights_Multi_Stops response into flight cards.
+
+    Every segment is parsed into the flight's 'segments' list (outbound and
+    return, or one per multi-city leg); the top-level departure/arrival/
+    duration/stops fields describe the first segment. 'totalDuration' covers
+    all segments and drives the 'fastest' tag.
+    """
+    result = {"success": False, "flights": [], "summary": {}, "error": None}
+
     # Handle case where API returns a string instead of a dict
     if isinstance(flights_response, str):
         try:
@@ -248,68 +820,26 @@ def search_flights(origin: str, destination: str, date: str, adults: int = 1,
             price = price_info.get('units', 0)
             currency = price_info.get('currencyCode', 'USD')
 
-            segments = offer.get('segments', [])
-            if not segments:
+            segments = [_parse_segment(segment) for segment in offer.get('segments', [])]
+            if not segments or segments[0] is None:
                 continue
-            segment = segments[0]
-            legs = segment.get('legs', [])
-            total_time_sec = segment.get('totalTime', 0)
-
-            if not legs:
-                continue
-            first_leg = legs[0]
-            last_leg = legs[-1]
-
-            # Format duration
-            hours = total_time_sec // 3600
-            minutes = (total_time_sec % 3600) // 60
-            duration = f"{hours}h {minutes}m"
-
-            # Departure info
-            dep_time_str = first_leg.get('departureTime', '')
-            dep_airport = first_leg.get('departureAirport', {})
-
-            # Arrival info
-            arr_time_str = last_leg.get('arrivalTime', '')
-            arr_airport = last_leg.get('arrivalAirport', {})
-
-            # Airline info
-            carriers = first_leg.get('carriersData', [])
-            airline = carriers[0].get('name', 'Unknown') if carriers else 'Unknown'
-            carrier_code = carriers[0].get('code', '') if carriers else ''
-            flight_number = first_leg.get('flightInfo', {}).get('flightNumber', '')
-
-            stops = len(legs) - 1
-
-            # Extract layover cities from intermediate legs
-            layover_cities = []
-            if stops > 0:
-                for leg in legs[:-1]:
-                    arr_city = leg.get('arrivalAirport', {}).get('cityName', '')
-                    if arr_city:
-                        layover_cities.append(arr_city)
+            segments = [segment for segment in segments if segment is not None]
+            first = segments[0]
+            total_time_sec = sum(segment['durationSeconds'] for segment in segments)
 
             flight = {
                 "id": str(i + 1),
-                "airline": airline,
-                "flightNumber": f"{carrier_code}{flight_number}" if carrier_code and flight_number else "",
+                "airline": first['airline'],
+                "flightNumber": first['flightNumber'],
                 "price": price,
                 "currency": currency,
-                "departure": {
-                    "time": dep_time_str[11:16] if len(dep_time_str) > 16 else "",
-                    "date": dep_time_str[:10] if len(dep_time_str) >= 10 else "",
-                    "airport": dep_airport.get('code', ''),
-                    "city": dep_airport.get('cityName', '')
-                },
-                "arrival": {
-                    "time": arr_time_str[11:16] if len(arr_time_str) > 16 else "",
-                    "date": arr_time_str[:10] if len(arr_time_str) >= 10 else "",
-                    "airport": arr_airport.get('code', ''),
-                    "city": arr_airport.get('cityName', '')
-                },
-                "duration": duration,
-                "stops": stops,
-                "layovers": layover_cities,
+                "departure": first['departure'],
+                "arrival": first['arrival'],
+                "duration": first['duration'],
+                "totalDuration": _format_duration(total_time_sec),
+                "stops": first['stops'],
+                "layovers": first['layovers'],
+                "segments": segments,
                 "class": cabin_class.capitalize(),
                 "tags": [],
                 "token": token
@@ -321,7 +851,7 @@ def search_flights(origin: str, destination: str, date: str, adults: int = 1,
                 min_price = price
             if total_time_sec < fastest_seconds:
                 fastest_seconds = total_time_sec
-                fastest_duration = duration
+                fastest_duration = flight['totalDuration']
 
         except Exception as e:
             # Skip this flight offer if processing fails
@@ -332,7 +862,7 @@ def search_flights(origin: str, destination: str, date: str, adults: int = 1,
     for flight in processed_flights:
         if flight['price'] == min_price:
             flight['tags'].append('cheapest')
-        if flight['duration'] == fastest_duration:
+        if flight['totalDuration'] == fastest_duration:
             flight['tags'].append('fastest')
 
     # Build result
@@ -352,6 +882,154 @@ def search_flights(origin: str, destination: str, date: str, adults: int = 1,
     return result
 
 
+def _search_args(params: dict) -> dict:
+    """search_flights keyword arguments for one set of extracted parameters."""
+    return dict(
+        origin=params.get('origin', ''),
+        destination=params.get('destination', ''),
+        date=parse_date(params.get('date') or 'next week'),
+        adults=int(params.get('adults') or 1),
+        cabin_class=(params.get('cabin_class') or 'ECONOMY').upper(),
+        return_date=parse_date(params['return_date']) if params.get('return_date') else None
+    )
+
+
+def _search_output(result: dict) -> dict:
+    return {
+        "flights": result.get("flights", []),
+        "summary": result.get("summary", {}),
+        "search_params": result.get("search_params", {}),
+        "error": result.get("error"),
+        "cached": result.get("cached", False),
+        "age_s": result.get("age_s", 0),
+        "comparison": result.get("comparison"),
+        "one_ways": result.get("one_ways")
+    }
+
+
+def run_search(params: dict) -> dict:
+    """
+    Parse the date and run search_flights for one set of extracted parameters.
+
+    This is the entry point used by the backend's in-process search engine and
+    by the CLI. Returns the output structure with 'flights', 'summary',
+    'search_params' and 'error' keys.
+    """
+    search = _search_args(params)
+    if search['return_date'] and ROUND_TRIP_COMPARE:
+        result = compare_round_trip(**search)
+    else:
+        result = search_flights(**search)
+    return _search_output(result)
+
+
+# Asyncio counterparts for the ASGI app (asgi_app.py). They take an
+# AsyncBookingCom and share the caches above; stale entries are refreshed by the
+# synchronous refresh pool.
+async_flight_searches = AsyncSingleFlight()
+
+
+async def run_search_async(booking, params: dict) -> dict:
+    """run_search on the event loop."""
+    search = _search_args(params)
+    if search['return_date'] and ROUND_TRIP_COMPARE:
+        return_date = search.pop('return_date')
+        legs = [dict(search, return_date=return_date), search,
+                dict(search, origin=search['destination'], destination=search['origin'], date=return_date)]
+        results = await asyncio.gather(*(search_flights_async(booking, **leg) for leg in legs))
+        result = _add_round_trip_comparison(*results)
+    else:
+        result = await search_flights_async(booking, **search)
+    return _search_output(result)
+
+
+async def search_flights_async(booking, origin: str, destination: str, date: str, adults: int = 1,
+                               cabin_class: str = "ECONOMY", return_date: str = None) -> dict:
+    """search_flights with an AsyncBookingCom."""
+    result = {
+        "success": False,
+        "flights": [],
+        "summary": {},
+        "error": None,
+        "search_params": {"origin": origin, "destination": destination, "date": date,
+                          "adults": adults, "cabin_class": cabin_class}
+    }
+    try:
+        origin_location, dest_location = await resolve_route_async(booking, origin, destination)
+    except LocationError as e:
+        result["error"] = str(e)
+        return result
+    origin_id, origin_name = origin_location['id'], origin_location['name']
+    dest_id, dest_name = dest_location['id'], dest_location['name']
+    result["search_params"].update(origin_id=origin_id, origin_name=origin_name,
+                                   dest_id=dest_id, dest_name=dest_name)
+
+    key = _flight_cache_key(origin_id, dest_id, date, return_date, adults, cabin_class)
+    args = (origin_id, dest_id, origin_name, dest_name, date, return_date, adults, cabin_class)
+    # flight_cache may be backed by the shared SQLite file, so it is read and
+    # written on a thread; the stale refresh builds its sync client there too
+    entry = await asyncio.to_thread(flight_cache.lookup, key) if FLIGHT_CACHE_TTL > 0 else None
+    if entry is not None:
+        value, age, fresh = entry
+        if not fresh:
+            _schedule_refresh(key, _search_offers_shared, args)
+        result.update(copy.deepcopy(value), cached=True, age_s=round(age, 1))
+        return result
+
+    offers = await async_flight_searches.do(key, _search_offers_async, booking, *args)
+    if not offers.get("error") and FLIGHT_CACHE_TTL > 0:
+        await asyncio.to_thread(flight_cache.set, key, offers)
+    result.update(copy.deepcopy(offers), cached=False, age_s=0)
+    return result
+
+
+def _search_offers_shared(*args) -> dict:
+    """_search_offers with the process-wide BookingCom, for refreshes started off a thread."""
+    return _search_offers(get_shared_booking(), *args)
+
+
+async def _search_offers_async(booking, origin_id: str, dest_id: str, origin_name: str,
+                               dest_name: str, date: str, return_date: str, adults: int,
+                               cabin_class: str) -> dict:
+    """_search_offers with an AsyncBookingCom."""
+    result = {"success": False, "flights": [], "summary": {}, "error": None}
+    try:
+        flights_response = await booking.flights.search(
+            from_id=origin_id, to_id=dest_id, depart_date=date, return_date=return_date,
+            adults=adults, cabin_class=cabin_class.upper())
+    except Exception as e:
+        result["error"] = f"Failed to search flights: {str(e)}"
+        return result
+    result.update(_process_offers(flights_response, origin_name, dest_name, date, cabin_class))
+    return result
+
+
+def write_results(output: dict, path: str = None) -> str:
+    """
+    Atomically write search output as JSON and return the path written.
+
+    Without a path a unique file is created in the temp directory, so
+    concurrent searches never share (or overwrite) a results file.
+    """
+    if path:
+        directory = os.path.dirname(os.path.abspath(path))
+    else:
+        directory = tempfile.gettempdir()
+        fd, path = tempfile.mkstemp(prefix='jetset_flights_', suffix='.json', dir=directory)
+        os.close(fd)
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.jetset_flights_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(output, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
 def main():
     parser = argparse.ArgumentParser(description='Search for flights')
     parser.add_argument('--origin', '-o', required=True, help='Origin city/airport')
@@ -362,52 +1040,40 @@ def main():
                         choices=['ECONOMY', 'PREMIUM_ECONOMY', 'BUSINESS', 'FIRST'],
                         help='Cabin class')
     parser.add_argument('--return_date', '-r', help='Return date for round trip')
-    parser.add_argument('--output', default='/tmp/jetset_flights.json', help='Output file path')
+    parser.add_argument('--output', help='Output file path (default: unique temp file)')
 
     args = parser.parse_args()
 
-    # Parse the date
-    parsed_date = parse_date(args.date)
-
-    # Search for flights
-    result = search_flights(
-        origin=args.origin,
-        destination=args.destination,
-        date=parsed_date,
-        adults=args.adults,
-        cabin_class=args.cabin_class,
-        return_date=args.return_date
-    )
-
-    # Build output structure
-    output = {
-        "flights": result.get("flights", []),
-        "summary": result.get("summary", {}),
-        "search_params": result.get("search_params", {}),
-        "error": result.get("error")
-    }
+    output = run_search({
+        "origin": args.origin,
+        "destination": args.destination,
+        "date": args.date,
+        "adults": args.adults,
+        "cabin_class": args.cabin_class,
+        "return_date": args.return_date
+    })
+    parsed_date = output["search_params"].get("date", args.date)
 
     # Save to file
     try:
-        with open(args.output, 'w') as f:
-            json.dump(output, f, indent=2)
-        print(f"FLIGHT_FILE_SAVED:{args.output}")
+        output_path = write_results(output, args.output)
+        print(f"FLIGHT_FILE_SAVED:{output_path}")
     except Exception as e:
         print(f"ERROR: Failed to save results: {e}")
         sys.exit(1)
 
     # Print status
-    if result["success"]:
-        flights = result.get("flights", [])
+    if not output["error"]:
+        flights = output.get("flights", [])
         if flights:
-            summary = result.get("summary", {})
+            summary = output.get("summary", {})
             print(f"SUCCESS: Found {len(flights)} flights from {summary.get('origin', args.origin)} to {summary.get('destination', args.destination)} on {parsed_date}")
             print(f"Cheapest: ${summary.get('cheapestPrice', 'N/A')} {summary.get('currency', 'USD')}")
             print(f"Fastest: {summary.get('fastestDuration', 'N/A')}")
         else:
             print(f"NO_FLIGHTS_FOUND: No flights available from {args.origin} to {args.destination} on {parsed_date}")
     else:
-        print(f"ERROR: {result.get('error', 'Unknown error')}")
+        print(f"ERROR: {output.get('error', 'Unknown error')}")
         sys.exit(1)
 
 
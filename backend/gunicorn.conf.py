@@ -0,0 +1,55 @@
+"""
+Production server settings: gunicorn -c gunicorn.conf.py app:app
+
+The chat pipeline is I/O-bound (LLM and gateway round trips), so each worker
+process runs a pool of threads (gthread) and processes scale it across cores.
+Workers share conversations and caches through SQLite files (WAL mode), so
+any worker can serve any request and no sticky sessions are needed.
+
+Configuration (env):
+    PORT                      - listen port (default 9002)
+    GUNICORN_WORKERS          - worker processes (default: CPU count, max 8)
+    GUNICORN_THREADS          - threads per worker (default 16)
+    GUNICORN_TIMEOUT          - seconds before a silent worker is restarted (default 180)
+    GUNICORN_MAX_REQUESTS     - recycle a worker after this many requests (default 2000, 0 = never)
+    CONVERSATION_STORE / CONVERSATION_DB / SHARED_CACHE_DB default to shared SQLite files
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+# .env is read here so the defaults below and the workers see the same settings
+load_dotenv()
+
+# State every worker must see; explicit settings win
+os.environ.setdefault('CONVERSATION_STORE', 'sqlite')
+os.environ.setdefault('CONVERSATION_DB', os.path.join(tempfile.gettempdir(), 'jetset_conversations.db'))
+os.environ.setdefault('SHARED_CACHE_DB', os.path.join(tempfile.gettempdir(), 'jetset_cache.db'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '9002')}"
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(multiprocessing.cpu_count(), 8))))
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+# A chat turn may wait FLIGHT_SEARCH_TIMEOUT (120s) on a search after extraction
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '180'))
+graceful_timeout = 30
+keepalive = 5
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+# The app starts thread pools and CLI workers at import, which do not survive
+# fork, so each worker imports it itself
+preload_app = False
+
+# Heartbeat files on tmpfs avoid stalls when /tmp is on a slow disk
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,202 @@
+"""
+Deterministic fast-path intent parser.
+
+Recognizes the common chat requests without calling the LLM:
+
+    "flights from Beijing to Melbourne next friday"
+    "2 business tickets NYC to London March 15"
+    "Paris to Rome tomorrow, back on sunday"
+    "no, next Wednesday"                 (date change against the last search)
+    "what about Singapore instead"       (destination change)
+
+and returns the same flight_search JSON the LLM would. Dates are kept as the
+user wrote them (only in forms flight_search.parse_date understands), so
+relative dates stay relative. Anything it is not sure about returns None
+and goes to the LLM.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Optional
+
+_WEEKDAY = r"(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+          r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_DAY = r"(?:[12]\d|3[01]|0?[1-9])(?:st|nd|rd|th)?"
+
+# Only date forms parse_date handles deterministically
+DATE = (r"(?:today|tonight|tomorrow|(?:this\s+|next\s+)?weekend|next\s+(?:week|month)"
+        rf"|(?:this\s+|next\s+)?{_WEEKDAY}"
+        r"|\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}/\d{1,2}(?:/\d{4})?"
+        rf"|{_MONTH}\.?\s+{_DAY}(?:,?\s+\d{{4}})?"
+        rf"|{_DAY}\s+(?:of\s+)?{_MONTH}\.?(?:,?\s+\d{{4}})?)")
+
+PLACE = r"[a-z][a-z.'’\- ]*?[a-z.]"
+
+_NUMBERS = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9}
+_CABINS = {'economy': 'ECONOMY', 'premium economy': 'PREMIUM_ECONOMY', 'business': 'BUSINESS', 'first': 'FIRST'}
+_CABIN = r"(?:premium\s+economy|economy|business|first)"
+
+_PASSENGERS_RE = re.compile(
+    rf"\b(?:for\s+)?(\d|{'|'.join(_NUMBERS)})\s+(?:({_CABIN})(?:\s+class)?\s+)?"
+    r"(?:adults?|people|persons?|passengers?|travell?ers?|tickets?|seats?)\b")
+# A cabin word only counts when it clearly names a cabin ("business class", "in first",
+# "fly business", "economy seats"); "business trip" or "the first flight" go to the LLM
+_CABIN_RE = re.compile(rf"\b(?:({_CABIN})\s+(?:class|cabin)(?:\s+(?:tickets?|seats?|flights?))?"
+                       rf"|(?:in|fly(?:ing)?)\s+({_CABIN})(?:\s+(?:tickets?|seats?))?"
+                       rf"|({_CABIN})\s+(?:tickets?|seats?))\b")
+_CABIN_WORD_RE = re.compile(r"\b(?:business|first|economy)\b")
+_RETURN_RE = re.compile(rf"[,;]?\s*(?:and\s+)?(?:returning|return(?:ing)?\s+on|back\s+on|coming\s+back(?:\s+on)?|return)\s+({DATE})\b")
+
+_LEAD = (r"(?:(?:please\s+)?(?:find|search(?:\s+for)?|show|get|book|look(?:ing)?\s+for|i\s+need|i\s+want|i'd\s+like|need|want|are\s+there)"
+         r"(?:\s+(?:me|us))?\s+)?(?:(?:an?|any|some|the|cheap(?:est)?|direct|one[- ]way)\s+)*"
+         r"(?:(?:to\s+)?(?:flights?|fly(?:ing)?|tickets?|trip|plane)\s+)?")
+# Separator between the destination and the date; whitespace is required before
+# the connecting word so it is never taken from the end of a place ("London")
+_DATE_LEAD = r"(?:,?\s+(?:on|for|departing|leaving|this\s+coming))?(?:\s+the)?,?\s+"
+
+_FRESH_RES = [
+    re.compile(rf"^{_LEAD}(?:from\s+)?(?P<origin>{PLACE})\s+(?:to|->|→|-)\s+(?P<destination>{PLACE}){_DATE_LEAD}(?P<date>{DATE})$"),
+    re.compile(rf"^{_LEAD}to\s+(?P<destination>{PLACE})\s+from\s+(?P<origin>{PLACE}){_DATE_LEAD}(?P<date>{DATE})$"),
+    re.compile(rf"^(?:on\s+)?(?P<date>{DATE})\s*,?\s+{_LEAD}(?:from\s+)?(?P<origin>{PLACE})\s+(?:to|->|→|-)\s+(?P<destination>{PLACE})$"),
+]
+_DATE_CHANGE_RE = re.compile(
+    r"^(?:(?:no|nope|actually|sorry|hmm)[,.!]*\s+)*"
+    r"(?:(?:change|switch|move)(?:\s+it)?(?:\s+the\s+date)?\s+to\s+|(?:what|how)\s+about\s+|make\s+it\s+|try\s+)?"
+    rf"(?:on\s+)?(?P<date>{DATE})(?:\s+instead)?$")
+_PLACE_CHANGE_RE = re.compile(
+    r"^(?:(?:no|actually)[,.!]*\s+)?(?:(?:what|how)\s+about|and|try|what\s+if\s+(?:i|we)\s+(?:go|fly))\s+"
+    rf"(?:(?:flying|going)\s+)?(?P<direction>to|from)?\s*(?P<place>{PLACE})(?P<instead>\s+instead)?$")
+
+# Words that never appear in a place name here; their presence means the regex split wrong
+_NOT_PLACE = {'flight', 'flights', 'ticket', 'tickets', 'on', 'for', 'next', 'this', 'the', 'a', 'an',
+              'from', 'to', 'and', 'or', 'with', 'cheap', 'cheapest', 'return', 'returning', 'back',
+              'hotel', 'hotels', 'car', 'cars', 'between', 'until', 'through', 'class', 'me', 'i'}
+# Requests the fast path must leave to the LLM
+_HANDOFF_RE = re.compile(r"\b(?:hotel|hotels|car|cars|rental|taxi|attraction|between|until|through|"
+                         r"multi[- ]city|then|round[- ]trip|cancel|baggage|visa)\b")
+MAX_MESSAGE_LENGTH = 160
+
+
+def _clean_date(text: str) -> str:
+    """'March 15th' -> 'march 15', '15 of March' -> 'march 15'; relative words untouched."""
+    text = re.sub(r"\s+", " ", text.strip().rstrip('.'))
+    text = re.sub(r"(\d)(?:st|nd|rd|th)\b", r"\1", text)
+    text = re.sub(r"\bsept\b", "sep", text)
+    text = re.sub(r"\.(?=\s)", "", text)
+    match = re.match(rf"^(\d{{1,2}})\s+(?:of\s+)?({_MONTH})(,?\s+\d{{4}})?$", text)
+    if match:
+        text = f"{match.group(2)} {match.group(1)}{(',' + match.group(3).lstrip(',')) if match.group(3) else ''}"
+    return text
+
+
+def _clean_place(text: str) -> Optional[str]:
+    place = text.strip(" ,.-'’")
+    words = place.split()
+    if not place or len(words) > 4 or any(w in _NOT_PLACE for w in words) or re.fullmatch(DATE, place):
+        return None
+    if len(words) == 1 and len(place) <= 3:
+        return place.upper()  # airport code or shorthand: JFK, NYC, LA
+    return ' '.join(w.capitalize() for w in words)
+
+
+class IntentParser:
+    """Rule-based flight_search extractor with hit-rate counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.by_kind: Dict[str, int] = {}
+
+    def parse(self, message: str, last_params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """flight_search params for message (applying follow-ups to last_params), or None to use the LLM."""
+        kind, params = self._parse(message or '', last_params or {})
+        with self._lock:
+            self.attempts += 1
+            if params is not None:
+                self.hits += 1
+                self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+        return params
+
+    def _parse(self, message: str, last: Dict[str, Any]):
+        text = ' '.join(message.lower().replace('’', "'").split()).rstrip('!?. ')
+        if not text or len(text) > MAX_MESSAGE_LENGTH or _HANDOFF_RE.search(text):
+            return None, None
+        if last.get('awaiting_date_range_clarification'):
+            return None, None
+
+        params = {"type": "flight_search", "origin": None, "destination": None, "date": None,
+                  "adults": 1, "cabin_class": "ECONOMY", "return_date": None}
+
+        # Passengers, cabin and return date can appear anywhere; pull them out first
+        match = _PASSENGERS_RE.search(text)
+        if match:
+            count = match.group(1)
+            params["adults"] = int(count) if count.isdigit() else _NUMBERS[count]
+            if match.group(2):
+                params["cabin_class"] = _CABINS[' '.join(match.group(2).split())]
+            text = (text[:match.start()] + ' ' + text[match.end():]).strip()
+        match = _CABIN_RE.search(text)
+        if match:
+            cabin = next(group for group in match.groups() if group)
+            params["cabin_class"] = _CABINS[' '.join(cabin.split())]
+            text = (text[:match.start()] + ' ' + text[match.end():]).strip()
+        if _CABIN_WORD_RE.search(text):
+            return None, None  # a cabin word that is not clearly a cabin
+        match = _RETURN_RE.search(text)
+        if match:
+            params["return_date"] = _clean_date(match.group(1))
+            text = text[:match.start()].strip()
+        text = ' '.join(text.split()).strip(' ,')
+
+        for pattern in _FRESH_RES:
+            match = pattern.match(text)
+            if match:
+                origin, destination = _clean_place(match.group('origin')), _clean_place(match.group('destination'))
+                if not origin or not destination or origin.lower() == destination.lower():
+                    continue
+                params.update(origin=origin, destination=destination, date=_clean_date(match.group('date')))
+                return 'search', params
+
+        # Follow-ups only make sense against a complete previous one-way/round-trip search
+        if not (last.get('origin') and last.get('destination') and last.get('date')):
+            return None, None
+        changed_extras = params["adults"] != 1 or params["cabin_class"] != "ECONOMY" or params["return_date"]
+        follow_up = dict(params, origin=last['origin'], destination=last['destination'], date=last['date'],
+                         adults=int(last.get('adults') or 1),
+                         cabin_class=(last.get('cabin_class') or 'ECONOMY').upper(),
+                         return_date=last.get('return_date'))
+
+        match = _DATE_CHANGE_RE.match(text)
+        if match and not changed_extras:
+            if last.get('return_date'):
+                return None, None  # which leg moves is ambiguous
+            follow_up["date"] = _clean_date(match.group('date'))
+            return 'date_change', follow_up
+
+        match = _PLACE_CHANGE_RE.match(text)
+        if match and not changed_extras and (match.group('direction') or match.group('instead')):
+            place = _clean_place(match.group('place'))
+            if not place:
+                return None, None
+            field = 'origin' if match.group('direction') == 'from' else 'destination'
+            follow_up[field] = place
+            if follow_up['origin'].lower() == follow_up['destination'].lower():
+                return None, None
+            return f'{field}_change', follow_up
+
+        return None, None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'attempts': self.attempts,
+                'hits': self.hits,
+                'llm_handoffs': self.attempts - self.hits,
+                'hit_rate': round(self.hits / self.attempts, 3) if self.attempts else 0.0,
+                'by_kind': dict(self.by_kind),
+            }
+
+
+intent_parser = IntentParser()
@@ -0,0 +1,156 @@
+"""
+Tolerant JSON object extraction from model output.
+
+One left-to-right scan finds brace-balanced candidates ("{...}", honouring
+strings and escapes), so long responses never trigger the regex backtracking
+the old greedy patterns did. Each candidate is parsed as-is first, then with
+repairs for common model quirks. The result records which repairs were
+needed:
+
+    control_chars    raw newlines/tabs inside strings
+    smart_quotes     “curly” quotes used as JSON quotes
+    python_literals  None / True / False
+    trailing_commas  {"a": 1,} or [1, 2,]
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '„': '"', '″': '"'})
+_PY_LITERALS = {'None': 'null', 'True': 'true', 'False': 'false'}
+_PY_LITERAL_RE = re.compile(r'\b(None|True|False)\b')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_STRUCTURAL_RE = re.compile(r'[{}"]')
+_STRING_END_RE = re.compile(r'["\\]')
+# An object candidate opens with a key (or is empty); anything else is prose like "{note}"
+_OBJECT_START_RE = re.compile(r'\{\s*(?:["“\']|\})')
+
+_lock = threading.Lock()
+_stats = {'extracted': 0, 'not_found': 0, 'repaired': 0}
+_repair_counts: Dict[str, int] = {}
+
+
+@dataclass
+class JSONExtraction:
+    """A parsed object plus where it was found and the repairs it needed."""
+    value: Dict[str, Any]
+    start: int
+    end: int
+    repairs: Tuple[str, ...] = ()
+
+
+def _balanced_end(text: str, start: int) -> int:
+    """Index just past the brace matching text[start] ('{'), or -1 if it never closes.
+
+    Jumps between structural characters with compiled patterns instead of
+    stepping through every character in Python.
+    """
+    depth = 0
+    pos = start
+    structural = _STRUCTURAL_RE.search
+    string_end = _STRING_END_RE.search
+    while True:
+        match = structural(text, pos)
+        if match is None:
+            return -1
+        ch = match.group()
+        pos = match.end()
+        if ch == '"':
+            # Skip to the closing quote, stepping over escapes
+            while True:
+                match = string_end(text, pos)
+                if match is None:
+                    return -1
+                pos = match.end()
+                if match.group() == '"':
+                    break
+                pos += 1  # the escaped character
+        elif ch == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _outside_strings(text: str, pattern: re.Pattern, repl) -> str:
+    """Apply pattern.sub only to the parts of text that are not inside JSON strings."""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    for i in range(0, len(parts), 2):
+        parts[i] = pattern.sub(repl, parts[i])
+    return ''.join(parts)
+
+
+def _parse(candidate: str) -> Tuple[Optional[Any], Tuple[str, ...]]:
+    """Parse candidate, adding repairs one at a time until it loads."""
+    try:
+        return json.loads(candidate), ()
+    except json.JSONDecodeError:
+        pass
+
+    # strict=False accepts raw control characters inside strings
+    try:
+        return json.loads(candidate, strict=False), ('control_chars',)
+    except json.JSONDecodeError:
+        pass
+
+    repairs = []
+    text = candidate
+    steps = [
+        ('smart_quotes', lambda t: t.translate(_SMART_QUOTES)),
+        ('python_literals', lambda t: _outside_strings(t, _PY_LITERAL_RE, lambda m: _PY_LITERALS[m.group(1)])),
+        ('trailing_commas', lambda t: _outside_strings(t, _TRAILING_COMMA_RE, r'\1')),
+    ]
+    for name, repair in steps:
+        repaired = repair(text)
+        if repaired == text:
+            continue
+        text = repaired
+        repairs.append(name)
+        for strict, extra in ((True, ()), (False, ('control_chars',))):
+            try:
+                return json.loads(text, strict=strict), tuple(repairs) + extra
+            except json.JSONDecodeError:
+                continue
+    return None, ()
+
+
+def iter_json_objects(text: str) -> Iterator[JSONExtraction]:
+    """Yield every top-level JSON object in text, in order of appearance."""
+    if not text:
+        return
+    pos = text.find('{')
+    while pos != -1:
+        end = _balanced_end(text, pos) if _OBJECT_START_RE.match(text, pos) else -1
+        if end != -1:
+            value, repairs = _parse(text[pos:end])
+            if isinstance(value, dict):
+                yield JSONExtraction(value, pos, end, repairs)
+                pos = text.find('{', end)
+                continue
+        # Unbalanced or unparseable: a stray brace, try the next one
+        pos = text.find('{', pos + 1)
+
+
+def extract_json(text: str, predicate: Callable[[Dict[str, Any]], bool] = None) -> Optional[JSONExtraction]:
+    """First top-level JSON object in text (matching predicate, if given), or None."""
+    for extraction in iter_json_objects(text):
+        if predicate is None or predicate(extraction.value):
+            with _lock:
+                _stats['extracted'] += 1
+                if extraction.repairs:
+                    _stats['repaired'] += 1
+                for name in extraction.repairs:
+                    _repair_counts[name] = _repair_counts.get(name, 0) + 1
+            return extraction
+    with _lock:
+        _stats['not_found'] += 1
+    return None
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return dict(_stats, repairs=dict(_repair_counts))
@@ -0,0 +1,215 @@
+"""
+Origin/destination resolution for flight searches.
+
+Turns free-text places ("NYC", "São Paulo", "london ") into a Booking.com
+flight location id. Known places resolve from the offline airport index
+(airport_index.py); the rest go through Search_Flight_Location, are cached,
+and are fed back into the index so repeat routes skip the round trip.
+
+Configuration (env):
+    LOCATION_CACHE_SIZE       - max cached locations (default 2000)
+    LOCATION_CACHE_TTL        - seconds a cached location stays valid (default 86400)
+    LOCATION_RESOLVE_WORKERS  - threads for concurrent origin/destination lookups (default 16)
+    LOCATION_RESOLVE_TIMEOUT  - seconds to wait for both ends of a route (default 30)
+"""
+
+import asyncio
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from typing import Dict, Optional, Tuple
+from ttl_cache import TTLCache
+from shared_cache import shared_namespace
+from airport_index import AirportIndex
+from singleflight import AsyncSingleFlight, SingleFlight
+
+# Common shorthand -> the name Booking.com's location search understands best
+LOCATION_ALIASES = {
+    "nyc": "New York",
+    "new york city": "New York",
+    "ny": "New York",
+    "la": "Los Angeles",
+    "sf": "San Francisco",
+    "san fran": "San Francisco",
+    "dc": "Washington",
+    "washington dc": "Washington",
+    "vegas": "Las Vegas",
+    "philly": "Philadelphia",
+    "hk": "Hong Kong",
+    "kl": "Kuala Lumpur",
+    "peking": "Beijing",
+    "bombay": "Mumbai",
+    "calcutta": "Kolkata",
+    "madras": "Chennai",
+    "saigon": "Ho Chi Minh City",
+    "rio": "Rio de Janeiro",
+    "bkk": "Bangkok",
+}
+
+location_cache = TTLCache(maxsize=int(os.getenv('LOCATION_CACHE_SIZE', '2000')),
+                          ttl=float(os.getenv('LOCATION_CACHE_TTL', '86400')),
+                          shared=shared_namespace('locations'))
+
+RESOLVE_TIMEOUT = float(os.getenv('LOCATION_RESOLVE_TIMEOUT', '30'))
+_resolve_pool = ThreadPoolExecutor(max_workers=int(os.getenv('LOCATION_RESOLVE_WORKERS', '16')),
+                                   thread_name_prefix='resolve-location')
+
+# Identical in-flight Search_Flight_Location calls share one gateway request
+location_lookups = SingleFlight()
+async_location_lookups = AsyncSingleFlight()
+
+_airport_index: Optional[AirportIndex] = None
+_airport_index_lock = threading.Lock()
+
+
+def normalize_location(query: str) -> str:
+    """Fold case, whitespace, punctuation and diacritics: ' São  Paulo.' -> 'sao paulo'."""
+    text = unicodedata.normalize('NFKD', query or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[.,'’()]", ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def canonical_location(query: str) -> str:
+    """Normalized query with common aliases expanded (also normalized)."""
+    key = normalize_location(query)
+    alias = LOCATION_ALIASES.get(key)
+    return normalize_location(alias) if alias else key
+
+
+def get_airport_index() -> Optional[AirportIndex]:
+    """The process-wide offline index, loaded on first use (None when AIRPORT_INDEX=0)."""
+    global _airport_index
+    if os.getenv('AIRPORT_INDEX', '1').lower() in ('0', 'false', 'no'):
+        return None
+    if _airport_index is None:
+        with _airport_index_lock:
+            if _airport_index is None:
+                _airport_index = AirportIndex(canonical_location).load()
+    return _airport_index
+
+
+def resolve_location(booking, query: str) -> Optional[Dict[str, str]]:
+    """
+    Resolve a place to {'id': ..., 'name': ...}: offline index first, then the
+    location cache, then Flights.search_destination.
+
+    Returns None when the gateway knows no such place; gateway errors propagate.
+    """
+    location = _resolve_offline(query)
+    if location:
+        return location
+    key = canonical_location(query)
+    lookup = LOCATION_ALIASES.get(normalize_location(query), query.strip())
+    return _remember_location(query, key, location_lookups.do(key, booking.flights.search_destination, lookup))
+
+
+async def resolve_location_async(booking, query: str) -> Optional[Dict[str, str]]:
+    """
+    resolve_location for an AsyncBookingCom.
+
+    The index and location cache may load, read or write files (the shared
+    SQLite cache, the index JSON), so they are consulted on a thread.
+    """
+    location = await asyncio.to_thread(_resolve_offline, query)
+    if location:
+        return location
+    key = canonical_location(query)
+    lookup = LOCATION_ALIASES.get(normalize_location(query), query.strip())
+    response = await async_location_lookups.do(key, booking.flights.search_destination, lookup)
+    return await asyncio.to_thread(_remember_location, query, key, response)
+
+
+def _resolve_offline(query: str) -> Optional[Dict[str, str]]:
+    """Offline index, then the location cache."""
+    index = get_airport_index()
+    if index is not None:
+        location = index.lookup(query)
+        if location:
+            return location
+    cached = location_cache.get(canonical_location(query))
+    return dict(cached) if cached is not None else None
+
+
+def _remember_location(query: str, key: str, response) -> Optional[Dict[str, str]]:
+    """First Search_Flight_Location match, cached and fed back into the index."""
+    data = response.get('data', []) if isinstance(response, dict) else []
+    if not data:
+        return None
+
+    location = {'id': data[0]['id'], 'name': data[0].get('name', query)}
+    location_cache.set(key, location)
+    index = get_airport_index()
+    if index is not None:
+        index.learn(query, location)
+    return dict(location)
+
+
+class LocationError(Exception):
+    """Origin or destination could not be resolved; str() is a user-facing message."""
+
+
+def _resolve_or_fail(booking, query: str, role: str) -> Dict[str, str]:
+    try:
+        location = resolve_location(booking, query)
+    except Exception as e:
+        raise LocationError(f"Failed to search {role} '{query}': {str(e)}")
+    if not location:
+        raise LocationError(f"Could not find airport/city for {role}: {query}")
+    return location
+
+
+def resolve_route(booking, origin: str, destination: str,
+                  timeout: float = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Resolve origin and destination concurrently.
+
+    Raises LocationError on the first failure or on timeout. The other lookup is
+    then cancelled if it has not started yet, or abandoned if it is in flight.
+    """
+    timeout = RESOLVE_TIMEOUT if timeout is None else timeout
+    lookups = [('origin', origin), ('destination', destination)]
+    futures = [_resolve_pool.submit(_resolve_or_fail, booking, query, role) for role, query in lookups]
+    done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+
+    errors = [str(f.exception()) for f in futures if f in done and f.exception() is not None]
+    if errors or pending:
+        for f in pending:
+            f.cancel()
+        if not errors:
+            errors = [f"Timed out resolving {role} '{query}' after {timeout:g}s"
+                      for (role, query), f in zip(lookups, futures) if f in pending]
+        raise LocationError('; '.join(errors))
+    return futures[0].result(), futures[1].result()
+
+
+async def _resolve_or_fail_async(booking, query: str, role: str) -> Dict[str, str]:
+    try:
+        location = await resolve_location_async(booking, query)
+    except Exception as e:
+        raise LocationError(f"Failed to search {role} '{query}': {str(e)}")
+    if not location:
+        raise LocationError(f"Could not find airport/city for {role}: {query}")
+    return location
+
+
+async def resolve_route_async(booking, origin: str, destination: str,
+                              timeout: float = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """resolve_route for an AsyncBookingCom: both lookups run concurrently on the event loop."""
+    timeout = RESOLVE_TIMEOUT if timeout is None else timeout
+    lookups = [('origin', origin), ('destination', destination)]
+    tasks = [asyncio.ensure_future(_resolve_or_fail_async(booking, query, role)) for role, query in lookups]
+    done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION)
+
+    errors = [str(t.exception()) for t in tasks
+              if t in done and not t.cancelled() and t.exception() is not None]
+    if errors or pending:
+        for t in pending:
+            t.cancel()
+        if not errors:
+            errors = [f"Timed out resolving {role} '{query}' after {timeout:g}s"
+                      for (role, query), t in zip(lookups, tasks) if t in pending]
+        raise LocationError('; '.join(errors))
+    return tasks[0].result(), tasks[1].result()
@@ -0,0 +1,92 @@
+"""
+In-process flight search engine.
+
+Runs flight_search.run_search on a bounded thread pool inside the backend
+process instead of spawning `python3 flight_search.py` for every chat turn.
+Searches are I/O-bound (gateway round trips), so threads are enough and they
+let every search share the already-imported modules and gateway discovery.
+
+Configuration (env):
+    FLIGHT_SEARCH_WORKERS      - max concurrent searches (default 8)
+    FLIGHT_SEARCH_QUEUE_LIMIT  - max searches waiting for a worker (default 32)
+"""
+
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Optional
+from flight_search import run_search
+
+logger = logging.getLogger(__name__)
+
+
+class SearchQueueFull(Exception):
+    """Raised when the engine already has workers + queue_limit searches pending."""
+
+
+class FlightSearchEngine:
+    """Bounded worker pool for flight searches."""
+
+    def __init__(self, max_workers: int = None, queue_limit: int = None):
+        self.max_workers = max_workers or int(os.getenv('FLIGHT_SEARCH_WORKERS', '8'))
+        if queue_limit is None:
+            queue_limit = int(os.getenv('FLIGHT_SEARCH_QUEUE_LIMIT', '32'))
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='flight-search')
+        # One slot per running or queued task; submit() fails fast when exhausted
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_limit)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._failed = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn on the pool. Raises SearchQueueFull instead of queueing unboundedly."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise SearchQueueFull(
+                f"Search queue is full ({self.max_workers} running, {self.queue_limit} queued)")
+        with self._lock:
+            self._pending += 1
+            self._submitted += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]):
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled() and future.exception() is not None:
+                self._failed += 1
+        self._slots.release()
+
+    def search(self, params: Dict[str, Any], timeout: float = None,
+               runner: Callable[[Dict[str, Any]], dict] = run_search) -> dict:
+        """Run one flight search (run_search, or another runner taking params) and wait for its result.
+
+        Raises SearchQueueFull when the engine is saturated and
+        concurrent.futures.TimeoutError if the search exceeds timeout.
+        """
+        return self.submit(runner, params).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queue_limit': self.queue_limit,
+                'pending': self._pending,
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'failed': self._failed,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,166 @@
+"""
+Background flight search jobs.
+
+POST /api/search/jobs submits a search and returns a job id at once; the
+search runs on a dedicated bounded FlightSearchEngine (separate from the one
+chat turns use) and the result is fetched, or long-polled, by id. Slow
+upstream searches are thereby decoupled from HTTP request lifetimes (the
+Express proxy gives up on requests after 120s).
+
+Job records live in this process and, when SHARED_CACHE_DB is set, in the
+shared SQLite table too, so any gunicorn worker can answer for any job.
+
+Configuration (env):
+    SEARCH_JOB_WORKERS      - concurrent job searches (default 4)
+    SEARCH_JOB_QUEUE_LIMIT  - jobs waiting for a worker before submits are refused (default 64)
+    SEARCH_JOB_TTL          - seconds a job record is kept (default 900)
+    SEARCH_JOB_MAX_WAIT     - longest long-poll, in seconds (default 30)
+"""
+
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from flight_search import run_search, run_date_range_search, run_multi_city_search
+from search_engine import FlightSearchEngine, SearchQueueFull
+from shared_cache import shared_namespace
+from ttl_cache import TTLCache
+
+SEARCH_JOB_TTL = float(os.getenv('SEARCH_JOB_TTL', '900'))
+SEARCH_JOB_MAX_WAIT = float(os.getenv('SEARCH_JOB_MAX_WAIT', '30'))
+
+# Runner per params 'type' (default flight_search); each takes the chat's extracted params
+RUNNERS: Dict[str, Callable[[Dict[str, Any]], dict]] = {
+    'flight_search': run_search,
+    'date_range_search': run_date_range_search,
+    'multi_city_search': run_multi_city_search,
+}
+REQUIRED_FIELDS = {
+    'flight_search': ('origin', 'destination', 'date'),
+    'date_range_search': ('origin', 'destination', 'date_range_start'),
+    'multi_city_search': ('legs',),
+}
+
+FINISHED = ('done', 'failed')
+
+
+class SearchJobs:
+    """Submit searches as jobs on a bounded engine and look them up by id."""
+
+    def __init__(self, engine: FlightSearchEngine = None, ttl: float = SEARCH_JOB_TTL, shared=None):
+        self.engine = engine or FlightSearchEngine(
+            max_workers=int(os.getenv('SEARCH_JOB_WORKERS', '4')),
+            queue_limit=int(os.getenv('SEARCH_JOB_QUEUE_LIMIT', '64')))
+        self.ttl = ttl
+        self.shared = shared
+        self._jobs = TTLCache(maxsize=10000, ttl=ttl)
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._durations = []  # recent run times, for Retry-After
+        self.completed = 0
+        self.failed = 0
+
+    @staticmethod
+    def validate(params: Dict[str, Any]) -> Optional[str]:
+        """Error message for unusable params, or None."""
+        kind = params.get('type') or 'flight_search'
+        if kind not in RUNNERS:
+            return f"Unsupported search type '{kind}' (use one of: {', '.join(RUNNERS)})"
+        missing = [field for field in REQUIRED_FIELDS[kind] if not params.get(field)]
+        if missing:
+            return f"Missing required parameters: {', '.join(missing)}"
+        return None
+
+    def submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a search and return its job record. Raises SearchQueueFull when saturated."""
+        kind = params.get('type') or 'flight_search'
+        job = {'job_id': uuid.uuid4().hex, 'status': 'queued', 'type': kind, 'params': params,
+               'created_at': time.time(), 'started_at': None, 'finished_at': None,
+               'result': None, 'error': None}
+        with self._lock:
+            self._events[job['job_id']] = threading.Event()
+        self._save(job)
+        try:
+            self.engine.submit(self._run, job, RUNNERS[kind])
+        except SearchQueueFull:
+            self._forget(job['job_id'])
+            raise
+        return job
+
+    def _run(self, job: Dict[str, Any], runner: Callable[[Dict[str, Any]], dict]):
+        job = dict(job, status='running', started_at=time.time())
+        self._save(job)
+        try:
+            result = runner(job['params'])
+            job.update(status='done', result=result)
+        except Exception as e:
+            job.update(status='failed', error=str(e))
+        job['finished_at'] = time.time()
+        self._save(job)
+        with self._lock:
+            if job['status'] == 'done':
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._durations = (self._durations + [job['finished_at'] - job['started_at']])[-50:]
+            event = self._events.pop(job['job_id'], None)
+        if event is not None:
+            event.set()
+
+    def _save(self, job: Dict[str, Any]):
+        self._jobs.set(job['job_id'], job)
+        if self.shared is not None:
+            now = time.time()
+            self.shared.set(job['job_id'], job, now, now + self.ttl, now + self.ttl)
+
+    def _forget(self, job_id: str):
+        self._jobs.pop(job_id)
+        if self.shared is not None:
+            self.shared.delete(job_id)
+        with self._lock:
+            self._events.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current job record, or None if unknown or expired."""
+        job = self._jobs.get(job_id)
+        if (job is None or job['status'] not in FINISHED) and self.shared is not None:
+            # Another worker may own the job, or have finished it
+            entry = self.shared.get(job_id)
+            job = entry[0] if entry is not None else job
+        return job
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """get(), after waiting up to timeout seconds (capped at SEARCH_JOB_MAX_WAIT) for the job to finish."""
+        deadline = time.monotonic() + min(max(timeout, 0), SEARCH_JOB_MAX_WAIT)
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED or remaining <= 0:
+                return job
+            with self._lock:
+                event = self._events.get(job_id)
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(0.25, remaining))  # owned by another worker
+
+    def retry_after(self) -> int:
+        """Seconds a refused client should wait: the queue ahead of it at the recent average run time."""
+        engine = self.engine.stats()
+        with self._lock:
+            average = sum(self._durations) / len(self._durations) if self._durations else 5.0
+        return max(1, min(60, math.ceil(average * engine['pending'] / engine['workers'])))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waiting = len(self._events)
+            completed, failed = self.completed, self.failed
+        return {'engine': self.engine.stats(), 'unfinished': waiting, 'completed': completed,
+                'failed': failed, 'retry_after': self.retry_after(), 'ttl': self.ttl,
+                'shared': self.shared is not None}
+
+
+search_jobs = SearchJobs(shared=shared_namespace('search_jobs'))
@@ -0,0 +1,167 @@
+"""
+Cross-process second level for TTLCache.
+
+When several worker processes serve the app (gunicorn, see gunicorn.conf.py)
+each has its own in-memory caches. Setting SHARED_CACHE_DB points them all at
+one SQLite key/value table (WAL mode) so a location, fare or extraction cached
+by one worker is reused by the others. TTLCache keeps its in-memory LRU as the
+first level and reads through / writes through to the shared one.
+
+Keys and values must be JSON-serializable (tuples come back as lists, which
+is fine for the values cached here).
+
+Configuration (env):
+    SHARED_CACHE_DB     - SQLite file shared by all workers (unset: per-process caches only)
+    SHARED_CACHE_SWEEP  - seconds between purges of dead entries (default 300)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteKV:
+    """Namespaced key/value table with expiry timestamps, one connection per thread."""
+
+    def __init__(self, path: str, sweep_interval: float = 300):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self.errors = 0
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                dead_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so they are keyed on the pid too
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float, float]]:
+        """(value, stored_at, expires_at) until the entry is dead, else None. Errors count as misses."""
+        try:
+            row = self._conn().execute(
+                'SELECT value, stored_at, expires_at FROM cache WHERE namespace = ? AND key = ? AND dead_at > ?',
+                (namespace, key, time.time())).fetchone()
+        except sqlite3.Error as e:
+            self._error('read', e)
+            return None
+        return (json.loads(row[0]), row[1], row[2]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, stored_at: float, expires_at: float, dead_at: float):
+        try:
+            self._conn().execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, stored_at, expires_at, dead_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, key, json.dumps(value), stored_at, expires_at, dead_at))
+            self._sweep()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self._error('write', e)
+
+    def delete(self, namespace: str, key: Optional[str] = None):
+        try:
+            if key is None:
+                self._conn().execute('DELETE FROM cache WHERE namespace = ?', (namespace,))
+            else:
+                self._conn().execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (namespace, key))
+        except sqlite3.Error as e:
+            self._error('delete', e)
+
+    def ping(self) -> bool:
+        try:
+            self._conn().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _sweep(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        self._conn().execute('DELETE FROM cache WHERE dead_at <= ?', (now,))
+
+    def _error(self, action: str, error: Exception):
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Shared cache {action} failed: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            entries = self._conn().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {'path': self.path, 'entries': entries, 'errors': self.errors,
+                'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0}
+
+
+class SharedNamespace:
+    """One cache's slice of the shared table; keys are JSON-encoded."""
+
+    def __init__(self, kv: SQLiteKV, namespace: str):
+        self.kv = kv
+        self.namespace = namespace
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float, float]]:
+        return self.kv.get(self.namespace, self._key(key))
+
+    def set(self, key: Hashable, value: Any, stored_at: float, expires_at: float, dead_at: float):
+        self.kv.set(self.namespace, self._key(key), value, stored_at, expires_at, dead_at)
+
+    def delete(self, key: Hashable):
+        self.kv.delete(self.namespace, self._key(key))
+
+    def clear(self):
+        self.kv.delete(self.namespace)
+
+
+_kv: Optional[SQLiteKV] = None
+_kv_lock = threading.Lock()
+
+
+def get_shared_kv() -> Optional[SQLiteKV]:
+    """The process-wide shared table, or None when SHARED_CACHE_DB is unset or unusable."""
+    global _kv
+    path = os.getenv('SHARED_CACHE_DB')
+    if not path:
+        return None
+    with _kv_lock:
+        if _kv is None:
+            try:
+                _kv = SQLiteKV(path, sweep_interval=float(os.getenv('SHARED_CACHE_SWEEP', '300')))
+            except sqlite3.Error as e:
+                logger.warning(f"Shared cache disabled, cannot open {path}: {e}")
+                return None
+        return _kv
+
+
+def shared_namespace(namespace: str) -> Optional[SharedNamespace]:
+    """Namespace handle for TTLCache(shared=...), or None when sharing is off."""
+    kv = get_shared_kv()
+    return SharedNamespace(kv, namespace) if kv is not None else None
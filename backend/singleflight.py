@@ -0,0 +1,120 @@
+"""
+Single-flight call coalescing.
+
+Concurrent callers asking for the same key share one execution of the
+underlying call: the first caller runs it, the rest wait and get the same
+result (or exception). Used to keep bursts of identical searches from each
+hitting the gateway. AsyncSingleFlight does the same for coroutines on one
+event loop.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Group of in-flight calls keyed by a hashable key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) unless a call for key is already running; then wait for it.
+
+        Waiters receive the very same result object, so treat it as read-only.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+                'max_waiters': self.max_waiters,
+            }
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutine functions; callers must share one event loop.
+
+    The call runs in its own task and every caller, the first included, awaits
+    it through asyncio.shield, so a caller that is cancelled (timeout, sibling
+    failure) leaves the call running for everyone else.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) unless a call for key is already running; then await that one."""
+        task = self._calls.get(key)
+        if task is not None:
+            self._waiters[key] += 1
+            self.coalesced += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+        else:
+            task = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            self._waiters[key] = 0
+            self.executions += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller has left
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._calls),
+            'max_waiters': self.max_waiters,
+        }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules live flat in backend/; keep the offline index and discovery off disk
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('AIRPORT_INDEX', '0')
+os.environ.setdefault('ANTHROPIC_API_KEY', 'test-key')
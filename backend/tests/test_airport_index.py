@@ -0,0 +1,33 @@
+from airport_index import AirportIndex
+from locations import canonical_location
+
+
+def _index(path, save_interval=0):
+    return AirportIndex(canonical_location, path=str(path), save_interval=save_interval).load()
+
+
+def test_workers_do_not_overwrite_each_others_learned_places(tmp_path):
+    path = tmp_path / 'index.json'
+    first, second = _index(path), _index(path)
+
+    first.learn('Reykjavik', {'id': 'REK.CITY', 'name': 'Reykjavik'})
+    second.learn('Nairobi', {'id': 'NBO.CITY', 'name': 'Nairobi'})
+
+    reloaded = _index(path)
+    assert reloaded.lookup('Reykjavik') == {'id': 'REK.CITY', 'name': 'Reykjavik'}
+    assert reloaded.lookup('Nairobi') == {'id': 'NBO.CITY', 'name': 'Nairobi'}
+
+
+def test_learned_places_are_saved_together(tmp_path):
+    path = tmp_path / 'index.json'
+    index = _index(path, save_interval=3600)
+    before = path.read_text()
+
+    index.learn('Reykjavik', {'id': 'REK.CITY', 'name': 'Reykjavik'})
+    index.learn('Nairobi', {'id': 'NBO.CITY', 'name': 'Nairobi'})
+    assert path.read_text() == before
+
+    index._save_timer.cancel()
+    index._flush()
+    reloaded = _index(path)
+    assert reloaded.lookup('Reykjavik') and reloaded.lookup('Nairobi')
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from booking_com_client import BookingConfig, MCPError, _MCPSession
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A session whose every tool call fails with 404, counting rediscoveries."""
+    cfg = BookingConfig(base_url='http://gateway.test', api_key='k', server_id='booking', tool_prefix='flights-')
+    discoveries = []
+    monkeypatch.setattr(cfg, '_discover_server_id', lambda: discoveries.append(1))
+    monkeypatch.setattr(cfg, '_save_discovery', lambda: None)
+    session = _MCPSession(cfg)
+    monkeypatch.setattr(session, 'load_tool_names', lambda: None)
+
+    def call_tool(name, arguments):
+        raise MCPError("Tool 'flights-Search_Flights' not found", 404)
+
+    monkeypatch.setattr(session, '_call_tool', call_tool)
+    session.discoveries = discoveries
+    return session
+
+
+def test_repeated_404s_rediscover_once_per_interval(session):
+    for _ in range(5):
+        with pytest.raises(MCPError):
+            session.call_tool('Search_Flights', {})
+    assert len(session.discoveries) == 1
+
+
+def test_concurrent_404s_share_one_rediscovery(session):
+    errors = []
+
+    def call():
+        try:
+            session.call_tool('Search_Flights', {})
+        except MCPError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 8
+    assert len(session.discoveries) == 1
@@ -0,0 +1,13 @@
+import os
+
+from conversation_store import SQLiteConversationStore
+
+
+def test_sqlite_connection_is_not_reused_after_fork(tmp_path, monkeypatch):
+    store = SQLiteConversationStore(str(tmp_path / 'conversations.db'))
+    store.append_message('c', 'user', 'hello')
+    parent_conn = store._conn()
+
+    monkeypatch.setattr(os, 'getpid', lambda: -1)  # as seen from a forked child
+    assert store._conn() is not parent_conn
+    assert store.history('c') == [{'role': 'user', 'content': 'hello'}]
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import app
+from conversation_store import MemoryConversationStore
+from ttl_cache import TTLCache
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake extraction: the route comes from the first user message in the history sent."""
+    calls = []
+
+    def call_claude(message, history, system_prompt=None):
+        calls.append((message, history))
+        first = history[0]['content'] if history else message
+        origin, destination = first.replace('flights from ', '').split(' to ')
+        params = {'type': 'flight_search', 'origin': origin, 'destination': destination, 'date': message}
+        return {'success': True, 'response': json.dumps(params), 'error': None}
+
+    monkeypatch.setattr(app, 'call_claude', call_claude)
+    monkeypatch.setattr(app, 'conversation_store', MemoryConversationStore())
+    monkeypatch.setattr(app, 'extraction_cache', TTLCache(maxsize=100, ttl=3600))
+    return calls
+
+
+def _turn(conversation_id, message):
+    app.conversation_store.append_message(conversation_id, 'user', message)
+    params, _ = app.extract_params(message, conversation_id)
+    app.conversation_store.append_message(conversation_id, 'assistant', 'When would you like to fly?')
+    return params
+
+
+def test_follow_up_is_not_shared_between_conversations(llm):
+    _turn('a', 'flights from Beijing to Singapore')
+    _turn('b', 'flights from Paris to Rome')
+
+    a = _turn('a', 'tomorrow')
+    b = _turn('b', 'tomorrow')
+
+    assert (a['origin'], a['destination']) == ('Beijing', 'Singapore')
+    assert (b['origin'], b['destination']) == ('Paris', 'Rome')
+    assert len(llm) == 4
+
+
+def test_identical_first_turn_is_cached(llm):
+    first = _turn('a', 'flights from Paris to Rome')
+    again = _turn('b', 'flights from Paris to Rome')
+
+    assert first == again
+    assert len(llm) == 1
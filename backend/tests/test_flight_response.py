@@ -0,0 +1,17 @@
+import app
+
+
+def _flight(flight_id, price, duration, total_duration):
+    return {'id': flight_id, 'airline': flight_id, 'price': price, 'currency': 'USD', 'stops': 0,
+            'duration': duration, 'totalDuration': total_duration}
+
+
+def test_fastest_is_ranked_on_the_whole_itinerary():
+    # A's first leg is shorter, but B's round trip is shorter overall
+    flights = [_flight('A', 400, '2h 0m', '20h 0m'), _flight('B', 500, '3h 0m', '6h 0m')]
+    params = {'origin': 'LHR', 'destination': 'CDG', 'date': '2026-12-01'}
+
+    response = app.generate_flight_response({'flights': flights, 'summary': {}}, params)
+
+    assert '**Fastest:** B - $500 USD (direct, 6h 0m)' in response
+    assert '**Best Value:** A - $400 USD (direct, 20h 0m)' in response
@@ -0,0 +1,31 @@
+import threading
+import time
+
+import flight_search
+
+
+def test_date_range_fan_out_is_capped_across_searches(monkeypatch):
+    """Concurrent date-range searches never run more per-day searches than the shared limit."""
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def search_flights(**query):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return {"success": True, "flights": [], "summary": {}, "error": None, "search_params": query}
+
+    monkeypatch.setattr(flight_search, 'search_flights', search_flights)
+    monkeypatch.setattr(flight_search, '_fan_out_slots', threading.BoundedSemaphore(3))
+
+    ranges = [threading.Thread(target=flight_search.search_date_range,
+                               args=('LHR', 'CDG', '2026-12-01', '2026-12-07')) for _ in range(4)]
+    for thread in ranges:
+        thread.start()
+    for thread in ranges:
+        thread.join()
+
+    assert peak[0] == 3
@@ -0,0 +1,39 @@
+import pytest
+
+from intent_parser import IntentParser
+
+
+@pytest.fixture
+def parser():
+    return IntentParser()
+
+
+@pytest.mark.parametrize('message', [
+    'business trip from London to Paris tomorrow',
+    'the first flight from London to Paris tomorrow',
+    'first thing tomorrow London to Paris',
+    'London to Paris tomorrow for business',
+])
+def test_ambiguous_cabin_words_go_to_the_llm(parser, message):
+    assert parser.parse(message) is None
+
+
+@pytest.mark.parametrize('message, cabin', [
+    ('business class flights from London to Paris tomorrow', 'BUSINESS'),
+    ('fly first from London to Paris tomorrow', 'FIRST'),
+    ('London to Paris tomorrow in business', 'BUSINESS'),
+    ('economy seats London to Paris tomorrow', 'ECONOMY'),
+    ('2 business tickets NYC to London March 15', 'BUSINESS'),
+    ('London to Paris tomorrow in premium economy', 'PREMIUM_ECONOMY'),
+])
+def test_explicit_cabins(parser, message, cabin):
+    params = parser.parse(message)
+    assert params is not None
+    assert params['cabin_class'] == cabin
+    assert params['destination'] in ('Paris', 'London')
+
+
+def test_plain_search(parser):
+    params = parser.parse('flights from Beijing to Melbourne next friday')
+    assert params == {'type': 'flight_search', 'origin': 'Beijing', 'destination': 'Melbourne',
+                      'date': 'next friday', 'adults': 1, 'cabin_class': 'ECONOMY', 'return_date': None}
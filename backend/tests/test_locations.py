@@ -0,0 +1,22 @@
+import asyncio
+from types import SimpleNamespace
+
+from locations import LocationError, location_cache, resolve_route_async
+
+
+def test_failed_lookup_does_not_cancel_the_same_place_for_another_route():
+    async def search_destination(query):
+        await asyncio.sleep(0.05 if query == 'Lima' else 0.01)
+        return {'data': [{'id': 'LIM.CITY', 'name': 'Lima'}]} if query == 'Lima' else {'data': []}
+
+    booking = SimpleNamespace(flights=SimpleNamespace(search_destination=search_destination))
+
+    async def scenario():
+        location_cache.clear()
+        failing = resolve_route_async(booking, 'Lima', 'Nowhereville')
+        other = resolve_route_async(booking, 'Lima', 'Lima')
+        return await asyncio.gather(failing, other, return_exceptions=True)
+
+    failed, resolved = asyncio.run(scenario())
+    assert isinstance(failed, LocationError)
+    assert resolved == ({'id': 'LIM.CITY', 'name': 'Lima'}, {'id': 'LIM.CITY', 'name': 'Lima'})
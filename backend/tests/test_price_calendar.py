@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+import app
+from conversation_store import MemoryConversationStore
+from search_engine import FlightSearchEngine
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """One-slot engines and a calendar lookup that blocks until released."""
+    release = threading.Event()
+
+    def run_price_calendar(params):
+        release.wait(5)
+        return {'success': True, 'calendar': []}
+
+    monkeypatch.setattr(app, 'run_price_calendar', run_price_calendar)
+    monkeypatch.setattr(app, 'search_engine', FlightSearchEngine(max_workers=1, queue_limit=0))
+    monkeypatch.setattr(app, 'calendar_engine', FlightSearchEngine(max_workers=1, queue_limit=0))
+    yield
+    release.set()
+
+
+def test_calendar_does_not_take_the_searchs_slot(engines):
+    calendar_future = app.fetch_price_calendar({'origin': 'LHR', 'destination': 'CDG', 'date': '2026-12-01'})
+    assert calendar_future is not None
+
+    result = app.run_flight_search({}, runner=lambda params: {'flights': ['BA304'], 'summary': {}})
+    assert result == {'flights': ['BA304'], 'summary': {}}
+
+
+def test_calendar_is_dropped_when_its_workers_are_busy(engines):
+    assert app.fetch_price_calendar({'origin': 'LHR', 'destination': 'CDG', 'date': '2026-12-01'}) is not None
+    assert app.fetch_price_calendar({'origin': 'LHR', 'destination': 'JFK', 'date': '2026-12-01'}) is None
+
+
+def test_offers_event_is_not_changed_by_the_calendar(monkeypatch):
+    events = []
+    monkeypatch.setattr(app, 'conversation_store', MemoryConversationStore())
+    monkeypatch.setattr(app, '_emit_airports', lambda on_progress, routes: None)
+    monkeypatch.setattr(app, 'run_flight_search', lambda params: {'flights': [], 'summary': {}})
+    monkeypatch.setattr(app, 'fetch_price_calendar', lambda params: None)
+    monkeypatch.setattr(app, 'price_calendar_result', lambda future: {'success': True, 'calendar': []})
+    monkeypatch.setattr(app, 'generate_flight_response', lambda flight_data, params: 'Here you go')
+
+    params = {'type': 'flight_search', 'origin': 'LHR', 'destination': 'CDG', 'date': '2026-12-01'}
+    _, flight_data = app.handle_params(params, '', 'c', on_progress=lambda event, data: events.append((event, data)))
+
+    offers = dict(events)['offers']
+    assert 'price_calendar' not in offers
+    assert flight_data['price_calendar'] == {'success': True, 'calendar': []}
+
+
+def test_calendar_endpoint_uses_the_calendar_workers(engines):
+    client = app.app.test_client()
+    query = '/api/price-calendar?origin=LHR&destination=CDG&date=2026-12-01'
+    assert app.fetch_price_calendar({'origin': 'LHR', 'destination': 'JFK', 'date': '2026-12-01'}) is not None
+
+    assert client.get(query).status_code == 503
+    assert app.search_engine.stats()['submitted'] == 0
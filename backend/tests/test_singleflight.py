@@ -0,0 +1,42 @@
+import asyncio
+
+from singleflight import AsyncSingleFlight
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    async def scenario():
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'LON.CITY'
+
+        leader = asyncio.ensure_future(group.do('london', lookup))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(group.do('london', lookup))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == 'LON.CITY'
+        assert leader.cancelled()
+        assert calls == [1]
+        assert group.stats()['in_flight'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        group = AsyncSingleFlight()
+
+        async def lookup():
+            await asyncio.sleep(0.01)
+            raise ValueError('gateway down')
+
+        results = await asyncio.gather(group.do('x', lookup), group.do('x', lookup), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+        assert group.stats()['executions'] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,140 @@
+"""
+Small thread-safe LRU cache with per-entry TTL and hit/miss counters.
+
+Used by the search pipeline for location lookups and other gateway results
+that are safe to reuse for a while. With stale_ttl > 0 expired entries are
+kept for that much longer so callers can serve them while they refresh
+(stale-while-revalidate, see lookup()).
+
+With shared set (see shared_cache.py) the LRU is the first level of a
+two-level cache: misses and expired entries are looked up in the shared
+store, and every set() is written through to it, so worker processes reuse
+each other's results.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """LRU cache bounded by maxsize where entries expire ttl seconds after being set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, stale_ttl: float = 0, shared=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.shared = shared
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    def _entry(self, key: Hashable, now: float) -> Optional[tuple]:
+        """Local entry for key; if it is missing or expired, the shared one when that is newer."""
+        with self._lock:
+            entry = self._data.get(key)
+        if self.shared is None or (entry is not None and now < entry[2]):
+            return entry
+        shared = self.shared.get(key)
+        if shared is None or (entry is not None and shared[1] <= entry[1]):
+            return entry
+        with self._lock:
+            self._data[key] = shared
+            self._data.move_to_end(key)
+            self._evict()
+            self.shared_hits += 1
+        return shared
+
+    def _evict(self):
+        # Caller holds the lock
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def lookup(self, key: Hashable) -> Optional[Tuple[Any, float, bool]]:
+        """Return (value, age_seconds, is_fresh), or None if absent or past the stale window."""
+        now = time.time()
+        entry = self._entry(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at, expires_at = entry
+            if now >= expires_at + self.stale_ttl:
+                self._data.pop(key, None)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if key in self._data:
+                self._data.move_to_end(key)
+            fresh = now < expires_at
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return value, now - stored_at, fresh
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Fresh value for key, else default (stale entries count as misses here)."""
+        now = time.time()
+        entry = self._entry(key, now)
+        with self._lock:
+            if entry is None or now >= entry[2]:
+                if entry is not None and now >= entry[2] + self.stale_ttl and self._data.pop(key, None):
+                    self.expirations += 1
+                self.misses += 1
+                return default
+            if key in self._data:
+                self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, now, expires_at)
+            self._data.move_to_end(key)
+            self._evict()
+        if self.shared is not None:
+            self.shared.set(key, value, now, expires_at, expires_at + self.stale_ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(key)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'shared': self.shared is not None,
+                'shared_hits': self.shared_hits,
+            }
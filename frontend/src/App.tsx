@@ -3,11 +3,40 @@ import ChatMessage from './components/ChatMessage';
 import ChatInput from './components/ChatInput';
 import LoadingIndicator from './components/LoadingIndicator';
 import Sidebar from './components/Sidebar';
-import type { Message, ChatResponse } from './types';
+import type { Message, ChatStreamEvent } from './types';
 import './index.css';
 
 const API_URL = '';
 
+// Read a text/event-stream body and hand each parsed event to onEvent
+async function readChatStream(body: ReadableStream<Uint8Array>, onEvent: (evt: ChatStreamEvent) => void) {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) {
+        onEvent({ event, data: JSON.parse(data) } as ChatStreamEvent);
+      }
+    }
+  }
+}
+
 function App() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [isLoading, setIsLoading] = useState(false);
@@ -46,8 +75,17 @@ function App() {
     setMessages((prev) => [...prev, userMessage]);
     setIsLoading(true);
 
+    const assistantId = (Date.now() + 1).toString();
+    const upsertAssistant = (patch: Partial<Message>) => {
+      setMessages((prev) =>
+        prev.some((m) => m.id === assistantId)
+          ? prev.map((m) => (m.id === assistantId ? { ...m, ...patch } : m))
+          : [...prev, { id: assistantId, role: 'assistant', content: '', timestamp: new Date(), ...patch }]
+      );
+    };
+
     try {
-      const response = await fetch(`${API_URL}/api/chat`, {
+      const response = await fetch(`${API_URL}/api/chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -58,25 +96,34 @@ function App() {
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to get response');
       }
 
-      const data: ChatResponse = await response.json();
+      // Render flight cards as soon as offers arrive; the summary text follows
+      let finished = false;
+      await readChatStream(response.body, (evt) => {
+        if (evt.event === 'offers' && evt.data.flights?.length) {
+          upsertAssistant({
+            content: `Found ${evt.data.flights.length} flights - putting together the highlights... ✈️`,
+            flightData: evt.data,
+          });
+          setIsLoading(false);
+        } else if (evt.event === 'summary') {
+          upsertAssistant({ content: evt.data.response, flightData: evt.data.flight_data });
+          finished = true;
+        } else if (evt.event === 'error') {
+          throw new Error(evt.data.details || evt.data.error);
+        }
+      });
 
-      // Add assistant message with flight data if available
-      const assistantMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        content: data.response,
-        timestamp: new Date(),
-        flightData: data.flight_data,
-      };
-      setMessages((prev) => [...prev, assistantMessage]);
+      if (!finished) {
+        throw new Error('Stream ended before the response was complete');
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       const errorMessage: Message = {
-        id: (Date.now() + 1).toString(),
+        id: `${assistantId}-error`,
         role: 'assistant',
         content: "I apologize, but I'm having trouble connecting right now. Please try again in a moment! 😊",
         timestamp: new Date(),
@@ -6,6 +6,17 @@ export interface Message {
   flightData?: FlightData;
 }
 
+export interface FlightSegment {
+  airline: string;
+  flightNumber?: string;
+  departure: Flight['departure'];
+  arrival: Flight['arrival'];
+  duration: string;
+  durationSeconds: number;
+  stops: number;
+  layovers?: string[];
+}
+
 export interface Flight {
   id: string;
   airline: string;
@@ -25,8 +36,10 @@ export interface Flight {
     city: string;
   };
   duration: string;
+  totalDuration?: string;
   stops: number;
   layovers?: string[];
+  segments?: FlightSegment[];
   class?: string;
   tags?: string[];
   token?: string;
@@ -40,6 +53,39 @@ export interface FlightData {
     fastestDuration: string;
     averagePrice: number;
   };
+  cached?: boolean;
+  age_s?: number;
+  price_calendar?: PriceCalendar | null;
+  comparison?: RoundTripComparison | null;
+}
+
+export interface RoundTripComparison {
+  roundTripPrice: number;
+  oneWaysPrice: number;
+  currency: string;
+  cheaperOption: 'round_trip' | 'one_ways';
+  savings: number;
+  outboundFlightId: string;
+  inboundFlightId: string;
+}
+
+export interface PriceCalendarDay {
+  date: string;
+  price: number | null;
+  currency: string;
+  cheapest: boolean;
+}
+
+export interface PriceCalendar {
+  success: boolean;
+  origin: string;
+  destination: string;
+  date: string;
+  currency: string | null;
+  days: PriceCalendarDay[];
+  cheapestDate: string | null;
+  cached: boolean;
+  error: string | null;
 }
 
 export interface ChatResponse {
@@ -51,4 +97,12 @@ export interface ChatResponse {
     input: any;
   }>;
   needs_continuation?: boolean;
-}
\ No newline at end of file
+}
+
+export type ChatStreamEvent =
+  | { event: 'intent'; data: { params: Record<string, any> } }
+  | { event: 'airports'; data: { routes: Array<{ origin: { id: string; name: string }; destination: { id: string; name: string } }> } }
+  | { event: 'offers'; data: FlightData }
+  | { event: 'summary'; data: ChatResponse }
+  | { event: 'done'; data: { conversation_id: string } }
+  | { event: 'error'; data: { error: string; details?: string } };
@@ -31,6 +31,84 @@ app.post('/api/chat', async (req, res) => {
   }
 });
 
+// Server-Sent Events: pipe the backend stream through without buffering or a timeout
+app.post('/api/chat/stream', async (req, res) => {
+  const controller = new AbortController();
+  res.on('close', () => controller.abort());
+  try {
+    const response = await axios.post(`${BACKEND_URL}/api/chat/stream`, req.body, {
+      headers: { 'Content-Type': 'application/json' },
+      responseType: 'stream',
+      signal: controller.signal
+    });
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    });
+    response.data.pipe(res);
+  } catch (error) {
+    if (controller.signal.aborted) return;
+    console.error('API Error:', error.message);
+    res.status(error.response?.status || 500).json({
+      error: 'Failed to process request',
+      details: error.message
+    });
+  }
+});
+
+app.get('/api/price-calendar', async (req, res) => {
+  try {
+    const response = await axios.get(`${BACKEND_URL}/api/price-calendar`, {
+      params: req.query,
+      timeout: 120000
+    });
+    res.json(response.data);
+  } catch (error) {
+    console.error('API Error:', error.message);
+    res.status(error.response?.status || 500).json(error.response?.data || {
+      error: 'Failed to get price calendar',
+      details: error.message
+    });
+  }
+});
+
+// Background search jobs: submit returns 202 with a job id, then poll (or long-poll with ?wait=N)
+app.post('/api/search/jobs', async (req, res) => {
+  try {
+    const response = await axios.post(`${BACKEND_URL}/api/search/jobs`, req.body, {
+      headers: { 'Content-Type': 'application/json' },
+      timeout: 30000
+    });
+    if (response.headers.location) res.set('Location', response.headers.location);
+    res.status(response.status).json(response.data);
+  } catch (error) {
+    console.error('API Error:', error.message);
+    if (error.response?.headers['retry-after']) res.set('Retry-After', error.response.headers['retry-after']);
+    res.status(error.response?.status || 500).json(error.response?.data || {
+      error: 'Failed to submit search',
+      details: error.message
+    });
+  }
+});
+
+app.get('/api/search/jobs/:jobId', async (req, res) => {
+  try {
+    const response = await axios.get(`${BACKEND_URL}/api/search/jobs/${encodeURIComponent(req.params.jobId)}`, {
+      params: req.query,
+      timeout: 120000
+    });
+    res.json(response.data);
+  } catch (error) {
+    console.error('API Error:', error.message);
+    res.status(error.response?.status || 500).json(error.response?.data || {
+      error: 'Failed to get search job',
+      details: error.message
+    });
+  }
+});
+
 app.post('/api/reset', async (req, res) => {
   try {
     const response = await axios.post(`${BACKEND_URL}/api/reset`, req.body, {
@@ -59,16 +59,19 @@ echo "✅ Frontend build complete"
 
 echo ""
 
-# Start backend
+# Start backend (gunicorn, settings in backend/gunicorn.conf.py)
 echo "📦 Starting Flask backend on port 9002..."
 cd backend
 source .venv/bin/activate
-python app.py &
+gunicorn -c gunicorn.conf.py app:app &
 BACKEND_PID=$!
 cd ..
 
-# Wait for backend to start
-sleep 3
+# Wait for backend to be ready
+for i in $(seq 1 30); do
+    curl -sf http://localhost:9002/ready > /dev/null && break
+    sleep 1
+done
 
 # Start Express server (serves production build + proxies API)
 echo "🌐 Starting Express server on port 3004..."